@@ -187,17 +187,76 @@ app.get('/download-audio/:requestId', async (req, res) => {
   }
 });
 
+// The Python podcast store (src/podcast_store.py) keeps a manifest journal of
+// title -> content-addressed blob. It is replayed only when it changes, so a
+// listing is served from memory instead of a readdir of the audio directory.
+const manifestFile = path.join(podcastsDir, 'manifest.jsonl');
+let manifestCache = { mtimeMs: -1, size: -1, podcasts: null };
+
+const loadManifest = (stat) => {
+  const entries = new Map();
+  const lines = fs.readFileSync(manifestFile, 'utf8').split('\n');
+  lines.pop(); // empty after the final newline, or a torn last line
+  let skipped = 0;
+  for (const line of lines) {
+    let record;
+    try {
+      record = JSON.parse(line);
+    } catch (e) {
+      skipped++; // corrupt line; the records after it are still good
+      continue;
+    }
+    if (!record || typeof record.k !== 'string') {
+      skipped++;
+      continue;
+    }
+    if (!record.k.startsWith('episode:')) continue;
+    if (record.d) entries.delete(record.k);
+    else entries.set(record.k, record.v);
+  }
+  if (skipped) console.error(`Skipped ${skipped} corrupt line(s) in ${manifestFile}`);
+  const podcasts = [...entries.values()]
+    .sort((a, b) => b.added - a.added)
+    .map(entry => {
+      const blob = path.join('blobs', entry.sha256.slice(0, 2), `${entry.sha256}${entry.ext}`);
+      return {
+        name: `${entry.title}${entry.ext}`,
+        title: entry.title,
+        size: entry.size,
+        path: path.join(podcastsDir, blob),
+        url: `/podcasts/${blob.split(path.sep).join('/')}`
+      };
+    });
+  manifestCache = { mtimeMs: stat.mtimeMs, size: stat.size, podcasts };
+  return podcasts;
+};
+
 app.get('/podcasts', (req, res) => {
-  fs.readdir(podcastsDir, (err, files) => {
-    if (err) {
-      console.error('Error reading podcasts directory:', err);
-      return res.status(500).json({ error: 'Error reading podcasts directory' });
+  fs.stat(manifestFile, (statErr, stat) => {
+    if (!statErr) {
+      try {
+        const fresh = stat.mtimeMs === manifestCache.mtimeMs && stat.size === manifestCache.size;
+        return res.json(fresh ? manifestCache.podcasts : loadManifest(stat));
+      } catch (err) {
+        console.error('Error reading podcast manifest:', err);
+        return res.status(500).json({ error: 'Error reading podcast manifest' });
+      }
     }
-    const podcasts = files.map(file => ({
-      name: file,
-      path: path.join(podcastsDir, file)
-    }));
-    res.json(podcasts);
+
+    // No manifest yet: fall back to listing the directory
+    fs.readdir(podcastsDir, (err, files) => {
+      if (err) {
+        console.error('Error reading podcasts directory:', err);
+        return res.status(500).json({ error: 'Error reading podcasts directory' });
+      }
+      // Skip the .idx seek tables the MP3 indexer keeps next to each file
+      const audio = files.filter(file => ['.mp3', '.wav'].includes(path.extname(file).toLowerCase()));
+      const podcasts = audio.map(file => ({
+        name: file,
+        path: path.join(podcastsDir, file)
+      }));
+      res.json(podcasts);
+    });
   });
 });
 
@@ -24,7 +24,7 @@ const PodcastsPage = () => {
   }, []);
 
   const handlePlayPause = (podcast) => {
-    if (currentPodcast && currentPodcast.path === podcast.path) {
+    if (currentPodcast && currentPodcast.name === podcast.name) {
       if (isPlaying) {
         audioRef.current.pause();
       } else {
@@ -57,7 +57,7 @@ const PodcastsPage = () => {
           <ListItem key={index} component="li" button onClick={() => handlePlayPause(podcast)}>
             <ListItemText primary={podcast.name} />
             <IconButton edge="end" color="primary">
-              {currentPodcast && currentPodcast.path === podcast.path && isPlaying ? <PauseIcon /> : <PlayArrowIcon />}
+              {currentPodcast && currentPodcast.name === podcast.name && isPlaying ? <PauseIcon /> : <PlayArrowIcon />}
             </IconButton>
           </ListItem>
         ))}
@@ -1,16 +1,20 @@
-import time
 import requests
 import os
 import json
+from http_client import get_client
+from journal_store import JournalStore
+from cache_keys import content_request_key
+from status_poller import StatusPoller
+from podcast_store import store_audio_stream
 
-# Read the token from the ../API-KEY.txt file
-with open('../../API-KEY.txt', 'r') as file:
-    token = file.read().strip()
+api_key_file = '../../API-KEY.txt'
+_token = None
 
 create_url = 'https://api.autocontentapi.com/Content/Create'
 status_base_url = 'https://api.autocontentapi.com/content/status/'
-poll_interval = 5  # Poll every 5 seconds
-cache_file = 'audio_cache.json'
+# Status polling adapts to each job's progress (see status_poller.py)
+cache_file = 'audio_cache.jsonl'
+legacy_cache_file = 'audio_cache.json'  # old whole-file cache, imported on first open
 
 # The request data to create the content
 request_data = {
@@ -24,78 +28,78 @@ request_data = {
     "outputType": "audio"
 }
 
+def get_token():
+    # Read the token from the ../API-KEY.txt file (or $AUTOCONTENT_API_KEY) on first use
+    global _token
+    if _token is None:
+        _token = os.environ.get('AUTOCONTENT_API_KEY')
+        if not _token:
+            with open(api_key_file, 'r') as file:
+                _token = file.read().strip()
+    return _token
+
 def load_cache():
-    if os.path.exists(cache_file):
-        with open(cache_file, 'r') as file:
-            return json.load(file)
-    return {}
+    # Append-only journal: opening replays it into an in-memory index
+    cache = JournalStore(cache_file)
+    imported = cache.import_json(legacy_cache_file, key_func=lambda key: content_request_key(json.loads(key)))
+    if imported:
+        print(f'Imported {imported} cached results from {legacy_cache_file}')
+    return cache
 
 def save_cache(cache):
-    with open(cache_file, 'w') as file:
-        json.dump(cache, file, indent=4)
+    # Writes are appended and fsynced as they happen; flush anything batched
+    cache.commit()
 
-def create_content():
+def create_content(data=request_data):
     headers = {
-        'Authorization': f'Bearer {token}',
+        'Authorization': f'Bearer {get_token()}',
         'Content-Type': 'application/json',
         'accept': 'text/plain'
     }
-    response = requests.post(create_url, json=request_data, headers=headers)
+    response = get_client('autocontent').post(create_url, json=data, headers=headers)
     response.raise_for_status()
     return response.json()
 
-def poll_status(request_id):
-    headers = {
-        'Authorization': f'Bearer {token}',
+def status_headers():
+    return {
+        'Authorization': f'Bearer {get_token()}',
         'Content-Type': 'application/json',
         'accept': 'application/json'
     }
-    url = f'{status_base_url}{request_id}'
-
-    while True:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-
-        status = data.get('status')
-        error_message = data.get('error_message')
-        audio_url = data.get('audio_url')
-        audio_title = data.get('audio_title')
-
-        if error_message:
-            print('Error from status check:', error_message)
-            return None
-
-        if status == 100:
-            print('Content creation complete!')
-            print('Audio URL:', audio_url)
-            print('Audio Title:', audio_title)
-            file_path = download_audio(audio_url, audio_title)
-            return file_path
-
-        print(f'Current status: {status}. Waiting for 100...')
-        time.sleep(poll_interval)
-
-def download_audio(audio_url, audio_title):
-    response = requests.get(audio_url, stream=True)
+
+def download_finished(request_id, data):
+    # Runs as soon as a job reports status 100, while the others keep polling
+    print('Audio URL:', data.get('audio_url'))
+    print('Audio Title:', data.get('audio_title'))
+    return download_audio(data.get('audio_url'), data.get('audio_title'))
+
+def poll_many(request_ids, on_complete=download_finished):
+    # Tracks every request from one event loop; returns {request_id: file_path or None}
+    poller = StatusPoller(status_base_url, status_headers())
+    try:
+        return poller.run(request_ids, on_complete)
+    finally:
+        poller.close()
+
+def poll_status(request_id):
+    return poll_many([request_id])[request_id]
+
+def download_audio(audio_url, audio_title, encoder=None):
+    response = get_client('autocontent').get(audio_url, stream=True)
     response.raise_for_status()
-    
-    # Ensure the podcasts directory exists
-    os.makedirs('../podcasts', exist_ok=True)
-    
-    # Create the file path
-    file_path = f'../podcasts/{audio_title}.wav'
-    
-    # Save the audio file
-    with open(file_path, 'wb') as file:
-        for chunk in response.iter_content(chunk_size=8192):
-            file.write(chunk)
-    
+
+    # The WAV stream goes straight into the encoder (ffmpeg if installed)
+    # and is hashed on the way into the content-addressed podcast store;
+    # the title only lives in its manifest
+    with response:
+        file_path = store_audio_stream(response.iter_content(chunk_size=64 * 1024), audio_title, encoder)
+
     print(f'Audio downloaded successfully: {file_path}')
+    return file_path
 
 def main():
     cache = load_cache()
-    query_key = json.dumps(request_data, sort_keys=True)
+    query_key = content_request_key(request_data)
     
     if query_key in cache:
         print('Using cached result.')
@@ -0,0 +1,82 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from broadcast_scheduler import BroadcastScheduler, simulate, URGENT
+
+SIZES = (1000, 10000, 100000)
+OPS = 500
+START = 1_700_000_000.0
+
+
+def per_op_us(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def scaling(n):
+    """
+    One channel with 'n' queued items: cost of each operation.
+    """
+    rng = random.Random(n)
+    scheduler = BroadcastScheduler(probe=None, now=START)
+    for i in range(n):
+        scheduler.enqueue("ch", f"e{i}", rng.randint(600, 3600))
+    ids = rng.sample(list(scheduler.items), OPS)
+    air = per_op_us(scheduler.air_time, ids)
+    urgent = per_op_us(lambda i: scheduler.enqueue("ch", "bulletin", 60, URGENT), range(OPS))
+    cancel = per_op_us(scheduler.cancel, ids)
+    enqueue = per_op_us(lambda i: scheduler.enqueue("ch", "more", 1800), range(OPS))
+    return enqueue, urgent, cancel, air
+
+
+def restart(tmp):
+    """
+    Persists a day of queue on 300 channels, then times reopening it.
+    """
+    path = os.path.join(tmp, "schedule.jsonl")
+    rng = random.Random(3)
+    scheduler = BroadcastScheduler(path, probe=None, now=START)
+    with scheduler.batch():
+        for c in range(300):
+            for i in range(42):
+                scheduler.enqueue(f"ch-{c:03d}", f"e{i}", rng.randint(600, 3600))
+            scheduler.urgent(f"ch-{c:03d}", "bulletin", 90)
+    scheduler.advance(START + 3600)
+    before = {item_id: scheduler.air_time(item_id) for item_id in scheduler.items}
+    scheduler.close()
+
+    start = time.perf_counter()
+    reopened = BroadcastScheduler(path, probe=None, now=START)
+    reopen_ms = (time.perf_counter() - start) * 1000
+    after = {item_id: reopened.air_time(item_id) for item_id in reopened.items}
+    reopened.close()
+    return len(before), reopen_ms, before == after, os.path.getsize(path)
+
+
+def main():
+    print(f"{'queued':>7} {'enqueue us':>11} {'urgent us':>10} {'cancel us':>10} {'air_time us':>12}")
+    for n in SIZES:
+        print(f"{n:>7} " + " ".join(f"{v:>{w}.2f}" for v, w in zip(scaling(n), (11, 10, 10, 12))))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        items, reopen_ms, same, size = restart(tmp)
+        print(f"\nrestart: {items} queued items ({size / 1e6:.1f} MB journal) reopened in {reopen_ms:.1f} ms, "
+              f"air times {'identical' if same else 'DIFFER'}")
+
+        for label, path in (("in memory", None), ("persisted", os.path.join(tmp, "week.jsonl"))):
+            stats = simulate(300, 7, check_every=30, state_path=path)
+            print(f"week, 300 channels, {label:<9}: {stats['run_s']:5.1f} s, {stats['aired']} aired, "
+                  f"{stats['urgent']} urgent, {stats['cancelled']} cancelled, "
+                  f"{stats['checked']} air times checked, {stats['mismatches']} off")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import io
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from PIL import Image
+
+import http_client
+from cover_cache import CoverCache
+from range_server import RangeServer
+
+LATENCY = 0.05
+COVER_PIXELS = (1600, 2400)  # a large scan, as some LibGen covers are
+RUNS = 10
+
+
+def make_cover(path):
+    image = Image.linear_gradient("L").resize(COVER_PIXELS).convert("RGB")
+    image.save(path, "JPEG", quality=92)
+
+
+def old_popup_cover(url, size):
+    # What open_book_popup did before: download + full-size decode + resize
+    response = http_client.get_client().get(url)
+    response.raise_for_status()
+    image = Image.open(io.BytesIO(response.content))
+    image.thumbnail(size, Image.LANCZOS)
+    return image
+
+
+def median_ms(fn, runs=RUNS):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2] * 1000
+
+
+def main():
+    size = (300, 400)
+    with tempfile.TemporaryDirectory() as tmp:
+        site = os.path.join(tmp, "site")
+        os.makedirs(os.path.join(site, "covers"))
+        make_cover(os.path.join(site, "covers", "big.jpg"))
+        jpeg = open(os.path.join(site, "covers", "big.jpg"), "rb").read()
+
+        full = median_ms(lambda: Image.open(io.BytesIO(jpeg)).load())
+
+        def draft_decode():
+            image = Image.open(io.BytesIO(jpeg))
+            image.draft("RGB", size)
+            image.load()
+        draft = median_ms(draft_decode)
+
+        with RangeServer(site, latency=LATENCY) as server:
+            url = server.url("covers/big.jpg")
+            old = median_ms(lambda: old_popup_cover(url, size))
+
+            cold = []
+            for i in range(RUNS):
+                covers = CoverCache(os.path.join(tmp, f"cold-{i}"))
+                start = time.perf_counter()
+                covers.load(url, size)
+                cold.append(time.perf_counter() - start)
+            cold_ms = sorted(cold)[RUNS // 2] * 1000
+
+            covers = CoverCache(os.path.join(tmp, "warm"))
+            covers.load(url, size)
+
+        # The stand-in is gone now: warm loads must not need the network
+        warm = median_ms(lambda: covers.load(url, size))
+        thumb = covers.load(url, size)
+
+    print(f"{COVER_PIXELS[0]}x{COVER_PIXELS[1]} JPEG cover ({len(jpeg) // 1024} KB), "
+          f"{int(LATENCY * 1000)} ms latency, thumbnail {size}")
+    print(f"decode full size:                       {full:8.2f} ms")
+    print(f"decode with draft mode:                 {draft:8.2f} ms")
+    print(f"old popup path (fetch + full decode):   {old:8.2f} ms")
+    print(f"CoverCache cold (fetch + draft + save): {cold_ms:8.2f} ms")
+    print(f"CoverCache disk hit (server stopped):   {warm:8.2f} ms  -> {thumb.size}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import http_client
+from bench_tk_tasks import EventLoop
+from cover_cache import CoverCache
+from detail_cache import DetailCache, DetailPrefetcher
+from range_server import RangeServer
+from run_benchmarks import build_site, route_to
+
+LATENCY = 0.2
+BUDGET = 8
+WORKERS = 2
+
+
+class Counter:
+    """
+    Wraps the popup fetch to count calls and the most running at once.
+    """
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.calls = 0
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, link):
+        with self.lock:
+            self.calls += 1
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            return self.fn(link)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def main():
+    import libgen_tk
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build_site(tmp)
+        with RangeServer(tmp, latency=LATENCY) as server:
+            route_to(server)
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = libgen_tk.fetch_libgen_results("chemistry")
+                links = [book["download_link"] for book in results if "md5=" in book["download_link"]]
+
+                # Old behaviour: every click fetches the detail page and cover
+                covers = CoverCache(os.path.join(tmp, "covers-cold"))
+                start = time.perf_counter()
+                libgen_tk.fetch_book_popup_data(links[0], covers)
+                cold_ms = (time.perf_counter() - start) * 1000
+
+                # Speculative prefetch of the top results right after the search
+                loop = EventLoop()
+                details = DetailCache()
+                covers = CoverCache(os.path.join(tmp, "covers-warm"))
+                images = {}
+
+                def on_result(link, data):
+                    metadata, cover = data
+                    details.put(link, metadata)
+                    images[link] = cover
+
+                fetch = Counter(lambda link: libgen_tk.fetch_book_popup_data(link, covers, details.get(link)))
+                prefetcher = DetailPrefetcher(loop, fetch, on_result,
+                                              needs_fetch=lambda link: link not in details,
+                                              budget=BUDGET, max_workers=WORKERS)
+                start = time.perf_counter()
+                submitted = prefetcher.prefetch(links)
+                loop.run_until(lambda: prefetcher.pending() == 0)
+                warm_up_s = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for link in links[:BUDGET]:
+                    assert details.get(link) and images[link] is not None
+                warm_ms = (time.perf_counter() - start) * 1000 / BUDGET
+                # Later searches reach the same books again without a request
+                again = prefetcher.prefetch(links[:BUDGET])
+                prefetcher.shutdown()
+
+                # A new search cancels the speculation still queued
+                loop = EventLoop()
+                details = DetailCache()
+                cancelled = Counter(lambda link: libgen_tk.fetch_book_popup_data(link, covers))
+                prefetcher = DetailPrefetcher(loop, cancelled, on_result, budget=BUDGET, max_workers=WORKERS)
+                prefetcher.prefetch(links)
+                loop.after(50, prefetcher.cancel)
+                loop.run_until(lambda: prefetcher.pending() == 0)
+                prefetcher.shutdown()
+            http_client.clear_routes()
+
+    print(f"{len(results)} results, {int(LATENCY * 1000)} ms server latency, "
+          f"budget {BUDGET}, {WORKERS} workers")
+    print(f"details click, no prefetch:        {cold_ms:8.2f} ms")
+    print(f"details click, prefetched (cache): {warm_ms:8.3f} ms")
+    print(f"prefetch of the top {submitted} took {warm_up_s:.2f} s, "
+          f"{fetch.calls} fetches, at most {fetch.peak} at once")
+    print(f"same top {BUDGET} again -> {again} new fetches")
+    print(f"cancelled 50 ms in -> {cancelled.calls} of {BUDGET} fetches started")
+
+
+if __name__ == "__main__":
+    main()
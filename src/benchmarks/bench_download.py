@@ -0,0 +1,59 @@
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from downloader import download_file
+from range_server import RangeServer
+
+FILE_SIZE = 32 * 1024 * 1024
+BANDWIDTH = 8 * 1024 * 1024  # bytes/sec per connection
+LATENCY = 0.05
+
+
+def sha256_of(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def run(server, name, out_path, segments):
+    calls = []
+    start = time.perf_counter()
+    download_file(server.url(name), out_path,
+                  progress_callback=lambda done, total: calls.append((done, total)),
+                  segments=segments)
+    elapsed = time.perf_counter() - start
+    failed = bool(calls) and calls[-1] == (-1, -1)
+    return elapsed, failed, calls
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        name = "book.pdf"
+        src = os.path.join(tmp, name)
+        with open(src, "wb") as f:
+            f.write(os.urandom(FILE_SIZE))
+        expected = sha256_of(src)
+
+        print(f"{FILE_SIZE // (1024 * 1024)} MB file, {BANDWIDTH // (1024 * 1024)} MB/s per connection, "
+              f"{int(LATENCY * 1000)} ms latency")
+
+        for accept_ranges in (True, False):
+            with RangeServer(tmp, latency=LATENCY, bandwidth=BANDWIDTH, accept_ranges=accept_ranges) as server:
+                for segments in (1, 4, 8):
+                    out_path = os.path.join(tmp, f"out-{segments}.pdf")
+                    elapsed, failed, calls = run(server, name, out_path, segments)
+                    ok = not failed and sha256_of(out_path) == expected and calls[-1][0] == FILE_SIZE
+                    print(f"ranges={'yes' if accept_ranges else 'no ':<3} segments={segments}: "
+                          f"{elapsed:6.2f}s  {FILE_SIZE / elapsed / 1e6:7.1f} MB/s  ok={ok}")
+
+
+if __name__ == "__main__":
+    main()
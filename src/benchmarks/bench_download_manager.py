@@ -0,0 +1,49 @@
+import asyncio
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import download_manager
+from download_manager import DONE, DownloadManager
+
+SLOW_HOST_JOBS = 6   # queued first, all on one host
+FAST_HOST_JOBS = 2   # queued behind them, on another host
+TRANSFER = 0.5       # seconds per download
+
+
+def fake_download(url, out_path, progress_callback=None, segments=None):
+    time.sleep(TRANSFER)
+    return True
+
+
+def main():
+    # The transfer is simulated: this measures scheduling, not bandwidth
+    download_manager.download_file = fake_download
+    books = ([{"title": f"slow {i}", "host": "busy.example"} for i in range(SLOW_HOST_JOBS)]
+             + [{"title": f"fast {i}", "host": "idle.example"} for i in range(FAST_HOST_JOBS)])
+    finished = {}
+    start = time.perf_counter()
+
+    def on_update(job):
+        if job.state == DONE:
+            finished[job.title] = time.perf_counter() - start
+
+    manager = DownloadManager(max_concurrent=4, per_host=2, on_update=on_update,
+                              resolve_link=lambda book: f"https://{book['host']}/{book['title']}",
+                              prepare=lambda book: os.devnull)
+    asyncio.run(manager.run(books))
+
+    fast = max(t for title, t in finished.items() if title.startswith("fast"))
+    slow = max(t for title, t in finished.items() if title.startswith("slow"))
+    print(f"{SLOW_HOST_JOBS} jobs on a busy host queued ahead of {FAST_HOST_JOBS} on an idle one, "
+          f"4 slots, 2 per host, {TRANSFER} s each")
+    print(f"idle host's jobs done after {fast:.2f} s (one transfer: {TRANSFER:.2f} s)")
+    print(f"busy host's jobs done after {slow:.2f} s")
+    print(f"{len(finished)}/{len(books)} done")
+
+
+if __name__ == "__main__":
+    main()
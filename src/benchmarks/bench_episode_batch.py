@@ -0,0 +1,74 @@
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import http_client
+from journal_store import JournalStore
+from range_server import RangeServer
+from run_benchmarks import build_site, route_to
+
+LATENCY = 0.2
+EPISODES = 12
+RATE_LIMIT = 10
+MAX_IN_FLIGHT = 6
+
+
+def specs():
+    return [{"title": f"Chemistry {i + 1}", "prompt": "quiz", "text": f"Unit {i + 1}.",
+             "resources": [{"content": "https://youtu.be/lz_gMkQr7YE", "type": "youtube"}]}
+            for i in range(EPISODES)]
+
+
+def main():
+    import ai_inference
+    from episode_batch import EpisodeBatch, build_request
+
+    os.environ.setdefault("AUTOCONTENT_API_KEY", "offline-benchmark")
+    with tempfile.TemporaryDirectory() as tmp:
+        build_site(tmp)
+        work = os.path.join(tmp, "work")
+        os.makedirs(work)
+        cwd = os.getcwd()
+        os.chdir(work)  # download_audio writes to ../podcasts
+        try:
+            with RangeServer(tmp, latency=LATENCY) as server:
+                route_to(server)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    # Old workflow: one create + poll + download after another
+                    start = time.perf_counter()
+                    for spec in specs():
+                        created = ai_inference.create_content(build_request(spec))
+                        ai_inference.poll_status(created["request_id"])
+                    sequential = time.perf_counter() - start
+
+                    cache = JournalStore(os.path.join(work, "audio_cache.jsonl"))
+                    batch = EpisodeBatch(rate_limit=RATE_LIMIT, max_in_flight=MAX_IN_FLIGHT, cache=cache)
+                    asyncio.run(batch.run(specs()))
+                    report = batch.report()
+
+                    again = EpisodeBatch(cache=cache)
+                    asyncio.run(again.run(specs()))
+                http_client.clear_routes()
+        finally:
+            os.chdir(cwd)
+
+    stats = batch.stats()
+    print(f"{EPISODES} episodes, {int(LATENCY * 1000)} ms server latency, "
+          f"rate limit {RATE_LIMIT}/s, {MAX_IN_FLIGHT} in flight\n")
+    print(report)
+    print(f"\none after another: {sequential:6.2f} s ({EPISODES / sequential * 60:6.1f} episodes/min)")
+    print(f"EpisodeBatch:      {stats['elapsed']:6.2f} s ({stats['per_minute']:6.1f} episodes/min)")
+    rerun = again.stats()
+    print(f"second run: {rerun['cached']} cached, {rerun['create_calls']} create calls")
+
+
+if __name__ == "__main__":
+    main()
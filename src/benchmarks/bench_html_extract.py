@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from bs4 import BeautifulSoup
+
+from libgen_parser import parse_search_table, parse_book_details
+
+FIXTURES = os.path.join(HERE, "fixtures")
+LIBGEN_DOMAIN = "https://libgen.is"
+
+
+# --------------------------------------------------------------------
+# Reference implementations: the BeautifulSoup code libgen.py and
+# libgen_tk.py used before the targeted parsers, kept verbatim so the
+# fast versions can be checked against them.
+# --------------------------------------------------------------------
+def fix_url(url):
+    if not url:
+        return None
+    url = url.strip()
+    if url.startswith("/"):
+        return LIBGEN_DOMAIN + url
+    if not url.startswith("http"):
+        return LIBGEN_DOMAIN + "/" + url
+    return url
+
+
+def reference_search_page(html):
+    soup = BeautifulSoup(html, "html.parser")
+    tables = soup.find_all("table")
+    if len(tables) < 3:
+        return []
+    result_table = tables[2]
+    rows = result_table.find_all("tr")
+    if not rows:
+        return []
+    books = []
+    for row in rows[1:]:
+        cols = row.find_all("td")
+        if len(cols) < 11:
+            continue
+        mirror1_tag = cols[9].find("a")
+        mirror2_tag = cols[10].find("a")
+        mirror1 = mirror1_tag["href"] if mirror1_tag else None
+        mirror2 = mirror2_tag["href"] if mirror2_tag else None
+        mirror1 = fix_url(mirror1)
+        mirror2 = fix_url(mirror2)
+        books.append({
+            "id":         cols[0].get_text(strip=True),
+            "author":     cols[1].get_text(strip=True),
+            "title":      cols[2].get_text(strip=True),
+            "publisher":  cols[3].get_text(strip=True),
+            "year":       cols[4].get_text(strip=True),
+            "pages":      cols[5].get_text(strip=True),
+            "language":   cols[6].get_text(strip=True),
+            "size":       cols[7].get_text(strip=True),
+            "extension":  cols[8].get_text(strip=True),
+            "mirror1":    mirror1,
+            "mirror2":    mirror2
+        })
+    return books
+
+
+def reference_book_details(content):
+    soup = BeautifulSoup(content, "lxml")
+    metadata = {}
+    for row in soup.find_all("tr"):
+        cells = row.find_all("td")
+        if len(cells) == 2:
+            metadata[cells[0].get_text(strip=True)] = cells[1].get_text(strip=True)
+    img_tag = soup.find("img", src=True)
+    if img_tag:
+        cover_src = img_tag["src"]
+        cover_url = cover_src if cover_src.startswith("http") else f"https://libgen.is/{cover_src}"
+    else:
+        cover_url = None
+    metadata["cover_url"] = cover_url
+    return metadata
+
+
+# --------------------------------------------------------------------
+# Inputs: the recorded pages plus variants that poke at the edge cases
+# (unclosed cells, stray end tags, script text, entities, encodings).
+# --------------------------------------------------------------------
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def search_variants(html):
+    first_row = html.index("<tr", html.index("<table", html.index("<table", html.index("<table") + 1) + 1) + 1)
+    yield "recorded page", html
+    yield "stray </div> in table", html[:first_row] + "</div>" + html[first_row:]
+    yield "script + entity in cell", html.replace("<td>", "<td><script>var x = '<b>';</script>&amp;&eacute; ", 5)
+    yield "unclosed cells", html.replace("</td>", "", 30)
+    yield "commented-out table", "<!-- <table></table> -->" + html
+    yield "long tail", html.replace("</body>", "<div>" + "<p>filler</p>" * 5000 + "</div></body>")
+    yield "no results table", "<html><body><table></table></body></html>"
+    yield "entities in attributes", html.replace("<a href='", "<a title='R&amp;D &quot;x&quot;' href='", 5)
+    yield "unquoted value before />", html.replace("<td>", "<td><a href=x/>y</a>", 3)
+    yield "self-closing and upper case", html.replace("<td>", "<TD><br/><Img SRC=a.png >", 5)
+    yield "bare '<' in text", html.replace("<td>", "<td>1 < 2 ", 3)
+    yield "comment in table", html.replace("<td>", "<td><!-- x --></td><td>", 2)
+
+
+def detail_variants(html):
+    yield "recorded page", html.encode("utf-8")
+    yield "script in cell", html.replace("<td>", "<td><script>track()</script>", 3).encode("utf-8")
+    yield "no cover", html.replace("<img", "<span").encode("utf-8")
+    yield "windows-1252, no charset", ("<html><body><table><tr><td>Title:</td><td>Café – x</td></tr>"
+                                       "</table></body></html>").encode("windows-1252")
+    yield "empty", b""
+
+
+def time_it(fn, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs
+
+
+def main(runs=50):
+    search_html = read_fixture("search_chemistry.html")
+    detail_html = read_fixture("detail_book.html")
+
+    print("equivalence with the BeautifulSoup implementations")
+    ok = True
+    for name, html in search_variants(search_html):
+        match = parse_search_table(html, fix_url) == reference_search_page(html)
+        ok &= match
+        print(f"  search  {name:<28} {match}")
+    for name, content in detail_variants(detail_html):
+        match = parse_book_details(content) == reference_book_details(content)
+        ok &= match
+        print(f"  detail  {name:<28} {match}")
+
+    print(f"\n{'page':<8} {'bs4 (ms)':>10} {'targeted (ms)':>14} {'speedup':>9}")
+    cases = [
+        ("search", lambda: reference_search_page(search_html), lambda: parse_search_table(search_html, fix_url)),
+        ("detail", lambda: reference_book_details(detail_html.encode("utf-8")),
+         lambda: parse_book_details(detail_html.encode("utf-8"))),
+    ]
+    for name, old, new in cases:
+        old_time = time_it(old, runs)
+        new_time = time_it(new, runs)
+        print(f"{name:<8} {old_time * 1000:>10.2f} {new_time * 1000:>14.2f} {old_time / new_time:>8.1f}x")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
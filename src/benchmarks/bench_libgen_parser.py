@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from libgen_parser import parse_search_results, parse_libgen_li_link, parse_get_link
+
+FIXTURES = os.path.join(HERE, "fixtures")
+CHEERIO_FIXTURE = os.path.join(HERE, "cheerio_fixture.js")
+
+# (node mode, fixture file, in-process parser, how to read node's JSON output)
+CASES = [
+    ("search", "search_chemistry.html", parse_search_results, lambda out: out),
+    ("mirror", "detail_book.html", parse_libgen_li_link, lambda out: out["link"]),
+    ("get", "ads_libgen_li.html", parse_get_link, lambda out: out["link"]),
+]
+
+
+def run_node(mode, path):
+    result = subprocess.run(["node", CHEERIO_FIXTURE, mode, path], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout)
+
+
+def time_it(fn, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs
+
+
+def main(python_runs=200, node_runs=10):
+    print(f"{'case':<8} {'python (ms)':>12} {'node subprocess (ms)':>22} {'speedup':>9}  match")
+    for mode, fixture, parser, unwrap in CASES:
+        path = os.path.join(FIXTURES, fixture)
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+
+        match = parser(html) == unwrap(run_node(mode, path))
+
+        py_time = time_it(lambda: parser(html), python_runs)
+        node_time = time_it(lambda: run_node(mode, path), node_runs)
+        print(f"{mode:<8} {py_time * 1000:>12.2f} {node_time * 1000:>22.2f} "
+              f"{node_time / py_time:>8.1f}x  {match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from mp3_index import load_index
+from podcast_store import PodcastStore
+
+REPO = os.path.dirname(os.path.dirname(HERE))
+LISTENERS = 1000
+CHUNK = 256 * 1024        # bytes per Range request, like a player filling its buffer
+DURATION = 6.0            # seconds of load per server
+REVALIDATIONS = 5         # conditional listing requests per client
+TICK = os.sysconf("SC_CLK_TCK")
+
+# The stand-in from range_server (thread per connection, read() + write()),
+# with a listen backlog that can take the same burst of connections
+THREADED = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from http.server import ThreadingHTTPServer
+ThreadingHTTPServer.request_queue_size = 2048
+from range_server import RangeServer
+with RangeServer(sys.argv[2]) as server:
+    print("Serving on " + server.base_url, flush=True)
+    server.thread.join()
+"""
+
+
+def start_server(args):
+    """Runs a server in its own process; returns it and the port it printed."""
+    proc = subprocess.Popen(args, stdout=subprocess.PIPE, text=True, cwd=os.path.dirname(HERE))
+    return proc, int(proc.stdout.readline().rsplit(":", 1)[1])
+
+
+def proc_usage(pid):
+    """(CPU seconds, peak RSS in MB) of a process so far."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    with open(f"/proc/{pid}/status") as f:
+        peak = next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+    return (int(fields[11]) + int(fields[12])) / TICK, peak / 1024
+
+
+async def request(reader, writer, target, headers=""):
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: bench\r\n{headers}\r\n".encode())
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    fields = {k.strip().lower(): v.strip() for k, _, v in (line.partition(":") for line in lines[1:] if line)}
+    body = await reader.readexactly(int(fields.get("content-length", 0)))
+    return int(lines[0].split()[1]), fields, body
+
+
+async def listener(port, episodes, rng, stats, gate, stop):
+    """
+    One keep-alive connection streaming an episode in CHUNK-sized ranges
+    from a random position, checking every byte against the file.
+    """
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    except OSError:
+        stats["errors"] += 1
+        stats["settled"] += 1
+        return
+    stats["settled"] += 1
+    await gate.wait()
+    target, data = rng.choice(episodes)
+    pos = rng.randrange(0, len(data), CHUNK)
+    try:
+        while time.perf_counter() < stop[0]:
+            end = min(pos + CHUNK, len(data))
+            began = time.perf_counter()
+            status, _, body = await request(reader, writer, target, f"Range: bytes={pos}-{end - 1}\r\n")
+            stats["latency"].append(time.perf_counter() - began)
+            stats["bytes"] += len(body)
+            if status != 206 or body != data[pos:end]:
+                stats["errors"] += 1
+            pos = end if end < len(data) else 0
+    except (ConnectionError, asyncio.IncompleteReadError):
+        stats["errors"] += 1
+    writer.close()
+
+
+async def load(port, episodes):
+    """
+    LISTENERS connections opened up front, then released together for
+    DURATION seconds.
+    """
+    stats = {"settled": 0, "latency": [], "bytes": 0, "errors": 0}
+    gate = asyncio.Event()
+    stop = [0.0]
+    opened = time.perf_counter()
+    tasks = [asyncio.create_task(listener(port, episodes, random.Random(i), stats, gate, stop))
+             for i in range(LISTENERS)]
+    while stats["settled"] < LISTENERS:
+        await asyncio.sleep(0.01)
+    connect_s = time.perf_counter() - opened
+    began = time.perf_counter()
+    stop[0] = began + DURATION
+    gate.set()
+    await asyncio.gather(*tasks)
+    return stats, time.perf_counter() - began, connect_s
+
+
+async def revalidate(port):
+    """
+    Every client fetches the listing once, then revalidates it with
+    If-None-Match. Returns {status: count}.
+    """
+    statuses = {}
+
+    async def client():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        status, fields, _ = await request(reader, writer, "/podcasts")
+        statuses[status] = statuses.get(status, 0) + 1
+        for _ in range(REVALIDATIONS):
+            status, _, _ = await request(reader, writer, "/podcasts", f"If-None-Match: {fields['etag']}\r\n")
+            statuses[status] = statuses.get(status, 0) + 1
+        writer.close()
+
+    await asyncio.gather(*(client() for _ in range(LISTENERS)))
+    return statuses
+
+
+async def checks(port, flat):
+    """
+    Protocol behaviour the load does not exercise. Returns failed checks.
+    """
+    name = sorted(n for n in os.listdir(flat) if n.endswith(".mp3"))[0]
+    with open(os.path.join(flat, name), "rb") as f:
+        data = f.read()
+    target = f"/podcasts/{quote(name)}"
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    failed = []
+
+    status, fields, body = await request(reader, writer, target)
+    if status != 200 or body != data or fields.get("cache-control") != "public, max-age=31536000, immutable":
+        failed.append("full body by title")
+    etag = fields["etag"]
+    if (await request(reader, writer, target, f"If-None-Match: {etag}\r\n"))[0] != 304:
+        failed.append("If-None-Match")
+    status, _, body = await request(reader, writer, target, "Range: bytes=-100\r\n")
+    if status != 206 or body != data[-100:]:
+        failed.append("suffix range")
+    if (await request(reader, writer, target, f"Range: bytes={len(data)}-\r\n"))[0] != 416:
+        failed.append("unsatisfiable range")
+    status, _, body = await request(reader, writer, target, 'Range: bytes=0-9\r\nIf-Range: "stale"\r\n')
+    if status != 200 or len(body) != len(data):
+        failed.append("If-Range mismatch")
+
+    index = load_index(os.path.join(flat, name))
+    status, _, body = await request(reader, writer, f"{target}?t=60")
+    if status != 200 or body != data[index.offset_at(60):]:
+        failed.append("time seek")
+    status, fields, _ = await request(reader, writer, "/study-guides")
+    revalidated, _, _ = await request(reader, writer, "/study-guides", f"If-None-Match: {fields['etag']}\r\n")
+    if status != 200 or revalidated != 304:
+        failed.append("study guide listing")
+    for listing in ("/podcasts", "/study-guides"):
+        entries = json.loads((await request(reader, writer, listing))[2])
+        if not entries or any("path" in entry or "url" not in entry for entry in entries):
+            failed.append(f"{listing} urls only")
+    if (await request(reader, writer, "/podcasts/..%2F..%2Fetc%2Fpasswd"))[0] != 404:
+        failed.append("path traversal")
+    for hidden in ("manifest.jsonl", "blobs/tmp"):
+        if (await request(reader, writer, f"/podcasts/{hidden}"))[0] != 404:
+            failed.append(f"{hidden} hidden")
+    writer.close()
+
+    async def rejected(target, headers=""):
+        # a 400 closes the connection, so each gets its own
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        status = (await request(reader, writer, target, headers))[0]
+        writer.close()
+        return status == 400
+
+    for t in ("nan", "inf", "-inf", "abc"):
+        if not await rejected(f"{target}?t={t}"):
+            failed.append(f"t={t}")
+    if not await rejected(target, "Content-Length: abc\r\n"):
+        failed.append("bad Content-Length")
+    return failed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        flat = os.path.join(tmp, "flat")
+        shutil.copytree(os.path.join(REPO, "podcasts"), flat, ignore=shutil.ignore_patterns("*.idx", "blobs",
+                                                                                            "manifest.jsonl"))
+        study_guides = shutil.copytree(os.path.join(REPO, "study_guides"), os.path.join(tmp, "study_guides"))
+        store = PodcastStore(os.path.join(tmp, "store"))
+        store.import_directory(flat)
+        store.close()
+
+        episodes = []
+        for name in sorted(os.listdir(flat)):
+            if name.endswith(".mp3"):
+                with open(os.path.join(flat, name), "rb") as f:
+                    episodes.append((f"/{quote(name)}", f.read()))
+        indexes = [load_index(os.path.join(flat, n)) for n in os.listdir(flat) if n.endswith(".mp3")]
+        bitrate = sum(i.bitrate for i in indexes) / len(indexes)
+        print(f"{LISTENERS} keep-alive listeners, {CHUNK // 1024} KB ranges, {DURATION:.0f} s, "
+              f"{len(episodes)} episodes ({sum(len(d) for _, d in episodes) / 1e6:.1f} MB)")
+        print(f"{'server':<22} {'connect s':>9} {'req/s':>7} {'MB/s':>7} {'p50 ms':>7} {'p99 ms':>7} "
+              f"{'errors':>6} {'CPU s/GB':>8} {'peak MB':>7}")
+
+        servers = (
+            ("asyncio + sendfile", [sys.executable, "media_server.py", "0", store.root, study_guides],
+             "/podcasts"),
+            ("threads + read/write", [sys.executable, "-c", THREADED, HERE, flat], ""),
+        )
+        for label, args, prefix in servers:
+            proc, port = start_server(args)
+            try:
+                failed = asyncio.run(checks(port, flat)) if prefix else None
+                cpu_before, _ = proc_usage(proc.pid)
+                stats, elapsed, connect_s = asyncio.run(load(port, [(prefix + t, d) for t, d in episodes]))
+                cpu, peak = proc_usage(proc.pid)
+                revalidated = asyncio.run(revalidate(port)) if prefix else None
+            finally:
+                proc.terminate()
+                proc.wait()
+
+            latency = sorted(stats["latency"])
+            rate = stats["bytes"] / elapsed
+            print(f"{label:<22} {connect_s:9.2f} {len(latency) / elapsed:7.0f} {rate / 1e6:7.1f} "
+                  f"{latency[len(latency) // 2] * 1000:7.1f} {latency[int(len(latency) * 0.99)] * 1000:7.1f} "
+                  f"{stats['errors']:6d} {(cpu - cpu_before) / (stats['bytes'] / 1e9):8.2f} {peak:7.1f}")
+            if prefix:
+                media = (label, rate, failed, revalidated)
+
+    label, rate, failed, revalidated = media
+    print(f"\n{label}: {rate * 8 / bitrate:.0f} real-time listeners' worth of throughput "
+          f"at the library's {bitrate / 1000:.0f} kbps")
+    print(f"listing revalidation: {revalidated}")
+    print(f"protocol checks: {'all passed' if not failed else 'FAILED ' + ', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
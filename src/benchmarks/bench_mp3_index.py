@@ -0,0 +1,119 @@
+import mmap
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from broadcast_scheduler import MP3_BITRATE
+from mp3_index import build_index, frame_info, index_directory, load_index, _vbr_tag
+
+REPO_PODCASTS = os.path.join(os.path.dirname(os.path.dirname(HERE)), "podcasts")
+SEEKS = 2000
+
+
+def all_offsets(path, index):
+    """Every audio frame offset, by walking from the first audio frame."""
+    offsets = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = index.audio_start
+        while len(offsets) < index.frame_count:
+            offsets.append(pos)
+            pos += frame_info(struct.unpack_from(">I", mm, pos)[0])[0]
+    return offsets
+
+
+def declared_frames(path, index):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # The info frame, if any, is the one right before the audio
+        for pos in range(max(index.audio_start - 2000, 0), index.audio_start):
+            info = frame_info(struct.unpack_from(">I", mm, pos)[0])
+            if info and pos + info[0] == index.audio_start:
+                return _vbr_tag(mm, pos, struct.unpack_from(">I", mm, pos)[0], info[3])[1]
+    return None
+
+
+def damaged_copy(src, dst):
+    """'src' with junk spliced between two frames and an ID3v1 tag."""
+    index = build_index(src)
+    cut = all_offsets(src, index)[index.frame_count // 2]
+    with open(src, "rb") as f:
+        data = f.read()
+    with open(dst, "wb") as f:
+        f.write(data[:cut] + b"\xff\x00junk" * 100 + data[cut:] + b"TAG" + b"\0" * 125)
+    return index.frame_count
+
+
+def main():
+    if not os.path.isdir(REPO_PODCASTS):
+        print("no ../podcasts directory to index")
+        return
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        library = os.path.join(tmp, "podcasts")
+        shutil.copytree(REPO_PODCASTS, library, ignore=shutil.ignore_patterns("*.idx"))
+        paths = sorted(os.path.join(library, f) for f in os.listdir(library) if f.endswith(".mp3"))
+
+        start = time.perf_counter()
+        cold = index_directory(library)
+        cold_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        warm = index_directory(library)
+        warm_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{'file':<44} {'MB':>5} {'frames':>7} {'indexed s':>10} {'size est s':>10} {'declared':>9}")
+        frames = 0
+        for path in paths:
+            index = cold[path]
+            frames += index.frame_count
+            estimate = os.path.getsize(path) * 8 / MP3_BITRATE
+            declared = declared_frames(path, index)
+            mark = "ok" if declared == index.frame_count else f"{declared}"
+            print(f"{os.path.basename(path)[:44]:<44} {index.size / 1e6:5.2f} {index.frame_count:7d} "
+                  f"{index.duration:10.2f} {estimate:10.2f} {mark:>9}")
+        table_bytes = sum(os.path.getsize(p + ".idx") for p in paths)
+        audio_bytes = sum(os.path.getsize(p) for p in paths)
+        print(f"\nindex {len(paths)} files, cold:   {cold_ms:7.1f} ms ({cold_ms / len(paths):.1f} ms/file, "
+              f"{cold_ms * 1000 / frames:.2f} us/frame)")
+        print(f"index {len(paths)} files, cached: {warm_ms:7.2f} ms")
+        print(f"seek tables: {table_bytes / 1024:.0f} KB for {audio_bytes / 1e6:.1f} MB of audio")
+
+        # Seeking: compare offset_at against the frame found by a full walk
+        wrong = 0
+        seek_s = 0.0
+        for path in paths:
+            index = warm[path]
+            offsets = all_offsets(path, index)
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                times = [rng.uniform(0, index.duration) for _ in range(SEEKS // len(paths))]
+                start = time.perf_counter()
+                found = [index.offset_at(t, mm) for t in times]
+                seek_s += time.perf_counter() - start
+            wrong += sum(offsets[int(t / index.frame_duration)] != o for t, o in zip(times, found))
+        seeks = SEEKS // len(paths) * len(paths)
+        print(f"seek: {seeks} random times, {seek_s / seeks * 1e6:.1f} us each, {wrong} off the exact frame")
+
+        # Invalidation: a touched file is re-indexed, an untouched one is not
+        path = paths[0]
+        os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        start = time.perf_counter()
+        load_index(path)
+        rebuilt_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        load_index(path)
+        cached_ms = (time.perf_counter() - start) * 1000
+        print(f"after touching a file: rebuilt in {rebuilt_ms:.1f} ms, then {cached_ms:.2f} ms from cache")
+
+        damaged = os.path.join(tmp, "damaged.mp3")
+        expected = damaged_copy(paths[-1], damaged)
+        index = build_index(damaged)
+        print(f"junk mid-stream + ID3v1 tag: {index.frame_count} frames indexed, {expected} expected")
+
+
+if __name__ == "__main__":
+    main()
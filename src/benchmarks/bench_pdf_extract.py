@@ -0,0 +1,132 @@
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from pdf_extract import WORKERS, PdfReader, PdfText
+
+ASSETS = os.path.join(os.path.dirname(os.path.dirname(HERE)), "assets")
+# Two of the downloaded books (by title prefix), bound into one ~640-page volume
+PARTS = ("learner's polish-english dictionary", "the roma: a minority in europe")
+LATENCY = 0.2
+
+
+def bind_book(path):
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for prefix in PARTS:
+        name = next(n for n in sorted(os.listdir(ASSETS)) if n.startswith(prefix))
+        writer.append(os.path.join(ASSETS, name))
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def extract_inline(path):
+    """What a one-off script would do: every page in this process."""
+    reader = PdfReader(path)
+    return [(page.extract_text() or "").strip() for page in reader.pages]
+
+
+def streamed_batch(book, cache_dir):
+    """
+    One episode per chapter through EpisodeBatch against the recorded
+    AutoContent API. Returns (seconds to the first Content/Create call,
+    seconds until the book was fully extracted, episodes).
+    """
+    import http_client
+    from episode_batch import CREATING, EpisodeBatch
+    from journal_store import JournalStore
+    from range_server import RangeServer
+    from run_benchmarks import build_site, route_to
+
+    os.environ.setdefault("AUTOCONTENT_API_KEY", "offline-benchmark")
+    site = os.path.join(cache_dir, "site")
+    build_site(site)
+    work = os.path.join(cache_dir, "work")
+    os.makedirs(work)
+    first_create = []
+
+    def on_update(job):
+        if job.state == CREATING and not first_create:
+            first_create.append(time.perf_counter())
+
+    cwd = os.getcwd()
+    os.chdir(work)  # download_audio writes to ../podcasts
+    try:
+        with RangeServer(site, latency=LATENCY) as server, PdfText(os.path.join(cache_dir, "pages")) as pdfs:
+            route_to(server)
+            batch = EpisodeBatch(rate_limit=10, max_in_flight=6, on_update=on_update, pdfs=pdfs,
+                                 cache=JournalStore(os.path.join(work, "audio_cache.jsonl")))
+            spec = {"title": "Bound volume", "prompt": "study_guide", "pdf": book, "per_chapter": True}
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                jobs = asyncio.run(batch.run([spec]))
+            # extraction is done once the last chapter's job exists; the last
+            # job was queued right after its pages came in
+            extracted = max(job.queued_at for job in jobs) - batch.started_at
+            http_client.clear_routes()
+    finally:
+        os.chdir(cwd)
+    return first_create[0] - start, extracted, jobs
+
+
+def main():
+    if PdfReader is None:
+        print("pypdf is not installed")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        book = os.path.join(tmp, "bound.pdf")
+        bind_book(book)
+
+        start = time.perf_counter()
+        inline = extract_inline(book)
+        inline_s = time.perf_counter() - start
+
+        cache_dir = os.path.join(tmp, "cache")
+        with PdfText(cache_dir) as pdfs:
+            start = time.perf_counter()
+            chapters = pdfs.chapters(book)
+            next(chapters)
+            first_s = time.perf_counter() - start
+            chapters = 1 + sum(1 for _ in chapters)
+            cold_s = time.perf_counter() - start
+            cold_extracted = pdfs.pages_extracted
+            pooled = [text for _, text in pdfs.pages(book)]
+
+        with PdfText(cache_dir) as pdfs:
+            start = time.perf_counter()
+            rerun = list(pdfs.chapters(book))
+            rerun_s = time.perf_counter() - start
+            rerun_stats = (pdfs.pages_extracted, pdfs.pages_cached, pdfs.pool is None)
+
+        # Same bytes under a new mtime: rehashed, still served from cache
+        os.utime(book)
+        with PdfText(cache_dir) as pdfs:
+            list(pdfs.chapters(book))
+            touched = pdfs.pages_extracted
+
+        to_first_create, extracted_s, jobs = streamed_batch(book, os.path.join(tmp, "stream"))
+
+    pages = len(inline)
+    print(f"{pages}-page book, {WORKERS} worker process(es) on {os.cpu_count()} core(s)")
+    print(f"inline extraction, one process: {inline_s:6.2f} s")
+    print(f"PdfText, cold cache:            {cold_s:6.2f} s ({cold_extracted} pages extracted, "
+          f"{chapters} chapters, first chapter after {first_s:.2f} s)")
+    print(f"PdfText, rerun:                 {rerun_s:6.2f} s ({rerun_stats[0]} extracted, {rerun_stats[1]} cached, "
+          f"pool {'never started' if rerun_stats[2] else 'STARTED'}, {len(rerun)} chapters)")
+    print(f"after touching the file:        {touched} pages extracted")
+    print(f"pool text identical to inline:  {pooled == inline}")
+    done = sum(job.state == "done" for job in jobs)
+    print(f"EpisodeBatch, one episode per chapter: first Content/Create {to_first_create:.2f} s in, "
+          f"book extracted after {extracted_s:.2f} s, {done}/{len(jobs)} episodes done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from podcast_store import PodcastStore, store_audio_stream
+from transcode import StubEncoder, transcode_stream
+
+EPISODES = 2000
+DUPLICATES = 0.3          # share of episodes regenerated with an identical payload
+PAYLOAD = 64 * 1024       # bytes per synthetic episode
+STREAM_MB = 50
+REPO_PODCASTS = os.path.join(os.path.dirname(os.path.dirname(HERE)), "podcasts")
+
+
+def median_ms(fn, runs=20):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2] * 1000
+
+
+def dir_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def listing_by_readdir(directory):
+    # What the /podcasts route did: readdir, plus a stat per file for sizes
+    return [(e.name, e.stat().st_size) for e in os.scandir(directory)]
+
+
+def main():
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        flat = os.path.join(tmp, "flat")
+        os.makedirs(flat)
+        store = PodcastStore(os.path.join(tmp, "store"))
+
+        payloads = []
+        for i in range(EPISODES):
+            if payloads and rng.random() < DUPLICATES:
+                payload = rng.choice(payloads)
+            else:
+                payload = rng.randbytes(PAYLOAD)
+                payloads.append(payload)
+            title = f"Episode {i} - {rng.choice(['Chemistry', 'Grammar', 'Finance'])}"
+            with open(os.path.join(flat, f"{title}.mp3"), "wb") as f:
+                f.write(payload)
+            store.add_stream([payload], title)
+
+        blob_bytes = dir_bytes(store.blob_dir)
+        flat_bytes = dir_bytes(flat)
+        readdir_ms = median_ms(lambda: listing_by_readdir(flat))
+        manifest_ms = median_ms(store.episodes)
+        titles = [e["title"] for e in store.episodes()]
+        # ms per 1000 lookups == us per lookup
+        lookup_us = median_ms(lambda: [store.path(t) for t in titles[:1000]])
+
+        reopen_ms = median_ms(lambda: PodcastStore(store.root).close(), runs=5)
+
+        # Hashing while streaming vs writing the encoded stream to a file
+        chunk = rng.randbytes(64 * 1024)
+        chunks = STREAM_MB * 1024 * 1024 // len(chunk)
+        encoder = StubEncoder()
+        start = time.perf_counter()
+        store_audio_stream((chunk for _ in range(chunks)), "Stream", encoder, store)
+        stored_s = time.perf_counter() - start
+        start = time.perf_counter()
+        transcode_stream((chunk for _ in range(chunks)), os.path.join(tmp, "plain.mp3"), encoder)
+        plain_s = time.perf_counter() - start
+
+        repo = None
+        if os.path.isdir(REPO_PODCASTS):
+            repo_store = PodcastStore(os.path.join(tmp, "repo"))
+            start = time.perf_counter()
+            imported = repo_store.import_directory(REPO_PODCASTS)
+            repo = (imported, time.perf_counter() - start)
+            repo_store.close()
+        store.close()
+        shutil.rmtree(flat)
+
+    unique = len(payloads)
+    print(f"{EPISODES} episodes of {PAYLOAD // 1024} KB, {unique} distinct payloads")
+    print(f"disk, title-named files:      {flat_bytes / 1e6:8.1f} MB")
+    print(f"disk, content-addressed:      {blob_bytes / 1e6:8.1f} MB")
+    print(f"listing, readdir + stat:      {readdir_ms:8.2f} ms")
+    print(f"listing, manifest (sorted):   {manifest_ms:8.2f} ms")
+    print(f"lookup by title:              {lookup_us:8.2f} us")
+    print(f"reopen (journal replay):      {reopen_ms:8.2f} ms")
+    print(f"{STREAM_MB} MB stream via stub encoder: plain file {plain_s:.2f} s, "
+          f"hashed into the store {stored_s:.2f} s")
+    if repo:
+        print(f"import of ../podcasts: {repo[0]} files in {repo[1]:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
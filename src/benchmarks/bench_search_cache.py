@@ -0,0 +1,74 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from search_cache import SearchCache
+
+LOOKUPS = 2000
+
+# One cached search: ten result records, like search_library_genesis stores
+SAMPLE_RESULT = [
+    {
+        "title": f"physics and chemistry basis of biotechnology {i}",
+        "author": "de cuyper m. bulte j.w.m. (eds.)",
+        "year": "2001",
+        "publisher": "Kluwer",
+        "format": "pdf",
+        "size": "3 Mb",
+        "link": "book/index.php?md5=C892C74AEAC46715475EF5334302D751",
+    }
+    for i in range(10)
+]
+
+
+def per_call_us(fn, keys):
+    start = time.perf_counter()
+    for key in keys:
+        fn(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def bench(size, tmp):
+    keys = [f"query {i}" for i in range(size)]
+    data = {key: SAMPLE_RESULT for key in keys}
+
+    # Old approach: json.load the whole file for every lookup
+    json_path = os.path.join(tmp, f"cache-{size}.json")
+    with open(json_path, "w") as f:
+        json.dump(data, f, indent=4)
+
+    def json_lookup(key):
+        with open(json_path, "r") as f:
+            return json.load(f).get(key)
+
+    json_us = per_call_us(json_lookup, random.sample(keys, 5))
+
+    # SQLite store, filled through the one-time importer
+    cache = SearchCache(os.path.join(tmp, f"cache-{size}.sqlite3"), max_entries=size)
+    start = time.perf_counter()
+    cache.import_json(json_path)
+    import_s = time.perf_counter() - start
+
+    hit_us = per_call_us(cache.get, random.choices(keys, k=LOOKUPS))
+    miss_us = per_call_us(cache.get, [f"missing {i}" for i in range(LOOKUPS)])
+    set_us = per_call_us(lambda k: cache.set(k, SAMPLE_RESULT), [f"new {i}" for i in range(LOOKUPS // 4)])
+    cache.close()
+
+    print(f"{size:>7} entries | json load+lookup {json_us / 1000:9.1f} ms | sqlite hit {hit_us:6.1f} us "
+          f"miss {miss_us:6.1f} us set+evict {set_us:7.1f} us | import {import_s:5.2f}s")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (10_000, 100_000):
+            bench(size, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import contextlib
+import io
+import os
+import random
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from status_poller import StatusPoller, MIN_INTERVAL, MAX_INTERVAL
+
+# Real jobs take minutes; everything here runs SCALE times faster
+SCALE = 20
+JOBS = 24
+DURATIONS = (60, 240)   # seconds a job takes, at real speed
+QUEUED = 0.15           # share of a job spent at status 0
+OLD_INTERVAL = 5        # the fixed time.sleep(5) loop
+LATENCY = 0.15          # seconds per status call, at real speed
+DOWNLOAD = 3            # seconds to fetch the audio, at real speed
+
+
+class FakeStatusApi:
+    """
+    In-process stand-in for GET /content/status/<id>: each job sits at 0
+    while queued, then climbs linearly to 100. Records when every job
+    actually finished and when it was first seen finished.
+    """
+
+    def __init__(self, seed=1):
+        rng = random.Random(seed)
+        now = time.monotonic()
+        self.jobs = {f"job-{i}": (now, rng.uniform(*DURATIONS) / SCALE) for i in range(JOBS)}
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def status(self, request_id):
+        start, duration = self.jobs[request_id]
+        done = (time.monotonic() - start) / duration
+        if done < QUEUED:
+            return 0
+        return min(100, int((done - QUEUED) / (1 - QUEUED) * 100))
+
+    def finished_at(self, request_id):
+        start, duration = self.jobs[request_id]
+        return start + duration
+
+    def get(self, url, headers=None):
+        with self.lock:
+            self.calls += 1
+        time.sleep(LATENCY / SCALE)
+        request_id = url.rsplit("/", 1)[1]
+        return FakeResponse({"status": self.status(request_id), "error_message": None,
+                             "audio_url": f"https://example.invalid/{request_id}.wav",
+                             "audio_title": request_id})
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def fake_download(request_id, data):
+    time.sleep(DOWNLOAD / SCALE)
+    return time.monotonic()
+
+
+def old_loop(api, request_id):
+    # poll_status before: fixed interval, download only after the loop
+    while True:
+        data = api.get(f"status/{request_id}").json()
+        if data["status"] == 100:
+            return fake_download(request_id, data)
+        time.sleep(OLD_INTERVAL / SCALE)
+
+
+def report(name, api, on_disk):
+    lags = sorted((on_disk[r] - api.finished_at(r)) * SCALE for r in api.jobs)
+    print(f"{name:<34} {api.calls:>6} {lags[len(lags) // 2]:>11.1f} {lags[-1]:>9.1f}")
+
+
+def main():
+    print(f"{JOBS} jobs of {DURATIONS[0]}-{DURATIONS[1]} s, times scaled back to real seconds")
+    print(f"{'':<34} {'calls':>6} {'lag median':>11} {'lag max':>9}   (status 100 -> file on disk)")
+
+    api = FakeStatusApi()
+    on_disk = {}
+    threads = [threading.Thread(target=lambda r=r: on_disk.__setitem__(r, old_loop(api, r)))
+               for r in api.jobs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    report(f"fixed {OLD_INTERVAL} s loop, thread per job", api, on_disk)
+
+    api = FakeStatusApi()
+    poller = StatusPoller("status/", {}, client=api, min_interval=MIN_INTERVAL / SCALE,
+                          max_interval=MAX_INTERVAL / SCALE, rng=random.Random(2))
+    with contextlib.redirect_stdout(io.StringIO()):
+        on_disk = poller.run(api.jobs, on_complete=fake_download)
+    poller.close()
+    report("StatusPoller, one event loop", api, on_disk)
+
+
+if __name__ == "__main__":
+    main()
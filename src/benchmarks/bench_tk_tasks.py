@@ -0,0 +1,119 @@
+import contextlib
+import heapq
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import http_client
+from range_server import RangeServer
+from run_benchmarks import build_site, route_to
+from tk_tasks import TkTasks
+
+LATENCY = 0.2
+FRAME_MS = 16
+
+
+class EventLoop:
+    """
+    Single-threaded stand-in for Tk's after()/mainloop, so the frame
+    timing can be measured without a display.
+    """
+
+    def __init__(self):
+        self.timers = []
+        self.seq = 0
+
+    def after(self, ms, fn):
+        self.seq += 1
+        heapq.heappush(self.timers, (time.perf_counter() + ms / 1000, self.seq, fn))
+
+    def run_until(self, done, timeout=30):
+        end = time.perf_counter() + timeout
+        while not done() and time.perf_counter() < end:
+            due, _, fn = heapq.heappop(self.timers)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            fn()
+
+
+def frame_gaps(loop):
+    """
+    Schedules a 60 fps 'redraw' and returns the list it records the gap
+    between consecutive frames into.
+    """
+    gaps = []
+    last = [time.perf_counter()]
+
+    def frame():
+        now = time.perf_counter()
+        gaps.append(now - last[0])
+        last[0] = now
+        loop.after(FRAME_MS, frame)
+
+    loop.after(FRAME_MS, frame)
+    return gaps
+
+
+def main():
+    import libgen_tk
+
+    calls = []
+    lock = threading.Lock()
+
+    def search(query):
+        with lock:
+            calls.append(query)
+        return libgen_tk.fetch_libgen_results(query)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build_site(tmp)
+        with RangeServer(tmp, latency=LATENCY) as server:
+            route_to(server)
+            with contextlib.redirect_stdout(io.StringIO()):
+                # Old behaviour: the search runs inside the click handler
+                loop = EventLoop()
+                gaps = frame_gaps(loop)
+                loop.after(50, lambda: search("chemistry"))
+                loop.run_until(lambda: len(gaps) > 30)
+                blocking_gap = max(gaps)
+
+                # TkTasks: 10 rapid clicks on one query, then 5 different queries
+                loop = EventLoop()
+                gaps = frame_gaps(loop)
+                tasks = TkTasks(loop)
+                delivered = []
+                calls.clear()
+                for i in range(10):
+                    loop.after(50 + i * 5, lambda: tasks.submit("search", search, "chemistry", key="chemistry",
+                                                                 on_done=lambda r: delivered.append(("chemistry", r))))
+                loop.run_until(lambda: delivered)
+                same_query_calls = len(calls)
+
+                calls.clear()
+                delivered.clear()
+                for i, q in enumerate(["a", "ab", "abc", "abcd", "abcde"]):
+                    loop.after(i * 20, lambda q=q: tasks.submit("search", search, q, key=q,
+                                                                on_done=lambda r, q=q: delivered.append((q, r))))
+                loop.run_until(lambda: delivered and tasks.outstanding == 0)
+                tasks_gap = max(gaps)
+                tasks.shutdown()
+            http_client.clear_routes()
+
+    print(f"{int(LATENCY * 1000)} ms server latency, {FRAME_MS} ms frames")
+    print(f"longest frame, search on the UI thread: {blocking_gap * 1000:7.1f} ms")
+    print(f"longest frame, search via TkTasks:      {tasks_gap * 1000:7.1f} ms")
+    print(f"10 clicks on the same query -> {same_query_calls} request(s)")
+    print(f"5 queries typed in quick succession -> {len(calls)} started, "
+          f"delivered: {[q for q, _ in delivered]}")
+
+
+if __name__ == "__main__":
+    main()
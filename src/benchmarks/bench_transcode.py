@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import http_client
+from range_server import RangeServer
+from transcode import FfmpegEncoder, StubEncoder, transcode_stream
+
+AUDIO_SECONDS = 300      # a 5 minute episode, ~53 MB of 16-bit stereo WAV
+LATENCY = 0.05
+BANDWIDTHS = (None, 20 * 1024 * 1024)
+
+
+def make_wav(path):
+    frame = b"\x00\x10\x00\xf0" * 44100
+    with wave.open(path, "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(44100)
+        for _ in range(AUDIO_SECONDS):
+            w.writeframes(frame)
+
+
+def two_pass(url, work, encoder):
+    # Before: download the WAV to disk, then a separate encoder pass over it
+    wav_path = os.path.join(work, "episode.wav")
+    mp3_path = os.path.join(work, "episode-two-pass.mp3")
+    response = http_client.get_client().get(url, stream=True)
+    response.raise_for_status()
+    with open(wav_path, "wb") as file:
+        for chunk in response.iter_content(chunk_size=8192):
+            file.write(chunk)
+    with open(wav_path, "rb") as src, open(mp3_path, "wb") as dst:
+        subprocess.run(encoder.command(), stdin=src, stdout=dst, check=True)
+    wav_size, mp3_size = os.path.getsize(wav_path), os.path.getsize(mp3_path)
+    os.remove(wav_path)
+    os.remove(mp3_path)
+    # written: WAV + MP3, read back: WAV, peak on disk: WAV + MP3
+    return wav_size + mp3_size, wav_size, wav_size + mp3_size
+
+
+def streamed(url, work, encoder):
+    mp3_path = os.path.join(work, "episode-streamed.mp3")
+    response = http_client.get_client().get(url, stream=True)
+    response.raise_for_status()
+    with response:
+        _, mp3_size = transcode_stream(response.iter_content(chunk_size=64 * 1024), mp3_path, encoder)
+    os.remove(mp3_path)
+    return mp3_size, 0, mp3_size
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start,) + result
+
+
+def main():
+    encoders = [StubEncoder()]
+    if FfmpegEncoder().available():
+        encoders.append(FfmpegEncoder())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        site = os.path.join(tmp, "site")
+        work = os.path.join(tmp, "work")
+        os.makedirs(site)
+        os.makedirs(work)
+        make_wav(os.path.join(site, "episode.wav"))
+        wav_mb = os.path.getsize(os.path.join(site, "episode.wav")) / 1e6
+
+        print(f"{AUDIO_SECONDS} s episode, {wav_mb:.0f} MB WAV, {int(LATENCY * 1000)} ms latency")
+        print(f"{'encoder':<8} {'bandwidth':>10} {'pipeline':<10} {'time (s)':>9} "
+              f"{'written MB':>11} {'read MB':>8} {'peak disk MB':>13}")
+        for bandwidth in BANDWIDTHS:
+            with RangeServer(site, latency=LATENCY, bandwidth=bandwidth) as server:
+                url = server.url("episode.wav")
+                label = f"{bandwidth / 2 ** 20:.0f} MiB/s" if bandwidth else "unlimited"
+                for encoder in encoders:
+                    for name, fn in (("two-pass", two_pass), ("streamed", streamed)):
+                        seconds, written, read, peak = timed(fn, url, work, encoder)
+                        print(f"{encoder.name:<8} {label:>10} {name:<10} {seconds:>9.2f} "
+                              f"{written / 1e6:>11.1f} {read / 1e6:>8.1f} {peak / 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from virtual_list import window_slots
+
+ROW_HEIGHT = 52
+VIEW_HEIGHT = 500
+SIZES = (100, 1000, 5000)
+STEPS = 200
+
+
+def fake_books(n):
+    return [{"id": str(i), "title": f"Book {i}", "author": "Author", "year": "2000",
+             "extension": "pdf", "size": "1 Mb"} for i in range(n)]
+
+
+def simulate(n):
+    """
+    Replays VirtualList's slot assignment for STEPS one-row scroll steps
+    and counts how many rows get re-bound per step (no Tk needed).
+    """
+    bound = {}
+    rebinds = []
+    for step in range(STEPS):
+        first, last, pool = window_slots(step * ROW_HEIGHT, VIEW_HEIGHT, ROW_HEIGHT, n)
+        changed = 0
+        for index in range(first, last):
+            if bound.get(index % pool) != index:
+                bound[index % pool] = index
+                changed += 1
+        rebinds.append(changed)
+    return pool, max(rebinds[1:])
+
+
+def with_tk(n):
+    """
+    Real widgets: builds the list, then times scroll steps (needs a display).
+    """
+    import tkinter as tk
+    from tkinter import ttk
+    from virtual_list import VirtualList
+
+    root = tk.Tk()
+    root.geometry(f"800x{VIEW_HEIGHT}")
+
+    def make_row(parent):
+        row = ttk.Frame(parent)
+        row.label = ttk.Label(row)
+        row.label.pack(side="left", fill="x", expand=True)
+        ttk.Button(row, text="Download").pack(side="right")
+        return row
+
+    def bind_row(row, book, index):
+        row.label.config(text=f"{index + 1}. {book['title']}")
+
+    view = VirtualList(root, ROW_HEIGHT, make_row, bind_row)
+    view.pack(fill="both", expand=True)
+    root.update()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    view.set_items(fake_books(n))
+    root.update()
+    fill_ms = (time.perf_counter() - start) * 1000
+
+    step_times = []
+    for _ in range(STEPS):
+        start = time.perf_counter()
+        view.canvas.yview_scroll(1, "units")
+        root.update()
+        step_times.append(time.perf_counter() - start)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    widgets = len(view.canvas.winfo_children())
+    root.destroy()
+    step_times.sort()
+    return fill_ms, step_times[len(step_times) // 2] * 1000, widgets, peak
+
+
+def main():
+    print(f"{VIEW_HEIGHT}px viewport, {ROW_HEIGHT}px rows, {STEPS} one-row scroll steps")
+    print(f"{'items':>6} {'row pool':>9} {'max rebinds/step':>17}")
+    for n in SIZES:
+        pool, rebinds = simulate(n)
+        print(f"{n:>6} {pool:>9} {rebinds:>17}")
+
+    if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        print("\nno $DISPLAY: skipping the Tk timing run")
+        return
+
+    print(f"\n{'items':>6} {'fill (ms)':>10} {'scroll step (ms)':>17} {'row widgets':>12} {'peak KB':>9}")
+    for n in SIZES:
+        fill_ms, step_ms, widgets, peak = with_tk(n)
+        print(f"{n:>6} {fill_ms:>10.2f} {step_ms:>17.3f} {widgets:>12} {peak / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
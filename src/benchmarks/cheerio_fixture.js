@@ -0,0 +1,43 @@
+// Applies the selectors from cheerio_script.js / cheerio_download.js to a
+// saved HTML file, so the subprocess path can be benchmarked offline.
+const fs = require('fs');
+const cheerio = require('cheerio');
+
+const [mode, file] = process.argv.slice(2);
+const $ = cheerio.load(fs.readFileSync(file, 'utf8'));
+
+if (mode === 'search') {
+  const bookMetadata = [];
+  $('tr[valign="top"]').each((i, tr) => {
+    bookMetadata.push({
+      title: $(tr).find('td').eq(2).find('a').text().trim().toLowerCase(),
+      author: $(tr).find('td').eq(1).find('a').text().trim().toLowerCase(),
+      year: $(tr).find('td').eq(4).text().trim(),
+      publisher: $(tr).find('td').eq(3).text().trim(),
+      format: $(tr).find('td').eq(8).text().trim(),
+      size: $(tr).find('td').eq(7).text().trim(),
+      link: $(tr).find('td').eq(2).find('a').attr('href')
+    });
+  });
+  console.log(JSON.stringify(bookMetadata));
+} else if (mode === 'mirror') {
+  let libgenLiLink = null;
+  $('td a').each((i, elem) => {
+    const href = $(elem).attr('href');
+    if (href && href.includes('libgen.li')) {
+      libgenLiLink = href;
+      return false;
+    }
+  });
+  console.log(JSON.stringify({ link: libgenLiLink }));
+} else if (mode === 'get') {
+  let downloadLink = null;
+  $('td a').each((i, elem) => {
+    const h2 = $(elem).find('h2');
+    if (h2.length && h2.text().trim() === 'GET') {
+      downloadLink = $(elem).attr('href');
+      return false;
+    }
+  });
+  console.log(JSON.stringify({ link: downloadLink }));
+}
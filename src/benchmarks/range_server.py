@@ -0,0 +1,157 @@
+import mimetypes
+import os
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote
+
+# --------------------------------------------------------------------
+# Local HTTP stand-in that serves a directory with Range support.
+# 'latency' delays every response, 'bandwidth' (bytes/sec) throttles each
+# connection separately, which is what makes one stream slower than many.
+# --------------------------------------------------------------------
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+def content_type(path):
+    """
+    Recorded pages are stored under their URL path (search.php, a bare
+    md5, ...), so sniff HTML/JSON before falling back to the extension.
+    """
+    with open(path, "rb") as f:
+        head = f.read(64).lstrip()
+    if head.startswith(b"<"):
+        return "text/html; charset=utf-8"
+    if head.startswith((b"{", b"[")):
+        return "application/json"
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def make_handler(root, latency=0.0, bandwidth=None, accept_ranges=True):
+    class RangeHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, Nagle +
+        # delayed ACK adds ~40 ms to every response on loopback
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _resolve(self):
+            path = os.path.normpath(os.path.join(root, unquote(self.path.split("?", 1)[0]).lstrip("/")))
+            if not path.startswith(os.path.abspath(root)) or not os.path.isfile(path):
+                return None
+            return path
+
+        def _send_headers(self, path):
+            if latency:
+                time.sleep(latency)
+            size = os.path.getsize(path)
+            etag = f'"{size:x}-{int(os.path.getmtime(path)):x}"'
+            start, end = 0, size - 1
+            status = 200
+
+            # A Range with a stale If-Range validator gets the whole file
+            match = RANGE_RE.match(self.headers.get("Range", ""))
+            if accept_ranges and match and self.headers.get("If-Range", etag) == etag:
+                first, last = match.groups()
+                if first:
+                    start = int(first)
+                    end = min(int(last), size - 1) if last else size - 1
+                else:
+                    start = max(0, size - int(last))
+                if start > end:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return None
+                status = 206
+
+            self.send_response(status)
+            self.send_header("Content-Type", content_type(path))
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("ETag", etag)
+            if accept_ranges:
+                self.send_header("Accept-Ranges", "bytes")
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            return start, end
+
+        def do_HEAD(self):
+            path = self._resolve()
+            if not path:
+                self.send_error(404)
+                return
+            self._send_headers(path)
+
+        def do_POST(self):
+            # Recorded API responses: the request body is read and ignored
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self.do_GET()
+
+        def do_GET(self):
+            path = self._resolve()
+            if not path:
+                self.send_error(404)
+                return
+            span = self._send_headers(path)
+            if span is None:
+                return
+            start, end = span
+            chunk_size = 64 * 1024
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                began = time.perf_counter()
+                sent = 0
+                while remaining > 0:
+                    chunk = f.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    try:
+                        self.wfile.write(chunk)
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+                    remaining -= len(chunk)
+                    sent += len(chunk)
+                    if bandwidth:
+                        ahead = sent / bandwidth - (time.perf_counter() - began)
+                        if ahead > 0:
+                            time.sleep(ahead)
+
+    return RangeHandler
+
+
+class RangeServer:
+    """
+    Runs the stand-in on 127.0.0.1 in a background thread:
+
+        with RangeServer(directory, bandwidth=4_000_000) as server:
+            download_file(server.url("book.pdf"), out_path)
+    """
+
+    def __init__(self, root, latency=0.0, bandwidth=None, accept_ranges=True, port=0):
+        handler = make_handler(os.path.abspath(root), latency, bandwidth, accept_ranges)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, name):
+        return f"{self.base_url}/{name}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
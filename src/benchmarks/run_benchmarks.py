@@ -0,0 +1,363 @@
+"""
+Offline benchmark suite.
+
+Serves the recorded LibGen / AutoContent pages in fixtures/ (plus a
+generated cover, book payload and WAV) from a local stand-in with
+configurable latency and bandwidth, routes every front-end's hard-coded
+hosts to it (http_client.route_host), and measures per function:
+
+- wall time (median / p95 / min over several runs)
+- throughput for downloads
+- Python memory high-water mark (tracemalloc peak, separate run)
+
+Results are written as JSON, one file per commit, so two commits can be
+compared:
+
+    python benchmarks/run_benchmarks.py                    # -> benchmarks/results/<commit>.json
+    python benchmarks/run_benchmarks.py --latency 0.1 --bandwidth 2000000
+    python benchmarks/run_benchmarks.py --compare results/abc1234.json results/def5678.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import http_client
+from range_server import RangeServer
+
+FIXTURES = os.path.join(HERE, "fixtures")
+RESULTS_DIR = os.path.join(HERE, "results")
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+DEFAULT_LATENCY = 0.05            # seconds added to every response
+DEFAULT_BANDWIDTH = 8_000_000     # bytes/sec per connection
+DEFAULT_RUNS = 20                 # timed runs per parse/search benchmark
+DOWNLOAD_RUNS = 3                 # timed runs per download benchmark
+BOOK_SIZE = 16 * 1024 * 1024
+AUDIO_SECONDS = 30
+REGRESSION_THRESHOLD = 0.10       # --compare flags medians that got >10% slower
+
+BOOK_MD5 = "9F918FE54C496F8385406830545EA8FA"
+BOOK_LINK = f"book/index.php?md5={BOOK_MD5}"
+QUERY = "chemistry"
+
+# Hosts the front-ends talk to -> directory of the stand-in site that answers for them
+HOSTS = {
+    "libgen.is": "libgen.is",
+    "libgen.rs": "libgen.is",
+    "libgen.li": "libgen.li",
+    "library.lol": "library.lol",
+    "cloudflare-ipfs.com": "cloudflare-ipfs.com",
+    "api.autocontentapi.com": "api.autocontentapi.com",
+    "autocontentapi.blob.core.windows.net": "autocontentapi.blob.core.windows.net",
+}
+
+# Site path -> recorded fixture
+RECORDED = {
+    "libgen.is/search.php": "search_chemistry.html",
+    "libgen.is/book/index.php": "detail_book.html",
+    f"library.lol/main/{BOOK_MD5}": "mirror_library_lol.html",
+    "libgen.li/ads.php": "ads_libgen_li.html",
+    "api.autocontentapi.com/Content/Create": "autocontent_create.json",
+    "api.autocontentapi.com/content/status/0d3c5f2e-bench-4c1e-9a57-6f1d2b9e8a10": "autocontent_status.json",
+}
+
+
+# --------------------------------------------------------------------
+# 1) The stand-in site
+# --------------------------------------------------------------------
+def _write(site, rel_path, data):
+    path = os.path.join(site, *rel_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def build_site(site):
+    for rel_path, fixture in RECORDED.items():
+        with open(os.path.join(FIXTURES, fixture), "rb") as f:
+            _write(site, rel_path, f.read())
+
+    book = b"%PDF-1.4\n" + os.urandom(BOOK_SIZE - 9)
+    _write(site, "libgen.li/get.php", book)
+    _write(site, "cloudflare-ipfs.com/ipfs/bafykbzaceb", book)
+
+    try:
+        from PIL import Image
+        cover = io.BytesIO()
+        Image.new("RGB", (600, 900), (180, 120, 60)).save(cover, "JPEG", quality=85)
+        _write(site, "libgen.is/covers/0/9f918fe54c496f8385406830545ea8fa-g.jpg", cover.getvalue())
+    except ImportError:
+        pass
+
+    audio = io.BytesIO()
+    with wave.open(audio, "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(44100)
+        w.writeframes(os.urandom(AUDIO_SECONDS * 44100 * 4))
+    _write(site, "autocontentapi.blob.core.windows.net/audios/0d3c5f2e-bench.wav", audio.getvalue())
+
+
+def route_to(server):
+    for host, site_dir in HOSTS.items():
+        http_client.route_host(host, f"{server.base_url}/{site_dir}")
+
+
+# --------------------------------------------------------------------
+# 2) Measuring
+# --------------------------------------------------------------------
+def measure(fn, runs, size=None):
+    """
+    Times 'fn' over 'runs' calls (after one warm-up) and takes the
+    tracemalloc peak of one more call. 'size' (bytes moved per call)
+    adds a throughput figure.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    times.sort()
+    result = {
+        "runs": runs,
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 3),
+        "min_ms": round(times[0] * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+    if size:
+        result["mb_per_s"] = round(size / statistics.median(times) / 1e6, 2)
+    return result
+
+
+def checked(fn, check):
+    """
+    Wraps 'fn' so a benchmark that silently stops doing its work (e.g. a
+    route missing and every call failing fast) raises instead.
+    """
+    def run():
+        value = fn()
+        if not check(value):
+            raise AssertionError(f"unexpected result: {value!r:.200}")
+        return value
+    return run
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def benchmarks(work):
+    """
+    (group, name, fn, bytes per call or None) for every benchmarked
+    function. Imports happen here so the routes are already in place.
+    """
+    import ai_inference
+    import downloader
+    import libgen
+    import libgen_book_search
+    import libgen_parser
+    import libgen_tk
+    import libgen_ui
+    from mirror_stats import MirrorStats
+
+    search_html = read_fixture("search_chemistry.html")
+    detail_html = read_fixture("detail_book.html")
+    mirror_html = read_fixture("mirror_library_lol.html")
+    ads_html = read_fixture("ads_libgen_li.html")
+    book = libgen.parse_search_page(search_html)[0]
+    mirror_stats = MirrorStats(os.path.join(work, "mirror_stats.json"))
+    book_path = os.path.join(work, "book.pdf")
+
+    def download(url, segments):
+        def run():
+            ok = downloader.download_file(url, book_path, segments=segments)
+            os.remove(book_path)
+            return ok
+        return checked(run, bool)
+
+    def cover():
+        return http_client.get_client().get(f"https://libgen.is/covers/0/{BOOK_MD5.lower()}-g.jpg").content
+
+    def autocontent_round_trip():
+        created = ai_inference.create_content()
+        return ai_inference.poll_status(created["request_id"])
+
+    audio_size = os.path.getsize(os.path.join(
+        work, "..", "site", "autocontentapi.blob.core.windows.net", "audios", "0d3c5f2e-bench.wav"))
+
+    return [
+        ("parse", "libgen.parse_search_page", checked(lambda: libgen.parse_search_page(search_html), len), None),
+        ("parse", "libgen.parse_final_link", checked(lambda: libgen.parse_final_link(mirror_html), bool), None),
+        ("parse", "libgen_parser.parse_search_results",
+         checked(lambda: libgen_parser.parse_search_results(search_html), len), None),
+        ("parse", "libgen_parser.parse_book_details",
+         checked(lambda: libgen_parser.parse_book_details(detail_html), len), None),
+        ("parse", "libgen_parser.parse_libgen_li_link",
+         checked(lambda: libgen_parser.parse_libgen_li_link(detail_html), bool), None),
+        ("parse", "libgen_parser.parse_get_link", checked(lambda: libgen_parser.parse_get_link(ads_html), bool), None),
+
+        ("search", "libgen.search_libgen",
+         checked(lambda: libgen.search_libgen(QUERY, limit=25), len), None),
+        ("search", "libgen.race_final_link",
+         checked(lambda: libgen.race_final_link([book["mirror1"], book["mirror2"]], stats=mirror_stats), bool), None),
+        ("search", "libgen_tk.fetch_libgen_results", checked(lambda: libgen_tk.fetch_libgen_results(QUERY), len), None),
+        ("search", "libgen_tk.fetch_book_details", checked(lambda: libgen_tk.fetch_book_details(BOOK_LINK), bool), None),
+        ("search", "libgen_ui.fetch_libgen_results", checked(lambda: libgen_ui.fetch_libgen_results(QUERY), len), None),
+        ("search", "libgen_ui.fetch_book_details", checked(lambda: libgen_ui.fetch_book_details(BOOK_LINK), bool), None),
+        ("search", "libgen_book_search.fetch_search_metadata",
+         checked(lambda: libgen_book_search.fetch_search_metadata(QUERY), len), None),
+        ("search", "libgen_book_search.fetch_download_info",
+         checked(lambda: libgen_book_search.fetch_download_info(f"https://libgen.is/{BOOK_LINK}"),
+                 lambda info: "downloadLink" in info), None),
+        ("search", "ai_inference.create_content+poll_status", checked(autocontent_round_trip, bool), None),
+
+        ("download", "downloader.download_file[segments=1]",
+         download("https://cloudflare-ipfs.com/ipfs/bafykbzaceb", 1), BOOK_SIZE),
+        ("download", "downloader.download_file[segments=4]",
+         download("https://cloudflare-ipfs.com/ipfs/bafykbzaceb", 4), BOOK_SIZE),
+        ("download", "ai_inference.download_audio",
+         checked(lambda: ai_inference.download_audio(
+             "https://autocontentapi.blob.core.windows.net/audios/0d3c5f2e-bench.wav", "bench"), bool), audio_size),
+        ("download", "cover image", checked(cover, len), None),
+    ]
+
+
+def git_revision():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=HERE,
+                               capture_output=True, text=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(latency, bandwidth, runs, only=None):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        site = os.path.join(tmp, "site")
+        work = os.path.join(tmp, "work")  # cwd: ai_inference writes to ../podcasts, caches to .
+        os.makedirs(work)
+        build_site(site)
+        os.environ.setdefault("AUTOCONTENT_API_KEY", "offline-benchmark")
+
+        old_cwd = os.getcwd()
+        os.chdir(work)
+        try:
+            with RangeServer(site, latency=latency, bandwidth=bandwidth) as server:
+                route_to(server)
+                for group, name, fn, size in benchmarks(work):
+                    key = f"{group}/{name}"
+                    if only and only not in key:
+                        continue
+                    n = DOWNLOAD_RUNS if group == "download" else runs
+                    try:
+                        results[key] = measure(fn, n, size)
+                    except Exception as e:
+                        results[key] = {"error": f"{type(e).__name__}: {e}"}
+                    print(format_row(key, results[key]))
+        finally:
+            http_client.clear_routes()
+            os.chdir(old_cwd)
+    return results
+
+
+# --------------------------------------------------------------------
+# 3) Reporting / comparing
+# --------------------------------------------------------------------
+def format_row(key, result):
+    if "error" in result:
+        return f"{key:<58} ERROR {result['error']}"
+    rate = f"{result['mb_per_s']:>8.1f} MB/s" if "mb_per_s" in result else ""
+    return (f"{key:<58} {result['median_ms']:>10.2f} ms  p95 {result['p95_ms']:>9.2f}  "
+            f"peak {result['peak_kb']:>9.1f} KB {rate}")
+
+
+def compare(old_path, new_path, threshold=REGRESSION_THRESHOLD):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"{old['commit']} -> {new['commit']}")
+    print(f"{'benchmark':<58} {'old ms':>10} {'new ms':>10} {'time':>7} {'peak':>7}")
+    regressions = 0
+    for key in sorted(set(old["results"]) | set(new["results"])):
+        a, b = old["results"].get(key), new["results"].get(key)
+        if not a or not b or "error" in a or "error" in b:
+            print(f"{key:<58} {'(missing or failed in one run)':>36}")
+            continue
+        time_ratio = b["median_ms"] / a["median_ms"] if a["median_ms"] else 1.0
+        peak_ratio = b["peak_kb"] / a["peak_kb"] if a["peak_kb"] else 1.0
+        flag = "  REGRESSION" if time_ratio > 1 + threshold else ""
+        regressions += bool(flag)
+        print(f"{key:<58} {a['median_ms']:>10.2f} {b['median_ms']:>10.2f} "
+              f"{time_ratio:>6.2f}x {peak_ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks against recorded LibGen/AutoContent fixtures")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="seconds added to every response")
+    parser.add_argument("--bandwidth", type=int, default=DEFAULT_BANDWIDTH, help="bytes/sec per connection (0 = unlimited)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="timed runs per parse/search benchmark")
+    parser.add_argument("--only", help="run benchmarks whose name contains this")
+    parser.add_argument("--out", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two results files")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold=args.threshold) else 0)
+
+    commit = git_revision()
+    print(f"commit {commit}, latency {args.latency * 1000:.0f} ms, "
+          f"bandwidth {args.bandwidth / 1e6:.1f} MB/s per connection\n")
+    results = run_suite(args.latency, args.bandwidth or None, args.runs, args.only)
+
+    out_path = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {"latency": args.latency, "bandwidth": args.bandwidth, "runs": args.runs,
+                       "book_size": BOOK_SIZE, "audio_seconds": AUDIO_SECONDS},
+            "results": results,
+        }, f, indent=2)
+    print(f"\nwrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
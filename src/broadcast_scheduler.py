@@ -0,0 +1,472 @@
+import heapq
+import itertools
+import math
+import os
+import random
+import sys
+import time
+import wave
+from contextlib import nullcontext
+
+from journal_store import JournalStore
+from mp3_index import load_index
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+URGENT, HIGH, NORMAL, FILLER = 0, 1, 2, 3
+PRIORITIES = 4             # levels, URGENT airs first
+MP3_BITRATE = 128000       # bits/s assumed for MP3s whose frames cannot be indexed
+COMPACT_AFTER = 1024       # aired/cancelled slots kept before a level is compacted
+
+
+def probe_duration(path):
+    """
+    Seconds of audio in 'path'. Exact for WAV (from the header) and for
+    MP3 (frame count from the cached mp3_index); an MP3 without
+    recognisable frames is estimated from its size at MP3_BITRATE.
+    """
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as w:
+            return w.getnframes() / w.getframerate()
+    try:
+        return load_index(path).duration
+    except ValueError:
+        return os.path.getsize(path) * 8 / MP3_BITRATE
+
+
+class ScheduledItem:
+    __slots__ = ("item_id", "channel", "priority", "seq", "duration_ms", "episode", "index")
+
+    def __init__(self, item_id, channel, priority, seq, duration_ms, episode):
+        self.item_id = item_id
+        self.channel = channel
+        self.priority = priority
+        self.seq = seq
+        self.duration_ms = duration_ms
+        self.episode = episode
+        self.index = None  # position in its level
+
+    @property
+    def duration(self):
+        return self.duration_ms / 1000
+
+    def as_dict(self):
+        return {"channel": self.channel, "priority": self.priority, "seq": self.seq,
+                "duration_ms": self.duration_ms, "episode": self.episode}
+
+
+class _Fenwick:
+    """
+    Prefix sums over an append-only list of ints: append, add and prefix
+    are all O(log n).
+    """
+
+    def __init__(self):
+        self.tree = [0]
+
+    def append(self, value):
+        i = len(self.tree)
+        stop = i - (i & -i)
+        j = i - 1
+        while j > stop:  # tree[i] covers (i - lowbit(i), i]
+            value += self.tree[j]
+            j -= j & -j
+        self.tree.append(value)
+
+    def add(self, index, delta):
+        i = index + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index):
+        """Sum of the first 'index' values."""
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+
+class _Level:
+    """
+    The FIFO of one priority on one channel. Aired and cancelled items
+    leave a hole whose duration is zeroed in the prefix sums, so the air
+    offset of any queued item is one prefix query.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.sums = _Fenwick()
+        self.head = 0
+        self.total_ms = 0
+        self.live = 0
+
+    def append(self, item):
+        item.index = len(self.items)
+        self.items.append(item)
+        self.sums.append(item.duration_ms)
+        self.total_ms += item.duration_ms
+        self.live += 1
+
+    def remove(self, item):
+        self.items[item.index] = None
+        self.sums.add(item.index, -item.duration_ms)
+        self.total_ms -= item.duration_ms
+        self.live -= 1
+        while self.head < len(self.items) and self.items[self.head] is None:
+            self.head += 1
+        if self.head > COMPACT_AFTER and self.head * 2 > len(self.items):
+            self._compact()
+
+    def _compact(self):
+        live = [item for item in self.items[self.head:] if item is not None]
+        self.items, self.sums, self.head = [], _Fenwick(), 0
+        self.total_ms = self.live = 0
+        for item in live:
+            self.append(item)
+
+    def first(self):
+        return self.items[self.head] if self.head < len(self.items) else None
+
+    def offset_ms(self, item):
+        return self.sums.prefix(item.index)
+
+    def __iter__(self):
+        return (item for item in self.items[self.head:] if item is not None)
+
+
+class Channel:
+    def __init__(self, name, clock_ms):
+        self.name = name
+        self.clock_ms = clock_ms  # when the next queued item starts
+        self.levels = [_Level() for _ in range(PRIORITIES)]
+        self.on_air = None        # (item, start_ms, end_ms)
+
+    def __len__(self):
+        return sum(level.live for level in self.levels)
+
+    def next_item(self):
+        for level in self.levels:
+            item = level.first()
+            if item is not None:
+                return item
+        return None
+
+    def start_ms(self, item):
+        ahead = sum(level.total_ms for level in self.levels[:item.priority])
+        return self.clock_ms + ahead + self.levels[item.priority].offset_ms(item)
+
+
+class BroadcastScheduler:
+    """
+    Keeps a queue per radio channel and the exact time every queued
+    episode will go on air.
+
+    - Each channel has one FIFO per priority (URGENT, HIGH, NORMAL,
+      FILLER). An item airs after everything of a higher priority and
+      everything queued before it at its own. Durations are integer
+      milliseconds, so air times add up exactly.
+    - Every level keeps prefix sums of its durations (a Fenwick tree),
+      so enqueue, an urgent insert, cancel and air_time() are
+      O(log n) per channel. Nothing is rebuilt when an urgent item goes
+      to the front.
+    - A heap of (next start, channel) lets advance(now) touch only the
+      channels that actually change programme.
+    - With 'state_path', queued items, channel clocks and what is on air
+      are kept in a JournalStore; reopening replays it without probing
+      any audio.
+
+    Usage:
+        scheduler = BroadcastScheduler("schedule.jsonl", store=get_store())
+        scheduler.add_channel("fm-101.5")
+        item = scheduler.enqueue("fm-101.5", "Atoms and Molecules")
+        scheduler.air_time(item.item_id)
+        scheduler.enqueue("fm-101.5", "Storm warning", duration=90, priority=URGENT)
+        for channel, item, start, end in scheduler.advance(time.time()):
+            ...
+    """
+
+    def __init__(self, state_path=None, store=None, probe=probe_duration, now=None):
+        self.store = store
+        self.probe = probe
+        self.channels = {}
+        self.items = {}
+        self.heap = []  # (clock_ms, channel name); stale entries are skipped
+        self.now_ms = int((time.time() if now is None else now) * 1000)
+        self.seq = 0
+        self.journal = None
+        if state_path:
+            self.journal = JournalStore(state_path)
+            self._load()
+
+    # ----------------------------------------------------------------
+    # Persistence
+    # ----------------------------------------------------------------
+    def _load(self):
+        state = self.journal.get("scheduler")
+        if state:
+            self.now_ms = max(self.now_ms, state["now_ms"])
+            self.seq = state["seq"]
+        queued = []
+        for key, value in self.journal.items():
+            if key.startswith("channel:"):
+                chan = self.channels[key[8:]] = Channel(key[8:], value["clock_ms"])
+                on_air = value.get("on_air")
+                if on_air:
+                    item = ScheduledItem(on_air["item_id"], chan.name, on_air["priority"], on_air["seq"],
+                                         on_air["duration_ms"], on_air["episode"])
+                    chan.on_air = (item, on_air["start_ms"], on_air["end_ms"])
+            elif key.startswith("item:"):
+                queued.append(ScheduledItem(key[5:], value["channel"], value["priority"], value["seq"],
+                                            value["duration_ms"], value["episode"]))
+        queued.sort(key=lambda item: item.seq)
+        if queued:
+            self.seq = max(self.seq, queued[-1].seq)  # enqueued after the last advance()
+        for item in queued:
+            self.channels[item.channel].levels[item.priority].append(item)
+            self.items[item.item_id] = item
+        for channel in self.channels.values():
+            if len(channel):
+                heapq.heappush(self.heap, (channel.clock_ms, channel.name))
+
+    def _save(self, key, value):
+        if self.journal is not None:
+            self.journal[key] = value
+
+    def _save_channel(self, chan):
+        state = {"clock_ms": chan.clock_ms}
+        if chan.on_air:
+            item, start_ms, end_ms = chan.on_air
+            state["on_air"] = dict(item.as_dict(), item_id=item.item_id, start_ms=start_ms, end_ms=end_ms)
+        self._save(f"channel:{chan.name}", state)
+
+    def _drop(self, key):
+        if self.journal is not None and key in self.journal:
+            del self.journal[key]
+
+    def batch(self):
+        """
+        Groups the writes of several operations into one journal append.
+        """
+        return self.journal.batch() if self.journal is not None else nullcontext()
+
+    def close(self):
+        if self.journal is not None:
+            self._save("scheduler", {"now_ms": self.now_ms, "seq": self.seq})
+            self.journal.close()
+
+    # ----------------------------------------------------------------
+    # Channels and queueing
+    # ----------------------------------------------------------------
+    def add_channel(self, name, start=None):
+        if name not in self.channels:
+            clock_ms = self.now_ms if start is None else int(start * 1000)
+            self.channels[name] = Channel(name, clock_ms)
+            self._save_channel(self.channels[name])
+        return self.channels[name]
+
+    def episode_duration(self, episode):
+        path = self.store.path(episode) if self.store is not None else None
+        return self.probe(path or episode)
+
+    def enqueue(self, channel, episode, duration=None, priority=NORMAL, item_id=None):
+        """
+        Queues 'episode' (a podcast store title or a file path) on
+        'channel'. 'duration' in seconds is probed from the audio if not
+        given. Returns the ScheduledItem.
+        """
+        if duration is None:
+            duration = self.episode_duration(episode)
+        chan = self.channels.get(channel) or self.add_channel(channel)
+        self.seq += 1
+        item = ScheduledItem(item_id or f"{channel}#{self.seq}", channel, priority, self.seq,
+                             int(round(duration * 1000)), episode)
+        if item.item_id in self.items:
+            raise ValueError(f"Item {item.item_id} is already scheduled")
+
+        if not len(chan) and chan.clock_ms < self.now_ms:
+            # Idle channel: the new item starts now, not in the past
+            chan.clock_ms = self.now_ms
+            self._save_channel(chan)
+        if not len(chan):
+            heapq.heappush(self.heap, (chan.clock_ms, channel))
+        chan.levels[priority].append(item)
+        self.items[item.item_id] = item
+        self._save(f"item:{item.item_id}", item.as_dict())
+        return item
+
+    def urgent(self, channel, episode, duration=None, item_id=None):
+        return self.enqueue(channel, episode, duration, URGENT, item_id)
+
+    def cancel(self, item_id):
+        item = self.items.pop(item_id, None)
+        if item is None:
+            return False
+        self.channels[item.channel].levels[item.priority].remove(item)
+        self._drop(f"item:{item_id}")
+        return True
+
+    # ----------------------------------------------------------------
+    # Air times
+    # ----------------------------------------------------------------
+    def air_time(self, item_id):
+        """
+        Unix time at which a queued item starts, given everything queued
+        now.
+        """
+        item = self.items[item_id]
+        return self.channels[item.channel].start_ms(item) / 1000
+
+    def upcoming(self, channel, limit=10):
+        """
+        The next 'limit' items of 'channel' as (start, end, item).
+        """
+        chan = self.channels[channel]
+        out = []
+        start_ms = chan.clock_ms
+        for level in chan.levels:
+            for item in level:
+                if len(out) >= limit:
+                    return out
+                out.append((start_ms / 1000, (start_ms + item.duration_ms) / 1000, item))
+                start_ms += item.duration_ms
+        return out
+
+    def advance(self, now):
+        """
+        Moves the schedule to 'now': every item whose start time has come
+        goes on air, in start order across channels. Returns the aired
+        items as (channel, item, start, end).
+        """
+        now_ms = int(now * 1000)
+        aired = []
+        with self.batch():
+            while self.heap and self.heap[0][0] <= now_ms:
+                clock_ms, name = heapq.heappop(self.heap)
+                chan = self.channels[name]
+                if clock_ms != chan.clock_ms or not len(chan):
+                    continue  # stale heap entry
+                item = chan.next_item()
+                chan.levels[item.priority].remove(item)
+                del self.items[item.item_id]
+                start_ms, end_ms = chan.clock_ms, chan.clock_ms + item.duration_ms
+                chan.on_air = (item, start_ms, end_ms)
+                chan.clock_ms = end_ms
+                aired.append((name, item, start_ms / 1000, end_ms / 1000))
+                self._drop(f"item:{item.item_id}")
+                self._save_channel(chan)
+                if len(chan):
+                    heapq.heappush(self.heap, (end_ms, name))
+            self.now_ms = max(self.now_ms, now_ms)
+            self._save("scheduler", {"now_ms": self.now_ms, "seq": self.seq})
+        return aired
+
+    def now_playing(self, channel):
+        on_air = self.channels[channel].on_air
+        if on_air and on_air[1] <= self.now_ms < on_air[2]:
+            return on_air[0]
+        return None
+
+    def __len__(self):
+        return len(self.items)
+
+
+# --------------------------------------------------------------------
+# Simulator: python broadcast_scheduler.py [channels] [days]
+# --------------------------------------------------------------------
+def simulate(channels=300, days=7, step=60, urgent_per_hour=10, cancels_per_hour=20,
+             state_path=None, seed=1, check_every=None):
+    """
+    Replays 'days' of programming on 'channels' channels with synthetic
+    10-60 minute episodes: each channel starts with a day of queue and is
+    topped up to a day ahead, while urgent items are inserted and queued
+    items cancelled at random. Time moves in 'step'-second ticks. Every
+    'check_every' ticks, air_time() is compared with a walk of the queue
+    for a sample of channels, and the items predicted to start by the
+    end of the tick must air at exactly that time. Returns a stats dict.
+    """
+    rng = random.Random(seed)
+    start = 1_700_000_000.0
+    scheduler = BroadcastScheduler(state_path, probe=None, now=start)
+    names = [f"ch-{i:03d}" for i in range(channels)]
+    horizon = 24 * 3600
+
+    def top_up(name, now):
+        chan = scheduler.channels[name]
+        queued_until = chan.clock_ms / 1000 + sum(level.total_ms for level in chan.levels) / 1000
+        while queued_until < now + horizon:
+            duration = rng.randint(10, 60) * 60
+            scheduler.enqueue(name, f"episode-{rng.randrange(5000)}", duration)
+            queued_until += duration
+
+    t0 = time.perf_counter()
+    with scheduler.batch():
+        for name in names:
+            scheduler.add_channel(name, start)
+            top_up(name, start)
+    fill_s = time.perf_counter() - t0
+    peak_queued = len(scheduler)
+
+    predictions = {}
+    mismatches = checked = aired = urgent = cancelled = 0
+    ticks = int(days * 24 * 3600 / step)
+    t0 = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        now = start + tick * step
+        with scheduler.batch():
+            for _ in range(_poisson(rng, urgent_per_hour * step / 3600)):
+                scheduler.urgent(rng.choice(names), "bulletin", rng.randint(1, 5) * 60)
+                urgent += 1
+            for _ in range(_poisson(rng, cancels_per_hour * step / 3600)):
+                chan = scheduler.channels[rng.choice(names)]
+                item = rng.choice(list(itertools.islice(chan.levels[NORMAL], 50)) or [None])
+                if item is not None and scheduler.cancel(item.item_id):
+                    cancelled += 1
+            predictions = {}
+            if check_every and tick % check_every == 0:
+                for name in rng.sample(names, min(5, len(names))):
+                    for item_start, _, item in scheduler.upcoming(name, 200):
+                        checked += 1
+                        mismatches += scheduler.air_time(item.item_id) != item_start
+                        if item_start <= now:
+                            predictions[item.item_id] = item_start
+            for name, item, item_start, _ in scheduler.advance(now):
+                aired += 1
+                expected = predictions.pop(item.item_id, None)
+                if expected is not None:
+                    mismatches += expected != item_start
+            mismatches += len(predictions)  # predicted to start but did not air
+            if tick % 60 == 0:
+                for name in names:
+                    top_up(name, now)
+        peak_queued = max(peak_queued, len(scheduler))
+    run_s = time.perf_counter() - t0
+    scheduler.close()
+    return {"channels": channels, "days": days, "ticks": ticks, "aired": aired, "urgent": urgent,
+            "cancelled": cancelled, "peak_queued": peak_queued, "queued": len(scheduler),
+            "fill_s": fill_s, "run_s": run_s, "checked": checked, "mismatches": mismatches}
+
+
+def _poisson(rng, mean):
+    # Knuth's method; the means here are small
+    limit, k, p = math.exp(-mean), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def main(channels=300, days=7):
+    stats = simulate(int(channels), float(days), check_every=30)
+    print(f"{stats['channels']} channels, {stats['days']:g} days in {stats['ticks']} ticks: "
+          f"{stats['run_s']:.1f}s (initial fill {stats['fill_s']:.1f}s)")
+    print(f"{stats['aired']} aired, {stats['urgent']} urgent inserts, {stats['cancelled']} cancelled, "
+          f"up to {stats['peak_queued']} queued")
+    print(f"{stats['checked']} predicted air times checked, {stats['mismatches']} off")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import re
+
+# --------------------------------------------------------------------
+# Canonical, fixed-size cache keys.
+#
+# Requests that mean the same thing should hit the same cache entry:
+# "Chemistry", "chemistry " and "chemistry" are one LibGen search, and an
+# AutoContent request whose prompt differs only in whitespace, or whose
+# resources are listed in another order, is the same generation job.
+# Keys are short hex digests, so lookups never compare multi-KB strings.
+# --------------------------------------------------------------------
+
+DIGEST_SIZE = 16  # bytes -> 32 hex characters
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def fold_whitespace(text):
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+# --------------------------------------------------------------------
+# 1) LibGen searches
+# --------------------------------------------------------------------
+def normalize_query(query):
+    """
+    'Chemistry+Basics ' -> 'chemistry basics': '+' is treated as a space,
+    case is folded and runs of whitespace collapse to one space.
+    """
+    return fold_whitespace((query or "").replace("+", " ")).casefold()
+
+
+def search_key(query):
+    return "search:" + digest(normalize_query(query))
+
+
+_MD5_PARAM = re.compile(r"md5=([0-9a-fA-F]{32})")
+
+
+def detail_key(link):
+    """
+    'book/index.php?md5=9f91...' -> 'detail:9F91...': detail pages are
+    identified by the book's md5 whatever the host or extra parameters.
+    Links without an md5 fall back to a digest of the link.
+    """
+    match = _MD5_PARAM.search(link or "")
+    return "detail:" + (match.group(1).upper() if match else digest(link or ""))
+
+
+# --------------------------------------------------------------------
+# 2) AutoContent generation requests
+# --------------------------------------------------------------------
+def canonical_resource(resource):
+    resource = dict(resource)
+    resource["type"] = fold_whitespace(str(resource.get("type", ""))).lower()
+    content = resource.get("content")
+    if isinstance(content, str):
+        resource["content"] = fold_whitespace(content)
+    return resource
+
+
+def canonical_request(request_data):
+    """
+    Copy of an AutoContent request with whitespace folded in every text
+    field and resources sorted, so equivalent requests compare equal.
+    """
+    request = dict(request_data)
+    for field in ("text", "outputType"):
+        if isinstance(request.get(field), str):
+            request[field] = fold_whitespace(request[field])
+    resources = [canonical_resource(r) for r in request.get("resources", [])]
+    request["resources"] = sorted(resources, key=lambda r: json.dumps(r, sort_keys=True))
+    return request
+
+
+def content_request_key(request_data):
+    canonical = json.dumps(canonical_request(request_data), sort_keys=True, separators=(",", ":"))
+    return "content:" + digest(canonical)
@@ -0,0 +1,169 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+from cache_keys import digest
+from http_client import get_client
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+COVER_CACHE_DIR = os.path.join(os.path.expanduser("~"), "AlexandriaPy", ".cover_cache")
+MEMORY_ITEMS = 64                    # ready PhotoImages kept for the Tk thread
+MAX_DISK_BYTES = 64 * 1024 * 1024    # thumbnails beyond this are trimmed, oldest first
+THUMBNAIL_QUALITY = 90
+
+
+class CoverCache:
+    """
+    Two-tier cache for book cover thumbnails.
+
+    - Memory: an LRU of ready ImageTk.PhotoImage objects. Tk objects may
+      only be touched from the Tk thread, so get_photo()/put_photo() are
+      Tk-thread only.
+    - Disk: small JPEG thumbnails under COVER_CACHE_DIR, keyed by a hash of
+      the cover URL and the requested size. load() runs on worker threads:
+      a disk hit decodes only the thumbnail; a miss downloads the cover and
+      decodes it with JPEG draft mode (libjpeg scales by 1/2, 1/4 or 1/8
+      while decoding) before the final resize.
+
+    Usage:
+        photo = covers.get_photo(url, (300, 400))
+        if photo is None:
+            image = covers.load(url, (300, 400))        # worker thread
+            photo = covers.put_photo(url, (300, 400), image)  # Tk thread
+    """
+
+    def __init__(self, cache_dir=COVER_CACHE_DIR, memory_items=MEMORY_ITEMS, max_disk_bytes=MAX_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.photos = OrderedDict()
+        self.lock = threading.Lock()
+        self.loading = {}  # key -> Lock, so two threads never fetch the same cover
+        os.makedirs(cache_dir, exist_ok=True)
+        self.trim()
+
+    @staticmethod
+    def key(url, size, fit=True):
+        """
+        fit=True keeps the aspect ratio inside 'size' (Image.thumbnail);
+        fit=False resizes to exactly 'size'.
+        """
+        return digest(f"{url}|{size[0]}x{size[1]}|{'fit' if fit else 'exact'}")
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key + ".jpg")
+
+    # ----------------------------------------------------------------
+    # Disk tier (any thread)
+    # ----------------------------------------------------------------
+    def cached(self, url, size, fit=True):
+        return os.path.exists(self.path_for(self.key(url, size, fit)))
+
+    def load(self, url, size, fit=True):
+        """
+        Returns the cover as a PIL image of the requested size, from disk
+        if possible, otherwise downloaded and stored. Raises on network or
+        decode errors.
+        """
+        key = self.key(url, size, fit)
+        with self.lock:
+            key_lock = self.loading.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                image = self._read(key)
+                if image is None:
+                    image = self._fetch(url, size, fit)
+                    self._write(key, image)
+                return image
+            finally:
+                with self.lock:
+                    self.loading.pop(key, None)
+
+    def _read(self, key):
+        path = self.path_for(key)
+        try:
+            with Image.open(path) as image:
+                image.load()
+                os.utime(path)  # recently used covers survive trim()
+                return image.copy()
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _fetch(url, size, fit):
+        response = get_client().get(url)
+        response.raise_for_status()
+        image = Image.open(io.BytesIO(response.content))
+        # Reduced-size decode for JPEGs; a no-op for other formats
+        image.draft("RGB", size)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        if fit:
+            image.thumbnail(size, Image.LANCZOS)
+        else:
+            image = image.resize(size, Image.LANCZOS)
+        return image
+
+    def _write(self, key, image):
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            image.save(tmp_path, "JPEG", quality=THUMBNAIL_QUALITY)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print("[ERROR] Could not cache cover:", e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def trim(self):
+        """
+        Deletes the least recently used thumbnails once the directory
+        grows past max_disk_bytes.
+        """
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.is_file()]
+        except OSError:
+            return
+        stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entries]
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in sorted(stats):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    # ----------------------------------------------------------------
+    # Memory tier (Tk thread only)
+    # ----------------------------------------------------------------
+    def get_photo(self, url, size, fit=True):
+        key = self.key(url, size, fit)
+        photo = self.photos.get(key)
+        if photo is not None:
+            self.photos.move_to_end(key)
+        return photo
+
+    def put_photo(self, url, size, image, fit=True):
+        photo = ImageTk.PhotoImage(image)
+        self.photos[self.key(url, size, fit)] = photo
+        while len(self.photos) > self.memory_items:
+            self.photos.popitem(last=False)
+        return photo
+
+
+def visible_rows(canvas, rows):
+    """
+    Indices of 'rows' (widgets inside a canvas window) that are at least
+    partly inside the canvas viewport.
+    """
+    top = canvas.canvasy(0)
+    bottom = top + canvas.winfo_height()
+    return [i for i, row in enumerate(rows)
+            if row.winfo_y() < bottom and row.winfo_y() + row.winfo_height() > top]
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+
+from cache_keys import detail_key
+from tk_tasks import TkTasks
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+DETAIL_ITEMS = 256        # parsed detail pages kept in memory
+DETAIL_TTL = 30 * 60      # seconds before a detail page is fetched again
+PREFETCH_BUDGET = 8       # top results fetched speculatively after a search
+PREFETCH_WORKERS = 2      # speculative fetches running at once
+
+
+class DetailCache:
+    """
+    Bounded, expiring cache of parsed book detail pages.
+
+    Entries are keyed by the md5 in the book link (cache_keys.detail_key),
+    so the same book reached through another mirror or a later search is
+    a hit. The least recently used entry is dropped past 'max_items' and
+    entries older than 'ttl' seconds count as missing. Safe to use from
+    worker threads.
+
+    Usage:
+        details = DetailCache()
+        metadata = details.get(link)
+        if metadata is None:
+            metadata = fetch_book_details(link)
+            details.put(link, metadata)
+    """
+
+    def __init__(self, max_items=DETAIL_ITEMS, ttl=DETAIL_TTL, clock=time.monotonic):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()  # key -> (stored_at, metadata)
+        self.lock = threading.Lock()
+
+    def get(self, link):
+        key = detail_key(link)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if self.clock() - entry[0] > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, link, metadata):
+        if not metadata:
+            return  # failed fetches are retried, not cached
+        key = detail_key(link)
+        with self.lock:
+            self.entries[key] = (self.clock(), metadata)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_items:
+                self.entries.popitem(last=False)
+
+    def __contains__(self, link):
+        return self.get(link) is not None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class DetailPrefetcher:
+    """
+    Fetches detail pages (and whatever else 'fetch' warms, e.g. covers)
+    ahead of a click, on its own small pool so it never delays a search
+    or a click on the main TkTasks.
+
+    - prefetch(links) submits at most 'budget' links, in order, skipping
+      those for which needs_fetch(link) is False. Only 'max_workers' run
+      at once; the rest wait in the pool's queue.
+    - Each book has its own channel, so asking for a book that is
+      already being fetched does not start it twice.
+    - cancel() drops everything queued and ignores results still in
+      flight; a new search should call it before prefetching again.
+
+    fetch(link) runs on a worker; on_result(link, result) runs on the Tk
+    thread.
+    """
+
+    def __init__(self, root, fetch, on_result, needs_fetch=None,
+                 budget=PREFETCH_BUDGET, max_workers=PREFETCH_WORKERS):
+        self.fetch = fetch
+        self.on_result = on_result
+        self.needs_fetch = needs_fetch or (lambda link: True)
+        self.budget = budget
+        self.tasks = TkTasks(root, max_workers=max_workers)
+
+    def prefetch(self, links, budget=None):
+        """
+        Queues up to 'budget' links (default: self.budget, 0 disables
+        speculation). Returns how many were submitted.
+        """
+        if budget is None:
+            budget = self.budget
+        submitted = 0
+        for link in links:
+            if submitted >= budget:
+                break
+            if not self.needs_fetch(link):
+                continue
+            self.tasks.submit(f"book:{detail_key(link)}", self.fetch, link, key=link,
+                              on_done=lambda result, link=link: self.on_result(link, result))
+            submitted += 1
+        return submitted
+
+    def pending(self):
+        return self.tasks.outstanding
+
+    def cancel(self):
+        self.tasks.cancel_all()
+
+    def shutdown(self):
+        self.tasks.shutdown()
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+from downloader import download_file, DEFAULT_SEGMENTS
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+MAX_CONCURRENT = 4  # downloads running at once, across all hosts
+MAX_PER_HOST = 2    # downloads running at once against a single host
+
+QUEUED, RESOLVING, DOWNLOADING, DONE, FAILED = "queued", "resolving", "downloading", "done", "failed"
+
+
+class DownloadJob:
+    """
+    One book in the download queue. 'book' is a record from search_libgen.
+    """
+
+    def __init__(self, book):
+        self.book = book
+        self.state = QUEUED
+        self.final_url = None
+        self.host = None
+        self.out_path = None
+        self.downloaded = 0
+        self.total = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def title(self):
+        return self.book.get("title", "")
+
+    def rate(self):
+        """Average bytes/sec since this job started downloading."""
+        if not self.started_at:
+            return 0.0
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return self.downloaded / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "title": self.title,
+            "state": self.state,
+            "host": self.host,
+            "out_path": self.out_path,
+            "downloaded": self.downloaded,
+            "total": self.total,
+            "rate": self.rate(),
+            "error": self.error,
+        }
+
+
+class DownloadManager:
+    """
+    Downloads a queue of LibGen book records with asyncio: at most
+    'max_concurrent' jobs run at once and at most 'per_host' of them talk to
+    the same download host. Link resolution and the byte transfer itself run
+    in worker threads (they use the blocking pooled client).
+
+    'resolve_link(book)' returns the final download URL for a record and
+    'prepare(book)' creates its folder and returns the output path; both
+    default to the helpers in libgen.py.
+
+    Use it either from asyncio:
+        jobs = await DownloadManager().run(books)
+    or from a GUI thread, with the loop running in the background:
+        manager = DownloadManager(on_update=callback)
+        manager.start()
+        manager.submit(book)
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, per_host=MAX_PER_HOST,
+                 resolve_link=None, prepare=None, segments=DEFAULT_SEGMENTS,
+                 on_update=None):
+        if resolve_link is None or prepare is None:
+            import libgen
+            resolve_link = resolve_link or libgen.resolve_book_link
+            prepare = prepare or libgen.prepare_book_dir
+
+        self.max_concurrent = max_concurrent
+        self.per_host = per_host
+        self.resolve_link = resolve_link
+        self.prepare = prepare
+        self.segments = segments
+        self.on_update = on_update
+
+        self.jobs = []
+        self.started_at = None
+        self._loop = None
+        self._queue = None
+        self._slots = None
+        self._dispatcher = None
+        self._tasks = set()
+        self._host_limits = {}
+        self._thread = None
+
+    # ----------------------------------------------------------------
+    # asyncio API
+    # ----------------------------------------------------------------
+    async def run(self, books):
+        """
+        Downloads every record in 'books' and returns the finished jobs.
+        """
+        self._ensure_workers()
+        for book in books:
+            self.add(book)
+        await self._queue.join()
+        await self.close()
+        return self.jobs
+
+    def add(self, book):
+        """
+        Queues 'book'; must be called from the manager's event loop.
+        """
+        self._ensure_workers()
+        job = DownloadJob(book)
+        self.jobs.append(job)
+        self._queue.put_nowait(job)
+        self._notify(job)
+        return job
+
+    async def close(self):
+        tasks = [t for t in (self._dispatcher, *self._tasks) if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatcher = None
+        self._tasks = set()
+
+    def _ensure_workers(self):
+        if self._dispatcher:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self._dispatcher = self._loop.create_task(self._dispatch())
+
+    def _host_limit(self, host):
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = asyncio.Semaphore(self.per_host)
+            self._host_limits[host] = limit
+        return limit
+
+    async def _dispatch(self):
+        # One task per job: a job waiting for its host must not keep a
+        # slot (or the queue) from jobs bound for other hosts
+        while True:
+            job = await self._queue.get()
+            task = self._loop.create_task(self._run_job(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_job(self, job):
+        try:
+            await self._process(job)
+        except Exception as e:
+            job.state, job.error = FAILED, str(e)
+            job.finished_at = time.monotonic()
+            self._notify(job)
+        finally:
+            self._queue.task_done()
+
+    async def _process(self, job):
+        async with self._slots:
+            job.state = RESOLVING
+            self._notify(job)
+            job.final_url = await asyncio.to_thread(self.resolve_link, job.book)
+        if not job.final_url:
+            job.state, job.error = FAILED, "Could not find final link."
+            job.finished_at = time.monotonic()
+            self._notify(job)
+            return
+
+        job.host = urlsplit(job.final_url).netloc
+        # Host slot first, global slot second: while the host is busy the
+        # job holds nothing the other hosts' jobs need
+        async with self._host_limit(job.host), self._slots:
+            job.out_path = await asyncio.to_thread(self.prepare, job.book)
+            job.state = DOWNLOADING
+            job.started_at = time.monotonic()
+            if self.started_at is None:
+                self.started_at = job.started_at
+            self._notify(job)
+
+            def progress_callback(downloaded, total_size):
+                if downloaded < 0:
+                    return
+                job.downloaded, job.total = downloaded, total_size
+                self._notify(job)
+
+            ok = await asyncio.to_thread(download_file, job.final_url, job.out_path,
+                                         progress_callback, self.segments)
+
+        job.finished_at = time.monotonic()
+        job.state = DONE if ok else FAILED
+        if not ok:
+            job.error = "Download failed."
+        self._notify(job)
+
+    def _notify(self, job):
+        if self.on_update:
+            self.on_update(job)
+
+    # ----------------------------------------------------------------
+    # Background-thread API (for Tk)
+    # ----------------------------------------------------------------
+    def start(self):
+        """
+        Runs the manager's event loop in a daemon thread.
+        """
+        if self._thread:
+            return
+        ready = threading.Event()
+
+        def run_loop():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            ready.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run_loop, daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def submit(self, book):
+        """
+        Thread-safe: queues 'book' on the background loop and returns its job.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._add_async(book), self._loop)
+        return future.result()
+
+    async def _add_async(self, book):
+        return self.add(book)
+
+    # ----------------------------------------------------------------
+    # Stats
+    # ----------------------------------------------------------------
+    def stats(self):
+        """
+        Aggregate state counts and throughput (bytes/sec since the first
+        download started) across all jobs.
+        """
+        counts = {state: 0 for state in (QUEUED, RESOLVING, DOWNLOADING, DONE, FAILED)}
+        total_bytes = 0
+        for job in self.jobs:
+            counts[job.state] += 1
+            total_bytes += job.downloaded
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0
+        counts["bytes"] = total_bytes
+        counts["throughput"] = total_bytes / elapsed if elapsed > 0 else 0.0
+        return counts
+
+
+# --------------------------------------------------------------------
+# Command line: python download_manager.py books.json
+# (books.json is a list of records as returned by search_libgen)
+# --------------------------------------------------------------------
+def main(path):
+    with open(path, "r", encoding="utf-8") as f:
+        books = json.load(f)
+
+    def on_update(job):
+        if job.state in (DONE, FAILED):
+            print(f"[{job.state.upper()}] {job.title} {job.error or job.out_path}")
+
+    manager = DownloadManager(on_update=on_update)
+    start = time.monotonic()
+    asyncio.run(manager.run(books))
+    stats = manager.stats()
+    elapsed = time.monotonic() - start
+    print(f"{stats[DONE]} done, {stats[FAILED]} failed, {stats['bytes'] / 1e6:.1f} MB "
+          f"in {elapsed:.1f}s ({stats['throughput'] / 1e6:.2f} MB/s)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
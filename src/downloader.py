@@ -0,0 +1,306 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http_client import get_client
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+CHUNK_SIZE = 8192
+SEGMENT_CHUNK_SIZE = 64 * 1024
+DEFAULT_SEGMENTS = 4
+MIN_SEGMENT_SIZE = 2 * 1024 * 1024  # don't split files into parts smaller than 2 MB
+DOWNLOAD_TIMEOUT = 20
+CHECKPOINT_BYTES = 1024 * 1024      # rewrite the .part sidecar every ~1 MB
+
+
+class RangeNotSupported(Exception):
+    """Raised when a server ignores a Range request mid-download."""
+
+
+# --------------------------------------------------------------------
+# 1) Probe the server
+# --------------------------------------------------------------------
+def probe_download(url):
+    """
+    HEADs 'url' and returns a dict with the final URL (after redirects),
+    total size (None when there is no Content-Length), whether byte ranges
+    are accepted, and the ETag / Last-Modified validators.
+    """
+    resp = get_client().head(url, timeout=DOWNLOAD_TIMEOUT)
+    resp.raise_for_status()
+    total_size = resp.headers.get("Content-Length")
+    return {
+        "url": resp.url,
+        "total_size": int(total_size) if total_size else None,
+        "accepts_ranges": resp.headers.get("Accept-Ranges", "").lower() == "bytes",
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+    }
+
+
+def split_ranges(total_size, segments):
+    """
+    Splits [0, total_size) into 'segments' inclusive (start, end) byte ranges.
+    """
+    part = total_size // segments
+    ranges = []
+    for i in range(segments):
+        start = i * part
+        end = total_size - 1 if i == segments - 1 else start + part - 1
+        ranges.append((start, end))
+    return ranges
+
+
+# --------------------------------------------------------------------
+# 2) Partial files
+# --------------------------------------------------------------------
+class PartFile:
+    """
+    A download in progress: data goes to '<out_path>.part' and a small JSON
+    sidecar '<out_path>.part.json' records the URL, the server validator
+    (ETag / Last-Modified) and how many bytes are already on disk, so an
+    interrupted download can continue with a Range request.
+    """
+
+    def __init__(self, out_path):
+        self.out_path = out_path
+        self.path = out_path + ".part"
+        self.meta_path = out_path + ".part.json"
+
+    def load(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, meta):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def resume_state(self, url, info):
+        """
+        Returns the saved sidecar if it belongs to the same URL and the
+        server's validator still matches, else None (start from zero).
+        """
+        meta = self.load()
+        if not meta or not os.path.exists(self.path):
+            return None
+        validator = info.get("etag") or info.get("last_modified")
+        if not validator or meta.get("url") != url:
+            return None
+        if (meta.get("etag") or meta.get("last_modified")) != validator:
+            return None
+        if meta.get("total_size") != info.get("total_size"):
+            return None
+        return meta
+
+    def commit(self):
+        os.replace(self.path, self.out_path)
+        self.discard_meta()
+
+    def discard_meta(self):
+        try:
+            os.remove(self.meta_path)
+        except FileNotFoundError:
+            pass
+
+
+def new_meta(url, info):
+    return {
+        "url": url,
+        "etag": info.get("etag"),
+        "last_modified": info.get("last_modified"),
+        "total_size": info.get("total_size"),
+        "bytes_written": 0,
+    }
+
+
+# --------------------------------------------------------------------
+# 3) Single-stream download
+# --------------------------------------------------------------------
+def download_stream(url, part, meta, progress_callback=None):
+    """
+    Streams 'url' into part.path, continuing from meta['bytes_written']
+    with a Range / If-Range request when there is something to resume.
+    """
+    offset = meta.get("bytes_written", 0) if os.path.exists(part.path) else 0
+    offset = min(offset, os.path.getsize(part.path)) if offset else 0
+    validator = meta.get("etag") or meta.get("last_modified")
+
+    headers = {}
+    if offset and validator:
+        headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+    else:
+        offset = 0
+
+    with get_client().get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as r:
+        r.raise_for_status()
+        if offset and r.status_code != 206:
+            offset = 0  # validator changed or ranges unsupported: full body follows
+
+        total_size = r.headers.get("Content-Length")
+        total_size = int(total_size) + offset if total_size else None
+
+        downloaded = offset
+        since_checkpoint = 0
+        with open(part.path, "r+b" if offset else "wb") as f:
+            f.seek(offset)
+            f.truncate()
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    since_checkpoint += len(chunk)
+                    if progress_callback:
+                        progress_callback(downloaded, total_size)
+                    if validator and since_checkpoint >= CHECKPOINT_BYTES:
+                        f.flush()
+                        meta["bytes_written"] = downloaded
+                        part.save(meta)
+                        since_checkpoint = 0
+
+        if total_size is not None and downloaded != total_size:
+            meta["bytes_written"] = downloaded
+            part.save(meta)
+            raise IOError(f"Connection closed after {downloaded} of {total_size} bytes")
+
+
+# --------------------------------------------------------------------
+# 4) Segmented download (parallel byte ranges)
+# --------------------------------------------------------------------
+def download_segmented(url, part, meta, segments=DEFAULT_SEGMENTS, progress_callback=None):
+    """
+    Fetches 'segments' byte ranges of 'url' in parallel into part.path,
+    preallocated to meta['total_size']. Per-segment progress is kept in
+    meta['segments'] as [start, end, written] so a retry only fetches what
+    is missing. Raises RangeNotSupported if the server answers a range
+    request with anything but the requested bytes.
+    """
+    total_size = meta["total_size"]
+    layout = meta.get("segments")
+    if not layout or not os.path.exists(part.path):
+        layout = [[start, end, 0] for start, end in split_ranges(total_size, segments)]
+        with open(part.path, "wb") as f:
+            f.truncate(total_size)
+    meta["segments"] = layout
+
+    lock = threading.Lock()
+    stop = threading.Event()
+    state = {"downloaded": sum(seg[2] for seg in layout), "since_checkpoint": 0}
+    if progress_callback and state["downloaded"]:
+        progress_callback(state["downloaded"], total_size)
+
+    def fetch_range(seg):
+        start, end, written = seg
+        if start + written > end:
+            return
+        first = start + written
+        headers = {"Range": f"bytes={first}-{end}"}
+        with get_client().get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as r:
+            r.raise_for_status()
+            content_range = r.headers.get("Content-Range", "")
+            if r.status_code != 206 or not content_range.startswith(f"bytes {first}-"):
+                raise RangeNotSupported(f"Server ignored range {first}-{end}")
+
+            # Unbuffered, so the sidecar never records bytes still in a Python buffer
+            with open(part.path, "r+b", buffering=0) as f:
+                f.seek(first)
+                remaining = end - first + 1
+                for chunk in r.iter_content(chunk_size=SEGMENT_CHUNK_SIZE):
+                    if stop.is_set():
+                        return
+                    if not chunk:
+                        continue
+                    chunk = chunk[:remaining]
+                    f.write(chunk)
+                    remaining -= len(chunk)
+                    with lock:
+                        seg[2] += len(chunk)
+                        state["downloaded"] += len(chunk)
+                        state["since_checkpoint"] += len(chunk)
+                        if state["since_checkpoint"] >= CHECKPOINT_BYTES:
+                            meta["bytes_written"] = state["downloaded"]
+                            part.save(meta)
+                            state["since_checkpoint"] = 0
+                        if progress_callback:
+                            progress_callback(state["downloaded"], total_size)
+                    if remaining <= 0:
+                        break
+                if remaining > 0:
+                    raise IOError(f"Range {first}-{end} ended {remaining} bytes early")
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(layout)) as pool:
+            futures = [pool.submit(fetch_range, seg) for seg in layout]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                stop.set()
+                raise
+    finally:
+        with lock:
+            meta["bytes_written"] = state["downloaded"]
+            part.save(meta)
+
+
+# --------------------------------------------------------------------
+# 5) Download a File with Progress
+# --------------------------------------------------------------------
+def download_file(url, out_path, progress_callback=None, segments=DEFAULT_SEGMENTS):
+    """
+    Streams the file from 'url' to 'out_path'.
+    'progress_callback(downloaded_bytes, total_bytes)' if provided.
+    Returns True on success, False on failure.
+
+    Data is written to '<out_path>.part' and renamed into place once
+    complete. If a previous attempt was interrupted and the server's
+    ETag / Last-Modified still matches, only the missing bytes are fetched.
+
+    When the server reports 'Accept-Ranges: bytes' and a Content-Length,
+    the file is fetched as 'segments' parallel byte ranges; otherwise (or
+    with segments=1) it falls back to a single stream.
+    """
+    part = PartFile(out_path)
+    try:
+        try:
+            info = probe_download(url)
+        except Exception as e:
+            print("[WARN] HEAD probe failed, using a single stream:", e)
+            info = {"url": url, "total_size": None, "accepts_ranges": False}
+
+        meta = part.resume_state(url, info)
+        if meta:
+            print(f"[INFO] Resuming {os.path.basename(out_path)} from {meta.get('bytes_written', 0)} bytes")
+        else:
+            meta = new_meta(url, info)
+            part.save(meta)
+
+        total_size = info["total_size"]
+        if info["accepts_ranges"] and total_size:
+            parts = max(1, min(segments, total_size // MIN_SEGMENT_SIZE))
+            if parts > 1 or meta.get("segments"):
+                try:
+                    download_segmented(info["url"], part, meta, parts, progress_callback)
+                    part.commit()
+                    return True
+                except RangeNotSupported as e:
+                    print("[WARN]", e, "- falling back to a single stream")
+                    meta = new_meta(url, info)
+
+        if meta.get("segments"):
+            # A segmented .part can't be continued as one stream
+            meta = new_meta(url, info)
+        download_stream(info["url"], part, meta, progress_callback)
+        part.commit()
+        return True
+    except Exception as e:
+        print("[ERROR]", e)
+        if progress_callback:
+            progress_callback(-1, -1)  # indicates failure
+        return False
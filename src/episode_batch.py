@@ -0,0 +1,303 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+import ai_inference
+from cache_keys import content_request_key
+from pdf_extract import get_pdf_text
+from status_poller import StatusPoller
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+RATE_LIMIT = 1.0     # Content/Create calls per second
+MAX_IN_FLIGHT = 8    # episodes created but not finished yet
+MAX_DOWNLOADS = 4    # audio downloads running at once
+
+QUEUED, CACHED, CREATING, GENERATING, DOWNLOADING, DONE, FAILED = (
+    "queued", "cached", "creating", "generating", "downloading", "done", "failed")
+
+
+def load_prompt(name, prompts_dir=PROMPTS_DIR):
+    """
+    'quiz' -> the text of prompts/quiz.txt.
+    """
+    with open(os.path.join(prompts_dir, f"{name}.txt"), "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def build_request(spec, prompts_dir=PROMPTS_DIR, pdfs=None):
+    """
+    Turns a manifest entry into Content/Create request data:
+
+        {"title": "Acids and Bases",          # only used for reporting
+         "prompt": "quiz",                    # prompts/quiz.txt
+         "text": "Focus on pH.",              # optional, added after the prompt
+         "resources": [{"content": "...", "type": "youtube"}],
+         "pdf": "../assets/chemistry.pdf",    # optional, its text as "text" resources
+         "chapters": [3, 4],                  # optional, which chapters of the pdf (all by default)
+         "outputType": "audio"}               # optional
+    """
+    text = load_prompt(spec["prompt"], prompts_dir) if spec.get("prompt") else ""
+    if spec.get("text"):
+        text = f"{text}\n\n{spec['text']}" if text else spec["text"]
+    resources = list(spec.get("resources", []))
+    if spec.get("pdf"):
+        resources += (pdfs or get_pdf_text()).resources(spec["pdf"], spec.get("chapters"))
+    return {
+        "resources": resources,
+        "text": text,
+        "outputType": spec.get("outputType", "audio"),
+    }
+
+
+def expand_specs(specs, pdfs=None):
+    """
+    Yields the specs with every {"pdf": ..., "per_chapter": true} entry
+    replaced by one spec per chapter of the book, each carrying that
+    chapter as a text resource. Chapters are yielded as soon as their
+    pages are extracted, so the first episodes can be created while the
+    rest of the book is still being read. A book that cannot be read is
+    passed on as is and fails in build_request.
+    """
+    for spec in specs:
+        if not (spec.get("pdf") and spec.get("per_chapter")):
+            yield spec
+            continue
+        pdfs = pdfs or get_pdf_text()
+        base = {k: v for k, v in spec.items() if k not in ("pdf", "per_chapter", "chapters")}
+        book = spec.get("title") or os.path.splitext(os.path.basename(spec["pdf"]))[0]
+        wanted = set(spec.get("chapters") or ())
+        try:
+            for chapter in pdfs.chapters(spec["pdf"]):
+                if not wanted or chapter.number in wanted:
+                    yield dict(base, title=f"{book} - {chapter.title}",
+                               resources=list(spec.get("resources", [])) + [chapter.resource()])
+        except (OSError, ValueError, ImportError):
+            yield spec
+
+
+class EpisodeJob:
+    """
+    One episode of the manifest, with its timings for the report.
+    """
+
+    def __init__(self, spec, request_data, error=None):
+        self.spec = spec
+        self.request_data = request_data
+        self.key = content_request_key(request_data) if request_data else None
+        self.state = FAILED if error else QUEUED
+        self.request_id = None
+        self.audio_path = None
+        self.error = error
+        self.queued_at = time.monotonic()
+        self.created_at = None
+        self.generated_at = None
+        self.finished_at = None
+
+    @property
+    def title(self):
+        return self.spec.get("title") or self.spec.get("prompt") or self.key or self.spec.get("pdf", "")
+
+    def latency(self):
+        """Seconds from entering the batch to audio on disk."""
+        return (self.finished_at or time.monotonic()) - self.queued_at
+
+
+class EpisodeBatch:
+    """
+    Generates a manifest of episodes with asyncio. Episodes already in the
+    audio cache are skipped. Content/Create calls are spaced to
+    'rate_limit' per second and at most 'max_in_flight' episodes are
+    being generated at once. Specs are read (and PDF chapters extracted,
+    see expand_specs) in a worker thread while earlier episodes are
+    already being created. Every in-flight job is polled by one shared
+    StatusPoller, and finished audio is downloaded right away, at most
+    'max_downloads' at a time. The blocking API calls run in worker
+    threads on the pooled "autocontent" client.
+
+    Usage:
+        batch = EpisodeBatch(rate_limit=2, max_in_flight=10)
+        jobs = asyncio.run(batch.run(specs))
+        print(batch.report())
+    """
+
+    def __init__(self, rate_limit=RATE_LIMIT, max_in_flight=MAX_IN_FLIGHT, max_downloads=MAX_DOWNLOADS,
+                 cache=None, prompts_dir=PROMPTS_DIR, poller=None, on_update=None, pdfs=None):
+        self.rate_limit = rate_limit
+        self.max_in_flight = max_in_flight
+        self.max_downloads = max_downloads
+        self.cache = cache
+        self.prompts_dir = prompts_dir
+        self.poller = poller
+        self.on_update = on_update
+        self.pdfs = pdfs
+
+        self.jobs = []
+        self.create_calls = 0
+        self.started_at = None
+        self.finished_at = None
+        self._next_create = 0.0
+
+    async def run(self, specs):
+        """
+        Generates every spec and returns the jobs, in manifest order.
+        """
+        if self.cache is None:
+            self.cache = ai_inference.load_cache()
+        own_poller = self.poller is None
+        if own_poller:
+            self.poller = StatusPoller(ai_inference.status_base_url, ai_inference.status_headers())
+
+        self.started_at = time.monotonic()
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        downloads = asyncio.Semaphore(self.max_downloads)
+        seen = set()
+        pending = []
+        specs = expand_specs(specs, self.pdfs)
+        try:
+            while (job := await asyncio.to_thread(self._next_job, specs)) is not None:
+                self.jobs.append(job)
+                if job.state == FAILED:
+                    job.finished_at = time.monotonic()
+                    self._notify(job)
+                    continue
+                if job.key in self.cache or job.key in seen:
+                    job.state = CACHED
+                    self._notify(job)
+                    continue
+                seen.add(job.key)
+                pending.append(asyncio.create_task(self._process(job, in_flight, downloads)))
+            await asyncio.gather(*pending)
+        finally:
+            self.finished_at = time.monotonic()
+            self.cache.commit()
+            if own_poller:
+                self.poller.close()
+        return self.jobs
+
+    def _next_job(self, specs):
+        """
+        The next spec's EpisodeJob, or None at the end. Runs in a worker
+        thread: building a request can mean extracting PDF pages.
+        """
+        spec = next(specs, None)
+        if spec is None:
+            return None
+        try:
+            return EpisodeJob(spec, build_request(spec, self.prompts_dir, self.pdfs))
+        except (OSError, ValueError, ImportError) as e:
+            return EpisodeJob(spec, None, str(e))
+
+    async def _rate_limited(self):
+        # Spaces Content/Create calls 1 / rate_limit seconds apart
+        now = time.monotonic()
+        slot = max(now, self._next_create)
+        self._next_create = slot + 1 / self.rate_limit
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _process(self, job, in_flight, downloads):
+        try:
+            async with in_flight:
+                await self._rate_limited()
+                job.state = CREATING
+                self._notify(job)
+                self.create_calls += 1
+                created = await asyncio.to_thread(ai_inference.create_content, job.request_data)
+                job.request_id = created.get("request_id")
+                if created.get("error_message") or not job.request_id:
+                    raise RuntimeError(created.get("error_message") or "No request id returned.")
+
+                job.created_at = time.monotonic()
+                job.state = GENERATING
+                self._notify(job)
+                data = await self.poller.track(job.request_id)
+                if data is None:
+                    raise RuntimeError("Content generation failed.")
+                job.generated_at = time.monotonic()
+
+            # Downloads do not hold an in-flight slot: the next episode can
+            # be created while this one's audio comes in
+            async with downloads:
+                job.state = DOWNLOADING
+                self._notify(job)
+                job.audio_path = await asyncio.to_thread(
+                    ai_inference.download_audio, data.get("audio_url"), data.get("audio_title"))
+
+            self.cache[job.key] = {
+                "audio_url": data.get("audio_url"),
+                "audio_title": data.get("audio_title"),
+                "audio_path": job.audio_path,
+            }
+            job.state = DONE
+        except Exception as e:
+            job.state, job.error = FAILED, str(e)
+        job.finished_at = time.monotonic()
+        self._notify(job)
+
+    def _notify(self, job):
+        if self.on_update:
+            self.on_update(job)
+
+    # ----------------------------------------------------------------
+    # Report
+    # ----------------------------------------------------------------
+    def stats(self):
+        """
+        State counts, wall time, episodes per minute and API calls.
+        """
+        counts = {state: 0 for state in (QUEUED, CACHED, CREATING, GENERATING, DOWNLOADING, DONE, FAILED)}
+        for job in self.jobs:
+            counts[job.state] += 1
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at if self.started_at else 0
+        counts["elapsed"] = elapsed
+        counts["per_minute"] = counts[DONE] / elapsed * 60 if elapsed > 0 else 0.0
+        counts["create_calls"] = self.create_calls
+        counts["status_calls"] = self.poller.calls if self.poller else None
+        return counts
+
+    def report(self):
+        lines = [f"{'episode':<40} {'state':<9} {'wait':>7} {'generate':>9} {'download':>9} {'total':>8}"]
+        for job in self.jobs:
+            if job.state == CACHED:
+                lines.append(f"{job.title[:40]:<40} {job.state:<9}")
+                continue
+
+            def span(start, end):
+                return f"{end - start:.1f}s" if start and end else "-"
+            lines.append(f"{job.title[:40]:<40} {job.state:<9} {span(job.queued_at, job.created_at):>7} "
+                         f"{span(job.created_at, job.generated_at):>9} "
+                         f"{span(job.generated_at, job.finished_at):>9} {job.latency():>7.1f}s")
+            if job.error:
+                lines.append(f"    {job.error}")
+        stats = self.stats()
+        lines.append(f"{stats[DONE]} done, {stats[FAILED]} failed, {stats[CACHED]} cached in "
+                     f"{stats['elapsed']:.1f}s ({stats['per_minute']:.2f} episodes/min, "
+                     f"{stats['create_calls']} create + {stats['status_calls'] or 0} status calls)")
+        return "\n".join(lines)
+
+
+# --------------------------------------------------------------------
+# Command line: python episode_batch.py episodes.json [rate_limit] [max_in_flight]
+# (episodes.json is a list of specs, see build_request)
+# --------------------------------------------------------------------
+def main(path, rate_limit=RATE_LIMIT, max_in_flight=MAX_IN_FLIGHT):
+    with open(path, "r", encoding="utf-8") as f:
+        specs = json.load(f)
+
+    def on_update(job):
+        if job.state in (DONE, FAILED):
+            print(f"[{job.state.upper()}] {job.title} {job.error or job.audio_path}")
+
+    batch = EpisodeBatch(rate_limit=rate_limit, max_in_flight=max_in_flight, on_update=on_update)
+    asyncio.run(batch.run(specs))
+    print(batch.report())
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(args[0], *(float(a) if i == 0 else int(a) for i, a in enumerate(args[1:])))
@@ -1,20 +1,14 @@
-import os 
 import requests
+from podcast_store import store_audio_stream
 
 def download_audio(audio_url, audio_title):
     response = requests.get(audio_url, stream=True)
     response.raise_for_status()
     
-    # Ensure the podcasts directory exists
-    os.makedirs('../podcasts', exist_ok=True)
-    
-    # Create the file path
-    file_path = f'../podcasts/{audio_title}.wav'
-    
-    # Save the audio file
-    with open(file_path, 'wb') as file:
-        for chunk in response.iter_content(chunk_size=8192):
-            file.write(chunk)
+    # Encode to MP3 while downloading (ffmpeg if installed) into the
+    # content-addressed podcast store; the title only lives in its manifest
+    with response:
+        file_path = store_audio_stream(response.iter_content(chunk_size=64 * 1024), audio_title)
     
     print(f'Audio downloaded successfully: {file_path}')
     
@@ -0,0 +1,130 @@
+import threading
+from urllib.parse import urlsplit
+import certifi
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+DEFAULT_TIMEOUT = 10          # seconds, used when a call passes no timeout
+DEFAULT_POOL_CONNECTIONS = 8  # number of per-host pools kept alive
+DEFAULT_POOL_MAXSIZE = 16     # keep-alive connections per host
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5         # 0.5s, 1s, 2s between retries
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HttpClient:
+    """
+    Thin wrapper around a requests.Session with keep-alive connection pools
+    per host and one timeout / retry / certificate policy for every call.
+
+    Usage:
+        client = get_client()
+        resp = client.get(url, params={...})
+    """
+
+    def __init__(self,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF,
+                 verify=None,
+                 headers=None):
+        self.timeout = timeout
+        self.verify = verify if verify is not None else certifi.where()
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def request(self, method, url, **kwargs):
+        if _host_routes:
+            url = route_url(url)
+        kwargs.setdefault("timeout", self.timeout)
+        kwargs.setdefault("verify", self.verify)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        kwargs.setdefault("allow_redirects", True)
+        return self.request("HEAD", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+# --------------------------------------------------------------------
+# Shared instances
+# --------------------------------------------------------------------
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name="libgen", **settings):
+    """
+    Returns the process-wide HttpClient registered under 'name', creating
+    it with 'settings' (pool sizes, timeout, retries, ...) on first use.
+    Every LibGen front-end shares the "libgen" client so a search followed
+    by detail, mirror and cover fetches reuses warm connections.
+    """
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = HttpClient(**settings)
+            _clients[name] = client
+        return client
+
+
+# --------------------------------------------------------------------
+# Host routing
+#
+# Lets every front-end be pointed at a local stand-in without touching
+# their hard-coded LibGen / AutoContent URLs (see benchmarks/run_benchmarks.py).
+# --------------------------------------------------------------------
+_host_routes = {}
+
+
+def route_host(host, base_url):
+    """
+    Sends requests for 'host' (any scheme) to 'base_url' instead, keeping
+    the path and query: route_host("libgen.is", "http://127.0.0.1:8000/libgen.is")
+    turns https://libgen.is/search.php?req=x into
+    http://127.0.0.1:8000/libgen.is/search.php?req=x.
+    """
+    _host_routes[host.lower()] = base_url.rstrip("/")
+
+
+def clear_routes():
+    _host_routes.clear()
+
+
+def route_url(url):
+    parts = urlsplit(url)
+    base = _host_routes.get(parts.netloc.lower())
+    if base is None:
+        return url
+    return base + (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
@@ -0,0 +1,242 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+COMPACT_MIN_RECORDS = 1000  # never compact journals smaller than this
+COMPACT_DEAD_RATIO = 0.5    # compact once over half the records are superseded
+
+
+class JournalStore:
+    """
+    Dict-like key/value store kept as an append-only, line-delimited JSON
+    journal:
+
+        {"k": "<key>", "v": {...}}     set
+        {"k": "<key>", "d": 1}         delete
+
+    Opening the store replays the journal into an in-memory index, so
+    lookups never touch the disk. Every commit appends the pending lines
+    and fsyncs, so a crash loses at most the uncommitted records; a torn
+    last line is detected and cut off on the next open. A corrupt line
+    elsewhere is skipped and counted in 'skipped'. Superseded records
+    are dropped by compact(), which rewrites the live entries to a new
+    file and swaps it in atomically.
+
+    Usage:
+        cache = JournalStore("audio_cache.jsonl")
+        if key in cache:
+            result = cache[key]
+        cache[key] = {...}          # appended + fsynced
+        with cache.batch():         # several writes, one fsync
+            cache[a] = ...
+            cache[b] = ...
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.index = {}
+        self.records = 0
+        self.skipped = 0
+        self.pending = []
+        self.batch_depth = 0
+        self._replay()
+        self.file = open(self.path, "ab")
+
+    # ----------------------------------------------------------------
+    # Open / replay
+    # ----------------------------------------------------------------
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        good_offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write from a crash
+                good_offset += len(line)
+                self.records += 1
+                record = _parse(line)
+                if record is None:
+                    self.skipped += 1
+                    continue
+                self._apply(record)
+        if self.skipped:
+            print(f"[ERROR] {self.path}: skipped {self.skipped} corrupt record(s)")
+        if good_offset != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good_offset)
+
+    def _apply(self, record):
+        if record.get("d"):
+            self.index.pop(record["k"], None)
+        else:
+            self.index[record["k"]] = record["v"]
+
+    # ----------------------------------------------------------------
+    # Dict interface
+    # ----------------------------------------------------------------
+    def __contains__(self, key):
+        return key in self.index
+
+    def __getitem__(self, key):
+        return self.index[key]
+
+    def get(self, key, default=None):
+        return self.index.get(key, default)
+
+    def __len__(self):
+        return len(self.index)
+
+    def keys(self):
+        return self.index.keys()
+
+    def items(self):
+        return self.index.items()
+
+    def __setitem__(self, key, value):
+        self._append({"k": key, "v": value})
+
+    def __delitem__(self, key):
+        if key not in self.index:
+            raise KeyError(key)
+        self._append({"k": key, "d": 1})
+
+    # ----------------------------------------------------------------
+    # Writes
+    # ----------------------------------------------------------------
+    def _append(self, record):
+        with self.lock:
+            self._apply(record)
+            self.pending.append(json.dumps(record, separators=(",", ":")) + "\n")
+            if not self.batch_depth:
+                self.commit()
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups several writes into a single append + fsync.
+        """
+        with self.lock:
+            self.batch_depth += 1
+            try:
+                yield self
+            finally:
+                self.batch_depth -= 1
+                if not self.batch_depth:
+                    self.commit()
+
+    def commit(self):
+        """
+        Appends pending records and fsyncs the journal.
+        """
+        with self.lock:
+            if not self.pending:
+                return
+            self.file.write("".join(self.pending).encode("utf-8"))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.records += len(self.pending)
+            self.pending = []
+            self.maybe_compact()
+
+    # ----------------------------------------------------------------
+    # Compaction
+    # ----------------------------------------------------------------
+    def maybe_compact(self):
+        dead = self.records - len(self.index)
+        if self.records >= COMPACT_MIN_RECORDS and dead > self.records * COMPACT_DEAD_RATIO:
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrites the journal with one record per live key.
+        """
+        with self.lock:
+            tmp_path = self.path + ".compact"
+            with open(tmp_path, "wb") as f:
+                for key, value in self.index.items():
+                    f.write((json.dumps({"k": key, "v": value}, separators=(",", ":")) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            self.file.close()
+            os.replace(tmp_path, self.path)
+            _fsync_dir(os.path.dirname(os.path.abspath(self.path)))
+            self.file = open(self.path, "ab")
+            self.records = len(self.index)
+
+    def close(self):
+        with self.lock:
+            self.commit()
+            self.file.close()
+
+    # ----------------------------------------------------------------
+    # Migration
+    # ----------------------------------------------------------------
+    def import_json(self, json_path, key_func=None):
+        """
+        Copies a '{key: value}' JSON file into an empty journal, mapping
+        each key through 'key_func' if given. Returns the number of
+        entries imported.
+        """
+        if self.records or not os.path.exists(json_path):
+            return 0
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self.batch():
+            for key, value in data.items():
+                self[key_func(key) if key_func else key] = value
+        return len(data)
+
+
+def _parse(line):
+    """
+    The record on a complete journal line, or None if it is corrupt.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(record, dict) and "k" in record and ("v" in record or record.get("d")):
+        return record
+    return None
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_journal(path):
+    """
+    Replays the journal at 'path' into a dict without opening it for
+    writing, for readers in another process than the one that owns it.
+    A torn last line is ignored, not cut off; corrupt lines are skipped.
+    """
+    index = {}
+    if not os.path.exists(path):
+        return index
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            record = _parse(line)
+            if record is None:
+                continue
+            if record.get("d"):
+                index.pop(record["k"], None)
+            else:
+                index[record["k"]] = record["v"]
+    return index
@@ -1,10 +1,20 @@
 import os
 import json
 import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
 import requests
 from bs4 import BeautifulSoup
+from http_client import get_client
+from libgen_parser import parse_search_table
+from downloader import download_file
+from mirror_stats import MirrorStats
+from library_index import LibraryIndex
+from download_manager import DownloadManager, QUEUED, RESOLVING, DOWNLOADING, DONE
+from tk_tasks import TkTasks
+from virtual_list import VirtualList
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from io import BytesIO
 from PIL import Image, ImageTk
 
@@ -19,12 +29,56 @@ from PIL import Image, ImageTk
 LIBGEN_DOMAIN = "https://libgen.rs"
 
 SEARCH_URL = f"{LIBGEN_DOMAIN}/search.php"
+SEARCH_PAGE_SIZE = 25  # rows per LibGen result page (25, 50 or 100)
+LOAD_MORE_AT = 0.9     # fetch the next page once the view is scrolled this far
+RESULT_ROW_HEIGHT = 52 # pixels per result row (two lines of text + padding)
 BOOKS_DIR = os.path.join(os.path.expanduser("~"), "AlexandriaPy")  # local storage directory
 
+# Per-mirror-host latency/failure history, used to pick the fastest mirror first
+MIRROR_STATS = MirrorStats(os.path.join(BOOKS_DIR, "mirror_stats.json"))
+
+# Full-text index of the downloaded books (see get_library_index)
+_library_index = None
+_library_index_lock = threading.Lock()
+
 # --------------------------------------------------------------------
 # 1) Searching LibGen
 # --------------------------------------------------------------------
-def search_libgen(query, limit=50):
+def get_library_index():
+    """
+    Index of the books already downloaded into BOOKS_DIR, opened and
+    brought up to date once per process. Safe to call from any thread.
+    """
+    global _library_index
+    if _library_index is None:
+        with _library_index_lock:
+            if _library_index is None:
+                index = LibraryIndex(BOOKS_DIR)
+                index.refresh()
+                _library_index = index
+    return _library_index
+
+
+def search_local(query, limit=50):
+    """
+    Downloaded books matching 'query' (records carry a 'local_path').
+    """
+    try:
+        return get_library_index().search(query, limit)
+    except Exception as e:
+        print("[ERROR] Local search failed:", e)
+        return []
+
+
+def merge_results(local, remote):
+    """
+    Local hits first, then network results that aren't already downloaded.
+    """
+    local_ids = {book.get("id") for book in local}
+    return local + [book for book in remote if book.get("id") not in local_ids]
+
+
+def search_libgen(query, limit=50, local_first=False):
     """
     Searches LibGen for 'query' and returns up to 'limit' results (default=50).
     Returns a list of dictionaries like:
@@ -34,63 +88,65 @@ def search_libgen(query, limit=50):
           'extension': ..., 'size': ..., 'mirror1': ..., 'mirror2': ...
         }, ...
       ]
+    With local_first, books already in the local library come first
+    (with 'local_path' set), followed by the network results, still up
+    to 'limit' in total.
     """
-    try:
-        resp = requests.get(
-            SEARCH_URL,
-            params={"req": query, "res": limit},
-            timeout=10
-        )
-        resp.raise_for_status()
-    except requests.RequestException as e:
-        print("[ERROR] Search failed:", e)
-        return []
+    if local_first:
+        return merge_results(search_local(query, limit), search_libgen(query, limit))[:limit]
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    tables = soup.find_all("table")
-    if len(tables) < 3:
-        return []
+    return next(iter_search_pages(query, page_size=limit, max_pages=1), [])
 
-    # The 3rd table (index=2) typically contains search results
-    result_table = tables[2]
-    rows = result_table.find_all("tr")
-    if not rows:
-        return []
 
-    books = []
-    # Skip the header row (index 0)
-    for row in rows[1:]:
-        cols = row.find_all("td")
-        if len(cols) < 11:
-            continue
-
-        # mirror1 => cols[9], mirror2 => cols[10]
-        mirror1_tag = cols[9].find("a")
-        mirror2_tag = cols[10].find("a")
-
-        mirror1 = mirror1_tag["href"] if mirror1_tag else None
-        mirror2 = mirror2_tag["href"] if mirror2_tag else None
-
-        # Ensure full URL if missing scheme
-        mirror1 = fix_url(mirror1)
-        mirror2 = fix_url(mirror2)
-
-        book = {
-            "id":         cols[0].get_text(strip=True),
-            "author":     cols[1].get_text(strip=True),
-            "title":      cols[2].get_text(strip=True),
-            "publisher":  cols[3].get_text(strip=True),
-            "year":       cols[4].get_text(strip=True),
-            "pages":      cols[5].get_text(strip=True),
-            "language":   cols[6].get_text(strip=True),
-            "size":       cols[7].get_text(strip=True),
-            "extension":  cols[8].get_text(strip=True),
-            "mirror1":    mirror1,
-            "mirror2":    mirror2
-        }
-        books.append(book)
-
-    return books
+def iter_search_pages(query, page_size=25, max_pages=None):
+    """
+    Walks LibGen result pages for 'query' lazily, yielding one parsed page
+    (a list of book dicts, see search_libgen) at a time. The next page is
+    only requested when the caller asks for it. Stops at the first short
+    page, a page with nothing new, a request error, or after 'max_pages'.
+    """
+    seen_ids = set()
+    page = 1
+    while max_pages is None or page <= max_pages:
+        try:
+            resp = get_client().get(
+                SEARCH_URL,
+                params={"req": query, "res": page_size, "page": page},
+                timeout=10
+            )
+            resp.raise_for_status()
+        except requests.RequestException as e:
+            print("[ERROR] Search failed:", e)
+            return
+
+        books = parse_search_page(resp.text)
+        # Pages can shift while we walk them; don't repeat a book
+        fresh = [book for book in books if book["id"] not in seen_ids]
+        seen_ids.update(book["id"] for book in fresh)
+        if not fresh:
+            return
+        yield fresh
+        if len(books) < page_size:
+            return
+        page += 1
+
+
+def iter_search_libgen(query, page_size=25, max_pages=None):
+    """
+    Generator version of search_libgen: yields book dicts as each result
+    page is parsed, fetching further pages on demand.
+    """
+    for books in iter_search_pages(query, page_size, max_pages):
+        yield from books
+
+
+def parse_search_page(html):
+    """
+    Parses one LibGen search result page into a list of book dicts.
+    Only the results table (the 3rd <table>) is tokenized; see
+    libgen_parser.parse_search_table.
+    """
+    return parse_search_table(html, fix_url)
 
 
 # --------------------------------------------------------------------
@@ -114,24 +170,12 @@ def fix_url(url):
 # --------------------------------------------------------------------
 # 3) Find the Final Download Link
 # --------------------------------------------------------------------
-def get_final_link(mirror_url):
+def parse_final_link(html):
     """
-    Replicates logic from the Node code:
-    1) GET the mirror page
-    2) Look for an <a> containing 'Cloudflare' or possibly 'GET'
-    3) Return that link as final
+    Looks for an <a> containing 'Cloudflare' or possibly 'GET' on a
+    mirror page and returns that link, or None.
     """
-    if not mirror_url:
-        return None
-
-    try:
-        resp = requests.get(mirror_url, timeout=10)
-        resp.raise_for_status()
-    except requests.RequestException as e:
-        print("[ERROR] Could not fetch mirror page:", e)
-        return None
-
-    soup = BeautifulSoup(resp.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
 
     # Attempt 1: find <a> containing text 'Cloudflare'
     link_cloudflare = soup.find("a", string=lambda s: s and "Cloudflare" in s)
@@ -146,34 +190,124 @@ def get_final_link(mirror_url):
     return None
 
 
+def get_final_link(mirror_url, cancel=None):
+    """
+    Replicates logic from the Node code:
+    1) GET the mirror page
+    2) Look for an <a> containing 'Cloudflare' or possibly 'GET'
+    3) Return that link as final
+    If the 'cancel' event gets set while the page is downloading, the
+    connection is dropped and None is returned.
+    """
+    try:
+        return _fetch_final_link(mirror_url, cancel)
+    except requests.RequestException as e:
+        print("[ERROR] Could not fetch mirror page:", e)
+        return None
+
+
+def _fetch_final_link(mirror_url, cancel=None):
+    # get_final_link without the error handling, so a race can tell a
+    # failed mirror from one it cancelled
+    if not mirror_url:
+        return None
+
+    with get_client().get(mirror_url, timeout=10, stream=True) as resp:
+        resp.raise_for_status()
+        chunks = []
+        for chunk in resp.iter_content(chunk_size=16384):
+            if cancel is not None and cancel.is_set():
+                return None
+            chunks.append(chunk)
+        html = b"".join(chunks).decode(resp.encoding or "utf-8", errors="replace")
+
+    return parse_final_link(html)
+
+
+def race_final_link(mirror_urls, stats=MIRROR_STATS):
+    """
+    Resolves 'mirror_urls' as a hedged race and returns the first usable
+    final link. The best-ranked mirror (by its host's latency/failure
+    history) starts alone; the next one only joins if it has not answered
+    within its host's usual latency (stats.hedge_delay) or has failed.
+    The slower requests are cancelled once a link is found. Completed
+    requests are recorded so later races start with the fastest host;
+    cancelled ones are not, as their time says nothing about the host.
+    """
+    mirrors = stats.rank([m for m in mirror_urls if m])
+    if not mirrors:
+        return None
+
+    cancel = threading.Event()
+
+    def attempt(url):
+        start = time.monotonic()
+        try:
+            link = _fetch_final_link(url, cancel)
+            failed = link is None and not cancel.is_set()
+        except Exception as e:
+            print("[ERROR] Mirror failed:", url, e)
+            link, failed = None, True
+        if link or failed:
+            stats.record(url, time.monotonic() - start, ok=not failed)
+        return link
+
+    pool = ThreadPoolExecutor(max_workers=len(mirrors))
+    try:
+        pending = {pool.submit(attempt, mirrors[0])}
+        launched = 1
+        while pending:
+            delay = stats.hedge_delay(mirrors[launched - 1]) if launched < len(mirrors) else None
+            done, pending = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            for future in done:
+                link = future.result()
+                if link:
+                    return link
+            # Nothing yet: the last mirror started is slow or has failed
+            if launched < len(mirrors):
+                pending.add(pool.submit(attempt, mirrors[launched]))
+                launched += 1
+        return None
+    finally:
+        cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 # --------------------------------------------------------------------
-# 4) Download a File with Progress
+# 4) Local Folder for a Book
 # --------------------------------------------------------------------
-def download_file(url, out_path, progress_callback=None):
+def resolve_book_link(book):
     """
-    Streams the file from 'url' to 'out_path'.
-    'progress_callback(downloaded_bytes, total_bytes)' if provided.
+    Final download link for a search_libgen record, racing mirror1 and mirror2.
     """
-    try:
-        with requests.get(url, stream=True, timeout=20) as r:
-            r.raise_for_status()
-            total_size = r.headers.get("Content-Length")
-            total_size = int(total_size) if total_size else None
-
-            downloaded = 0
-            chunk_size = 8192
-
-            with open(out_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=chunk_size):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if progress_callback:
-                            progress_callback(downloaded, total_size)
-    except Exception as e:
-        print("[ERROR]", e)
-        if progress_callback:
-            progress_callback(-1, -1)  # indicates failure
+    return race_final_link([book.get("mirror1"), book.get("mirror2")])
+
+
+def prepare_book_dir(book):
+    """
+    Creates BOOKS_DIR/"Title - Author", saves the record as metadata.json
+    next to the book and returns the path the file should be written to.
+    """
+    title_sanitized = "".join(c for c in book["title"] if c.isalnum() or c in " .-_")
+    author_sanitized = "".join(c for c in book["author"] if c.isalnum() or c in " .-_")
+    folder_name = f"{title_sanitized}"
+    if author_sanitized:
+        folder_name += f" - {author_sanitized}"
+
+    book_dir = os.path.join(BOOKS_DIR, folder_name.strip())
+    if not os.path.exists(book_dir):
+        os.makedirs(book_dir)
+
+    # Name the file: "Title.extension"
+    ext = book["extension"].lower() or "pdf"
+    file_name = f"{title_sanitized}.{ext}"
+    out_path = os.path.join(book_dir, file_name)
+
+    metadata_path = os.path.join(book_dir, "metadata.json")
+    with open(metadata_path, "w", encoding="utf-8") as f:
+        json.dump(book, f, indent=2)
+
+    return out_path
 
 
 # --------------------------------------------------------------------
@@ -212,24 +346,11 @@ class LibgenApp(tk.Tk):
         self.search_button = ttk.Button(top_frame, text="Search", command=self.on_search_click)
         self.search_button.pack(side="left", padx=5)
 
-        # Main frame for results listing
-        self.results_frame = ttk.Frame(self)
-        self.results_frame.pack(fill="both", expand=True, padx=10, pady=5)
-
-        # Scrollable area
-        self.canvas = tk.Canvas(self.results_frame, highlightthickness=0)
-        self.scrollbar = ttk.Scrollbar(self.results_frame, orient="vertical", command=self.canvas.yview)
-        self.results_inner = ttk.Frame(self.canvas)
-
-        self.results_inner.bind("<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
-
-        self.canvas.create_window((0, 0), window=self.results_inner, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-
-        self.canvas.pack(side="left", fill="both", expand=True)
-        self.scrollbar.pack(side="right", fill="y")
+        # Results listing: only the rows in view have widgets, so thousands
+        # of results scroll as fast as ten
+        self.result_list = VirtualList(self, RESULT_ROW_HEIGHT, self.make_result_row, self.bind_result_row,
+                                       on_view_change=self.on_results_scroll)
+        self.result_list.pack(fill="both", expand=True, padx=10, pady=5)
 
         # Progress label & bar at bottom
         self.progress_label = ttk.Label(self, text="")
@@ -242,7 +363,20 @@ class LibgenApp(tk.Tk):
         if not os.path.exists(BOOKS_DIR):
             os.makedirs(BOOKS_DIR)
 
-        self.current_download_thread = None
+        # Search state: rows shown so far and the lazy page generator
+        self.local_ids = set()
+        self.result_pages = None
+        self.search_query = None
+        self._more_scheduled = False
+
+        # Searches and page loads run off the Tk thread; a new search
+        # makes the previous one's results stale
+        self.tasks = TkTasks(self)
+
+        # Queued/concurrent downloads are limited and tracked by the manager
+        self._refresh_pending = False
+        self.download_manager = DownloadManager(on_update=self.on_job_update)
+        self.download_manager.start()
 
     # ----------------------------------------------------------------
     # Search
@@ -253,95 +387,135 @@ class LibgenApp(tk.Tk):
             messagebox.showwarning("Warning", "Please enter a search term.")
             return
 
-        # Clear old results
-        for widget in self.results_inner.winfo_children():
-            widget.destroy()
-
-        results = search_libgen(query, limit=50)
-        if not results:
-            ttk.Label(self.results_inner, text="No results found.").pack(pady=10)
+        if query == self.search_query and (self.tasks.busy("search") or self.tasks.busy("page")):
+            return  # same search still loading; don't start it twice
+
+        self.search_query = query
+        self.clear_results()
+        self.tasks.cancel("page")
+        pages = iter_search_pages(query, page_size=SEARCH_PAGE_SIZE)
+        self.result_pages = None  # set once the local results are shown
+        self.progress_label.config(text=f"Searching for '{query}' ...")
+
+        # Books already on disk show up first, before the network search
+        self.tasks.submit("search", search_local, query, key=query,
+                          on_done=lambda local: self.on_local_results(pages, local),
+                          on_error=self.on_search_error)
+
+    def on_local_results(self, pages, local):
+        self.local_ids = {book.get("id") for book in local}
+        self.append_rows(local)
+        self.result_pages = pages
+        # First network page now; later pages as the user scrolls down
+        self.load_next_page()
+
+    def on_search_error(self, error):
+        self.progress_label.config(text="")
+        messagebox.showerror("Error", f"Search failed:\n{error}")
+
+    def load_next_page(self):
+        pages = self.result_pages
+        if pages is None:
             return
-
-        # Show up to 10 results
-        for i, book in enumerate(results[:10], start=1):
-            row_frame = ttk.Frame(self.results_inner)
-            row_frame.pack(fill="x", pady=5, padx=5)
-
-            text_str = (
-                f"{i}. {book['title']}\n"
-                f"Author: {book['author']} | Year: {book['year']} | "
-                f"Ext: {book['extension']} | Size: {book['size']}"
-            )
-            label = ttk.Label(row_frame, text=text_str, justify="left")
-            label.pack(side="left", expand=True, fill="x")
-
-            download_btn = ttk.Button(
-                row_frame,
-                text="Download",
-                command=lambda b=book: self.start_download_flow(b)
-            )
-            download_btn.pack(side="right", padx=5)
+        # key=pages: while a page of this search is loading, further
+        # scroll events don't queue more next() calls
+        self.tasks.submit("page", next, pages, None, key=pages,
+                          on_done=lambda books: self.on_page_loaded(pages, books),
+                          on_error=self.on_search_error)
+
+    def on_page_loaded(self, pages, books):
+        if pages is not self.result_pages:
+            return
+        self.progress_label.config(text="")
+        if books is None:
+            self.result_pages = None
+            if not self.result_list.items:
+                self.result_list.show_message("No results found.")
+            return
+        self.append_rows([book for book in books if book.get("id") not in self.local_ids])
+
+    def on_results_scroll(self, first, last):
+        if self.result_pages is not None and float(last) >= LOAD_MORE_AT and not self._more_scheduled:
+            self._more_scheduled = True
+            self.after_idle(self.load_more)
+
+    def load_more(self):
+        self._more_scheduled = False
+        self.load_next_page()
+
+    def clear_results(self):
+        self.result_list.clear()
+
+    def append_rows(self, books):
+        self.result_list.extend(books)
+
+    def make_result_row(self, parent):
+        row_frame = ttk.Frame(parent, padding=(5, 5))
+        row_frame.label = ttk.Label(row_frame, justify="left")
+        row_frame.label.pack(side="left", expand=True, fill="x")
+        row_frame.download_btn = ttk.Button(row_frame, text="Download")
+        row_frame.download_btn.pack(side="right", padx=5)
+        return row_frame
+
+    def bind_result_row(self, row_frame, book, index):
+        text_str = (
+            f"{index + 1}. {book['title']}\n"
+            f"Author: {book['author']} | Year: {book['year']} | "
+            f"Ext: {book['extension']} | Size: {book['size']}"
+        )
+        if book.get("local_path"):
+            text_str += " | Downloaded"
+        row_frame.label.config(text=text_str)
+        row_frame.download_btn.config(command=lambda b=book: self.start_download_flow(b))
 
     # ----------------------------------------------------------------
     # Download Flow
     # ----------------------------------------------------------------
     def start_download_flow(self, book):
-        mirror = book.get("mirror1") or book.get("mirror2")
-        if not mirror:
+        if not (book.get("mirror1") or book.get("mirror2")):
             messagebox.showerror("Error", "No mirror link found.")
             return
-
-        def worker():
-            # 1) final link
-            final_url = get_final_link(mirror)
-            if not final_url:
-                self.update_progress_text("Could not find final link.")
-                return
-
-            # 2) Build local folder: "Title - Author"
-            title_sanitized = "".join(c for c in book["title"] if c.isalnum() or c in " .-_")
-            author_sanitized = "".join(c for c in book["author"] if c.isalnum() or c in " .-_")
-            folder_name = f"{title_sanitized}"
-            if author_sanitized:
-                folder_name += f" - {author_sanitized}"
-
-            book_dir = os.path.join(BOOKS_DIR, folder_name.strip())
-            if not os.path.exists(book_dir):
-                os.makedirs(book_dir)
-
-            # 3) Name the file: "Title.extension"
-            ext = book["extension"].lower() or "pdf"
-            file_name = f"{title_sanitized}.{ext}"
-            out_path = os.path.join(book_dir, file_name)
-
-            # 4) Save metadata
-            metadata_path = os.path.join(book_dir, "metadata.json")
-            with open(metadata_path, "w", encoding="utf-8") as f:
-                json.dump(book, f, indent=2)
-
-            # 5) Download in chunks
-            self.update_progress_text(f"Downloading {file_name} ...")
-            self.set_progress_bar(0)
-
-            def progress_callback(downloaded, total_size):
-                if downloaded == -1:
-                    # indicates error
-                    self.update_progress_text("Download failed.")
-                    self.set_progress_bar(0)
-                    return
-                if total_size and total_size > 0:
-                    pct = int((downloaded / total_size) * 100)
-                    self.set_progress_bar(pct)
-                    self.update_progress_text(f"Downloading {file_name} ... {pct}%")
+        self.download_manager.submit(book)
+
+    def on_job_update(self, job):
+        if job.state == DONE:
+            get_library_index().add_book_dir(os.path.dirname(job.out_path))
+
+        # Called from download threads for every chunk; coalesce into one
+        # refresh on the Tk thread every 100 ms.
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after(100, self.refresh_download_progress)
+
+    def refresh_download_progress(self):
+        self._refresh_pending = False
+        active = [j for j in self.download_manager.jobs if j.state in (QUEUED, RESOLVING, DOWNLOADING)]
+        if not active:
+            finished = [j for j in self.download_manager.jobs if j.finished_at]
+            if finished:
+                last = max(finished, key=lambda j: j.finished_at)
+                if last.state == DONE:
+                    self.progress_label.config(text=f"Download complete: {os.path.basename(last.out_path)}")
+                    self.progress_bar["value"] = 100
                 else:
-                    self.update_progress_text(f"Downloading {file_name} ... {downloaded} bytes")
-
-            download_file(final_url, out_path, progress_callback=progress_callback)
-            self.update_progress_text(f"Download complete: {file_name}")
+                    self.progress_label.config(text=last.error or "Download failed.")
+                    self.progress_bar["value"] = 0
+            return
 
-        t = threading.Thread(target=worker, daemon=True)
-        t.start()
-        self.current_download_thread = t
+        downloading = [j for j in active if j.state == DOWNLOADING]
+        done = sum(j.downloaded for j in downloading)
+        total = sum(j.total or 0 for j in downloading)
+        rate = self.download_manager.stats()["throughput"] / 1e6
+        if total:
+            pct = int((done / total) * 100)
+            self.progress_bar["value"] = pct
+            self.progress_label.config(
+                text=f"Downloading {len(downloading)} of {len(active)} queued ... {pct}% ({rate:.1f} MB/s)")
+        elif downloading:
+            self.progress_label.config(
+                text=f"Downloading {len(downloading)} of {len(active)} queued ... {done} bytes")
+        else:
+            self.progress_label.config(text=f"Resolving links for {len(active)} queued ...")
 
     # ----------------------------------------------------------------
     # Progress Helpers
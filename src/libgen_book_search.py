@@ -1,38 +1,72 @@
 import requests
-import re
 import webbrowser
-import certifi
-import subprocess
-import json
-import os
-from bs4 import BeautifulSoup as bs
+from http_client import get_client
+from downloader import download_file
+from search_cache import SearchCache
+from cache_keys import search_key
+from libgen_parser import parse_search_results, parse_libgen_li_link, parse_get_link
 
-CACHE_FILE = 'libgen_cache.json'
+CACHE_FILE = 'libgen_cache.json'  # old whole-file JSON cache, imported once
+CACHE_DB = 'libgen_cache.sqlite3'
+SEARCH_URL = 'https://libgen.is/search.php'
+
+_cache = None
 
 def load_cache():
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, 'r') as file:
-            return json.load(file)
-    return {}
+    global _cache
+    if _cache is None:
+        _cache = SearchCache(CACHE_DB)
+        imported = _cache.import_json(CACHE_FILE, key_func=search_key)
+        if imported:
+            print(f"Imported {imported} cached searches from {CACHE_FILE}")
+    return _cache
+
+def fetch_search_metadata(book_name):
+    """
+    Fetches the LibGen search page for 'book_name' and parses it in-process
+    (same fields as the old cheerio_script.js output).
+    """
+    response = get_client().get(SEARCH_URL, params={
+        'req': book_name,
+        'lg_topic': 'libgen',
+        'open': 0,
+        'view': 'simple',
+        'res': 25,
+        'phrase': 1,
+        'column': 'def'
+    })
+    response.raise_for_status()
+    return parse_search_results(response.text)
+
+def fetch_download_info(link):
+    """
+    Follows the book page to its libgen.li mirror and returns
+    {'downloadLink': ...} or {'error': ...}, like cheerio_download.js did.
+    """
+    response = get_client().get(link)
+    response.raise_for_status()
+    libgen_li_link = parse_libgen_li_link(response.text)
+    if not libgen_li_link:
+        return {'error': 'libgen.li link not found'}
 
-def save_cache(cache):
-    with open(CACHE_FILE, 'w') as file:
-        json.dump(cache, file, indent=4)
+    libgen_li_response = get_client().get(libgen_li_link)
+    libgen_li_response.raise_for_status()
+    download_link = parse_get_link(libgen_li_response.text)
+    if not download_link:
+        return {'error': 'Download link not found'}
+    return {'downloadLink': download_link}
 
 def search_library_genesis(book_name):
     cache = load_cache()
-    if book_name in cache:
+    key = search_key(book_name)
+    cached = cache.get(key)
+    if cached is not None:
         print(f"Found cached data for: {book_name}")
-        return cache[book_name]
+        return cached
 
     try:
         print(f"Searching Library Genesis for: {book_name}")
-        result = subprocess.run(['node', 'cheerio_script.js', book_name], capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"Error running Node.js script: {result.stderr}")
-            return []
-
-        book_metadata = json.loads(result.stdout)
+        book_metadata = fetch_search_metadata(book_name)
         print(f"Found {len(book_metadata)} books in Library Genesis search results.")
         
         # Limit to the first 10 results
@@ -49,8 +83,7 @@ def search_library_genesis(book_name):
             print("link: ", metadata['link'])
             print("*" * 50)
         
-        cache[book_name] = book_metadata
-        save_cache(cache)
+        cache.set(key, book_metadata)
         
         return book_metadata
     
@@ -69,19 +102,10 @@ def get_download_book(book_metadata, open_browser=False):
             link = f'https://libgen.is/{book["link"]}'
             
             print(f"Fetching GET link from: {link}")
-            result = subprocess.run(['node', 'cheerio_download.js', link], capture_output=True, text=True)
-            print(f"Subprocess stdout: {result.stdout}")
-            print(f"Subprocess stderr: {result.stderr}")
-            print(f"Subprocess return code: {result.returncode}")
-            if result.returncode != 0:
-                print(f"Error running Node.js script: {result.stderr}")
-                continue
-
             try:
-                download_info = json.loads(result.stdout.strip())
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON: {e}")
-                print(f"Subprocess stdout: {result.stdout}")
+                download_info = fetch_download_info(link)
+            except requests.exceptions.RequestException as e:
+                print(f"Error fetching download links: {e}")
                 continue
 
             if 'error' in download_info:
@@ -95,20 +119,14 @@ def get_download_book(book_metadata, open_browser=False):
             if open_browser:
                 webbrowser.open(final_download_link)
             else:
-                # Automatically download the book
-                download_response = requests.get(final_download_link, stream=True)
-                download_response.raise_for_status()
-                
-                # Extract filename from content-disposition header
-                print("HERE")
+                # Automatically download the book (resumes an interrupted .part file)
                 filename = book['title'] + '.pdf'
                 print("filename: ", filename)
                 file_path = f'../assets/{filename}'
-                # Save the file
-                with open(file_path, 'wb') as f:
-                    for chunk in download_response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                print(f"Book downloaded successfully: {filename}")
+                if download_file(final_download_link, file_path):
+                    print(f"Book downloaded successfully: {filename}")
+                else:
+                    print(f"Download interrupted, run again to resume: {filename}")
     
     except requests.exceptions.RequestException as e:
         print(f"Error fetching download page: {e}")
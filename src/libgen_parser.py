@@ -0,0 +1,604 @@
+import re
+from html import unescape
+from html.entities import html5
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:  # only needed by parse_book_details
+    etree = None
+
+# --------------------------------------------------------------------
+# In-process replacement for cheerio_script.js / cheerio_download.js.
+#
+# Builds a small element tree with the standard library HTMLParser and
+# applies the same selectors the Node scripts use, so callers no longer
+# need to spawn `node` for every search or download lookup.
+# --------------------------------------------------------------------
+
+# Elements that never have children
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+# bs4's get_text() leaves out strings inside these
+NON_TEXT_TAGS = {"script", "style", "template", "rt", "rp"}
+
+# bs4's named entity table: html5 names, with or without the ';'
+SOUP_ENTITIES = {name.rstrip(";"): char for name, char in html5.items()}
+_SOUP_CHARREF = {10: re.compile("^([0-9]+)(.*)"), 16: re.compile("^([0-9a-f]+)(.*)")}
+
+# Opening one of these implicitly closes an open element of the same
+# family, the way browsers (and cheerio's parse5) treat table markup.
+IMPLIED_END = {
+    "td": ({"td", "th"}, {"tr", "table"}),
+    "th": ({"td", "th"}, {"tr", "table"}),
+    "tr": ({"td", "th", "tr"}, {"table"}),
+    "li": ({"li"}, {"ul", "ol"}),
+    "option": ({"option"}, {"select"}),
+    "a": ({"a"}, set()),
+    "p": ({"p"}, {"td", "th", "div"}),
+}
+
+
+class Element:
+    """
+    Minimal DOM node: tag name, attribute dict and a list of children
+    (either Element instances or text strings).
+    """
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.children = []
+        self.parent = parent
+
+    def get(self, name, default=None):
+        return self.attrs.get(name, default)
+
+    def iter(self, tag=None):
+        """
+        Yields descendant elements in document order (not including self).
+        """
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                continue
+            if tag is None or node.tag == tag:
+                yield node
+            stack.extend(reversed(node.children))
+
+    def find_all(self, tag):
+        return list(self.iter(tag))
+
+    def find(self, tag):
+        return next(self.iter(tag), None)
+
+    def text(self):
+        """
+        Concatenated text of all descendant text nodes (like textContent).
+        """
+        parts = []
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+            else:
+                stack.extend(reversed(node.children))
+        return "".join(parts)
+
+    def get_text_strip(self):
+        """
+        Same as BeautifulSoup's get_text(strip=True): every text node
+        stripped and joined, skipping script/style/template contents.
+        """
+        parts = []
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node.strip())
+            elif node.tag not in NON_TEXT_TAGS:
+                stack.extend(reversed(node.children))
+        return "".join(parts)
+
+    def has_ancestor(self, tag):
+        node = self.parent
+        while node is not None:
+            if node.tag == tag:
+                return True
+            node = node.parent
+        return False
+
+
+class TreeBuilder(HTMLParser):
+    """
+    Feeds HTML into an Element tree. With implied_end=True, table rows,
+    cells, list items and links are closed implicitly like a browser would.
+    """
+
+    def __init__(self, implied_end=True):
+        super().__init__(convert_charrefs=True)
+        self.implied_end = implied_end
+        self.root = Element("#document")
+        self.stack = [self.root]
+        self.stray_end_tags = 0
+
+    def _close_implied(self, tag):
+        closes, scope = IMPLIED_END[tag]
+        for i in range(len(self.stack) - 1, 0, -1):
+            open_tag = self.stack[i].tag
+            if open_tag in closes:
+                del self.stack[i:]
+                return
+            if open_tag in scope:
+                return
+
+    def handle_starttag(self, tag, attrs):
+        if self.implied_end and tag in IMPLIED_END:
+            self._close_implied(tag)
+        parent = self.stack[-1]
+        element = Element(tag, {k: (v if v is not None else "") for k, v in attrs}, parent)
+        parent.children.append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.stack[-1].tag == tag:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+        if len(self.stack) > 1:
+            self.stray_end_tags += 1  # unmatched inside an open element
+
+    def handle_data(self, data):
+        children = self.stack[-1].children
+        if children and isinstance(children[-1], str):
+            children[-1] += data  # keep one string per text run, like bs4
+        else:
+            children.append(data)
+
+
+def _soup_entityref(name):
+    """
+    Text for '&name;' the way bs4 decodes it: the entity, or the literal
+    '&name' (no ';') if it is not a known entity.
+    """
+    char = SOUP_ENTITIES.get(name)
+    return char if char is not None else "&" + name
+
+
+def _soup_charref(name):
+    """
+    Text for '&#name;' the way bs4 decodes it: invalid code points become
+    U+FFFD, C1 controls are read as Windows-1252, and anything after the
+    digits is kept as plain text.
+    """
+    base = 16 if name[:1] in ("x", "X") else 10
+    digits = name[1:] if base == 16 else name
+    extra = ""
+    try:
+        code = int(digits, base)
+    except ValueError:
+        match = _SOUP_CHARREF[base].search(digits)
+        if match is None:
+            return digits
+        code, extra = int(match.group(1), base), match.group(2)
+    if code == 0 or code > 0x10FFFF or 0xD800 <= code <= 0xDFFF:
+        return "\ufffd" + extra
+    if 0x80 <= code <= 0x9F:
+        try:
+            return bytes([code]).decode("cp1252") + extra
+        except UnicodeDecodeError:
+            pass
+    return chr(code) + extra
+
+
+class SoupTreeBuilder(TreeBuilder):
+    """
+    TreeBuilder with BeautifulSoup's html.parser rules: no implied end
+    tags, bs4's entity decoding, CDATA kept as text, and a new text node
+    after every tag, comment or declaration (get_text(strip=True) strips
+    each node on its own, so the boundaries matter).
+    """
+
+    def __init__(self):
+        HTMLParser.__init__(self, convert_charrefs=False)
+        self.implied_end = False
+        self.root = Element("#document")
+        self.stack = [self.root]
+        self.stray_end_tags = 0
+        self.text_open = False
+
+    def handle_starttag(self, tag, attrs):
+        self.text_open = False
+        super().handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self.text_open = False
+        super().handle_endtag(tag)
+
+    def handle_data(self, data):
+        children = self.stack[-1].children
+        if self.text_open and children and isinstance(children[-1], str):
+            children[-1] += data
+        else:
+            children.append(data)
+        self.text_open = True
+
+    def handle_entityref(self, name):
+        self.handle_data(_soup_entityref(name))
+
+    def handle_charref(self, name):
+        self.handle_data(_soup_charref(name))
+
+    def unknown_decl(self, data):
+        self.text_open = False
+        if data.upper().startswith("CDATA["):
+            self.stack[-1].children.append(data[6:])  # bs4's CData counts as text
+
+    def handle_comment(self, data):
+        self.text_open = False
+
+    def handle_decl(self, decl):
+        self.text_open = False
+
+    def handle_pi(self, data):
+        self.text_open = False
+
+
+def parse_html(html, implied_end=True):
+    """
+    Parses 'html' (str or bytes) and returns the document root Element.
+    implied_end=False builds the tree BeautifulSoup's html.parser would.
+    """
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    builder = TreeBuilder() if implied_end else SoupTreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+# --------------------------------------------------------------------
+# 1) Search results (cheerio_script.js)
+# --------------------------------------------------------------------
+def _cell_link_text(cell):
+    if cell is None:
+        return ""
+    return "".join(a.text() for a in cell.iter("a"))
+
+
+def parse_search_results(html):
+    """
+    Parses a libgen.is 'simple view' search page into the same list of
+    dicts cheerio_script.js prints:
+      [{'title', 'author', 'year', 'publisher', 'format', 'size', 'link'}, ...]
+    Like the Node script, the header row is included (it is also a
+    <tr valign="top">) and 'link' is omitted when the title cell has no <a>.
+    """
+    root = parse_html(html)
+    books = []
+    for tr in root.iter("tr"):
+        if tr.get("valign") != "top":
+            continue
+        cells = tr.find_all("td")
+
+        def cell(i):
+            return cells[i] if i < len(cells) else None
+
+        def cell_text(i):
+            c = cell(i)
+            return c.text().strip() if c is not None else ""
+
+        title_cell = cell(2)
+        link_tag = title_cell.find("a") if title_cell is not None else None
+
+        metadata = {
+            "title": _cell_link_text(title_cell).strip().lower(),
+            "author": _cell_link_text(cell(1)).strip().lower(),
+            "year": cell_text(4),
+            "publisher": cell_text(3),
+            "format": cell_text(8),
+            "size": cell_text(7),
+        }
+        if link_tag is not None and link_tag.get("href") is not None:
+            metadata["link"] = link_tag.get("href")
+        books.append(metadata)
+    return books
+
+
+# --------------------------------------------------------------------
+# 2) Download links (cheerio_download.js)
+# --------------------------------------------------------------------
+def parse_libgen_li_link(html):
+    """
+    Returns the first 'td a' href on a book detail page that points at
+    libgen.li, or None.
+    """
+    root = parse_html(html)
+    for a in root.iter("a"):
+        href = a.get("href")
+        if href and "libgen.li" in href and a.has_ancestor("td"):
+            return href
+    return None
+
+
+def parse_get_link(html):
+    """
+    Returns the href of the first 'td a' on a libgen.li page whose <h2>
+    text (all of them joined, like cheerio's .text()) reads 'GET', or None.
+    """
+    root = parse_html(html)
+    for a in root.iter("a"):
+        if not a.has_ancestor("td"):
+            continue
+        h2 = a.find("h2")
+        headings = a.find_all("h2")
+        if headings and "".join(h2.text() for h2 in headings).strip() == "GET":
+            return a.get("href")
+    return None
+
+
+# --------------------------------------------------------------------
+# 3) Targeted extraction for libgen.py / libgen_tk.py
+#
+# These return exactly what the BeautifulSoup versions did, but skip
+# building a soup for the whole page:
+# - parse_search_table steps over the tags before the 3rd <table> with a
+#   regex and only tokenizes that table (html.parser tree rules, no
+#   implied end tags). Plain markup is split into tags and text with one
+#   regex and fed to SoupTreeBuilder directly; anything that needs
+#   HTMLParser's special cases (comments, scripts, odd attribute syntax)
+#   goes through HTMLParser, and markup before the table that the regex
+#   cannot step over sends the whole page through it.
+# - parse_book_details walks an lxml tree directly.
+# --------------------------------------------------------------------
+FEED_CHUNK = 8192
+
+# A start tag, an end tag, or any other '<' (which sends the table to
+# HTMLParser). Unquoted attribute values must end at whitespace or '>',
+# so "href=a/>" is not mistaken for a self-closing tag.
+_NAME = r"[a-zA-Z][-.a-zA-Z0-9:_]*"
+_ATTR_VALUE = r"""(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`/]*(?=[\s>])))"""
+_ATTR = re.compile(rf"\s+({_NAME})(?:\s*=\s*{_ATTR_VALUE})?")
+_TAG = re.compile(rf"<(?:(?P<tag>{_NAME})(?P<attrs>(?:\s+{_NAME}(?:\s*=\s*{_ATTR_VALUE})?)*)\s*(?P<close>/?)>"
+                  rf"|/(?P<end>{_NAME})\s*>)|<")
+# Markup before the table that is skipped whole: comments, doctypes and
+# the content of script/style (HTMLParser's CDATA elements).
+_SKIP = re.compile(r"<!--.*?--\s*>|<!DOCTYPE\s[^<>]*>", re.IGNORECASE | re.DOTALL)
+_CDATA_END = {tag: re.compile(rf"</\s*{tag}\s*>", re.IGNORECASE) for tag in ("script", "style")}
+# Elements whose content HTMLParser does not tokenize as markup
+# A character reference HTMLParser would hand to handle_charref/entityref
+_REF = re.compile(r"&(?:#([0-9]+|[xX][0-9a-fA-F]+)|([a-zA-Z][-.a-zA-Z0-9]*));")
+RAW_TEXT_TAGS = {"script", "style", "textarea", "title", "xmp", "iframe", "noembed", "noframes", "noscript",
+                 "plaintext"}
+
+
+def _nth_table_offset(html, n):
+    """
+    Offset of the n-th <table> start tag, found by stepping over whole
+    tags so '<table' inside an attribute value or a comment is not
+    counted. None if there is no such table, -1 if the markup before it
+    is not plain enough to tell without a full parse.
+    """
+    count = 0
+    pos = html.find("<")
+    while pos >= 0:
+        skip = _SKIP.match(html, pos)
+        if skip:
+            pos = html.find("<", skip.end())
+            continue
+        match = _TAG.match(html, pos)
+        tag = match.group("tag")
+        if not tag and not match.group("end"):
+            return -1
+        end = match.end()
+        if tag:
+            tag = tag.lower()
+            if tag == "table":
+                if count == n:
+                    return pos
+                count += 1
+            elif tag in _CDATA_END and not match.group("close"):
+                close = _CDATA_END[tag].search(html, end)
+                if close is None:
+                    return -1
+                end = close.end()
+        pos = html.find("<", end)
+    return None
+
+
+def _soup_ref(match):
+    number, name = match.groups()
+    return _soup_charref(number) if number is not None else _soup_entityref(name)
+
+
+def _scan_table(html, offset):
+    """
+    The <table> starting at 'offset', built from a regex split into tags
+    and text; the same tree HTMLParser + TreeBuilder would give. None if
+    the table holds markup only HTMLParser handles, has an end tag that
+    could close something outside it, or is never closed.
+    """
+    builder = SoupTreeBuilder()
+    pos = offset
+    for match in _TAG.finditer(html, offset):
+        start = match.start()
+        if start > pos:
+            text = html[pos:start]
+            if "&" in text:
+                if text.count("&") != len(_REF.findall(text)):
+                    return None  # '&' without a terminated reference
+                text = _REF.sub(_soup_ref, text)
+            builder.handle_data(text)
+        pos = match.end()
+        tag, attr_text, self_closing, end_tag = match.group("tag", "attrs", "close", "end")
+        if end_tag:
+            builder.handle_endtag(end_tag.lower())
+            if builder.stray_end_tags:
+                return None
+            if len(builder.stack) == 1:
+                return builder.root.children[0]
+        elif tag:
+            tag = tag.lower()
+            if tag in RAW_TEXT_TAGS:
+                return None
+            attrs = []
+            for attr in _ATTR.finditer(attr_text) if attr_text else ():
+                name, double, single, bare = attr.groups()
+                value = double if double is not None else single if single is not None else bare
+                if value and "&" in value:
+                    value = unescape(value)
+                attrs.append((name.lower(), value))
+            if self_closing:
+                builder.handle_startendtag(tag, attrs)
+            else:
+                builder.handle_starttag(tag, attrs)
+        else:
+            return None
+    return None
+
+
+def _nth_table(html, n):
+    """
+    The n-th <table> (document order, 0-based) as an Element, parsed with
+    html.parser tree rules. Only the table itself is tokenized unless it
+    contains an end tag that could close something outside it; then the
+    whole document is parsed so the result matches a full parse.
+    """
+    offset = _nth_table_offset(html, n)
+    if offset is None:
+        return None
+    if offset >= 0:
+        table = _scan_table(html, offset)
+        if table is not None:
+            return table
+    else:
+        tables = parse_html(html, implied_end=False).find_all("table")
+        return tables[n] if len(tables) > n else None
+
+    builder = SoupTreeBuilder()
+    pos = offset
+    while pos < len(html):
+        builder.feed(html[pos:pos + FEED_CHUNK])
+        pos += FEED_CHUNK
+        if builder.stray_end_tags:
+            break
+        if builder.root.children and len(builder.stack) == 1:
+            break  # the table is closed
+    else:
+        builder.close()
+
+    if not builder.stray_end_tags:
+        return builder.root.find("table")
+
+    tables = parse_html(html, implied_end=False).find_all("table")
+    return tables[n] if len(tables) > n else None
+
+
+def parse_search_table(html, fix_url=lambda url: url):
+    """
+    Fast equivalent of libgen.search_libgen's BeautifulSoup parsing: rows
+    of the 3rd table with at least 11 cells, as book dicts. 'fix_url' is
+    applied to the mirror links.
+    """
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    result_table = _nth_table(html, 2)
+    if result_table is None:
+        return []
+
+    rows = result_table.find_all("tr")
+    books = []
+    # Skip the header row (index 0)
+    for row in rows[1:]:
+        cols = row.find_all("td")
+        if len(cols) < 11:
+            continue
+
+        mirror1_tag = cols[9].find("a")
+        mirror2_tag = cols[10].find("a")
+        mirror1 = fix_url(mirror1_tag.attrs["href"] if mirror1_tag else None)
+        mirror2 = fix_url(mirror2_tag.attrs["href"] if mirror2_tag else None)
+
+        books.append({
+            "id":         cols[0].get_text_strip(),
+            "author":     cols[1].get_text_strip(),
+            "title":      cols[2].get_text_strip(),
+            "publisher":  cols[3].get_text_strip(),
+            "year":       cols[4].get_text_strip(),
+            "pages":      cols[5].get_text_strip(),
+            "language":   cols[6].get_text_strip(),
+            "size":       cols[7].get_text_strip(),
+            "extension":  cols[8].get_text_strip(),
+            "mirror1":    mirror1,
+            "mirror2":    mirror2
+        })
+    return books
+
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w-]+)""", re.IGNORECASE)
+
+
+def _decode(content):
+    """
+    Bytes -> str the way BeautifulSoup guesses: declared charset, then
+    UTF-8, then Windows-1252.
+    """
+    match = _META_CHARSET.search(content[:4096])
+    candidates = ([match.group(1).decode("ascii")] if match else []) + ["utf-8", "windows-1252"]
+    for encoding in candidates:
+        try:
+            return content.decode(encoding)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return content.decode("utf-8", errors="replace")
+
+
+def _lxml_text_strip(element):
+    return "".join(t.strip() for t in element.xpath(
+        ".//text()[not(ancestor::script or ancestor::style or ancestor::template"
+        " or ancestor::rt or ancestor::rp)]"))
+
+
+def parse_book_details(html, base_url="https://libgen.is/"):
+    """
+    Fast equivalent of libgen_tk.fetch_book_details' parsing: every <tr>
+    with exactly two <td> descendants becomes 'key: value', plus
+    'cover_url' from the first <img> that has a src.
+    """
+    if etree is None:
+        raise ImportError("parse_book_details needs lxml")
+    if isinstance(html, bytes):
+        html = _decode(html)
+
+    root = etree.HTML(html) if html.strip() else None
+    metadata = {}
+    if root is None:
+        metadata["cover_url"] = None
+        return metadata
+
+    for row in root.iter("tr"):
+        cells = [cell for cell in row.iter("td") if cell is not row]
+        if len(cells) == 2:
+            metadata[_lxml_text_strip(cells[0])] = _lxml_text_strip(cells[1])
+
+    cover_url = None
+    for img in root.iter("img"):
+        cover_src = img.get("src")
+        if cover_src is not None:
+            cover_url = cover_src if cover_src.startswith("http") else f"{base_url}{cover_src}"
+            break
+
+    metadata["cover_url"] = cover_url
+    return metadata
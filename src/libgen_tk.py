@@ -1,12 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
-import requests
 import re
-import io
 import webbrowser
 from bs4 import BeautifulSoup as bs
-import certifi
+from http_client import get_client
+from libgen_parser import parse_book_details
+from tk_tasks import TkTasks
+from cover_cache import CoverCache
+from detail_cache import DetailCache, DetailPrefetcher, PREFETCH_BUDGET, PREFETCH_WORKERS
+from virtual_list import VirtualList
+
+COVER_SIZE = (300, 400)  # popup cover, aspect ratio kept
+PREFETCH_DELAY_MS = 150  # wait for scrolling to settle before prefetching
+RESULT_ROW_HEIGHT = 124  # pixels per result row (title, author, year, button)
 
 # ------------------------------------------------------------
 #                   DATA FETCHING FUNCTIONS
@@ -14,14 +20,14 @@ import certifi
 
 def fetch_libgen_results(book_name):
     """
-    Fetch top 10 results from Library Genesis based on the provided book_name.
+    Fetch the results on the first Library Genesis result page for book_name.
     """
     print(f"Searching Library Genesis for: {book_name}")
     search_url = (
         f"https://libgen.is/search.php?"
         f"req={book_name}&lg_topic=libgen&open=0&view=simple&res=25&phrase=1&column=def"
     )
-    response = requests.get(search_url, verify=certifi.where())
+    response = get_client().get(search_url)
     response.raise_for_status()
 
     soup = bs(response.content, "lxml")
@@ -30,7 +36,7 @@ def fetch_libgen_results(book_name):
     books_list = soup.find_all("tr", {"valign": "top"})
     results = []
     
-    for tr in books_list[:10]:  # Limit to top 10 results
+    for tr in books_list:  # the result list is virtualized, so no need to cap it
         try:
             # It's safer to get all <td> cells:
             cells = tr.find_all("td")
@@ -74,54 +80,65 @@ def fetch_book_details(book_link):
     try:
         url = f"https://libgen.is/{book_link}"
         print(f"Fetching book detail page: {url}")
-        response = requests.get(url, verify=certifi.where())
+        response = get_client().get(url)
         print("Response status:", response.status_code)
         print("Response:", response)
         response.raise_for_status()
 
-        soup = bs(response.content, "lxml")
-
-        # Parse metadata from <td> blocks in the info table
-        metadata = {}
-        # We look for table rows that might contain 'Author(s):', 'Title:', 'Publisher:', etc.
-        table_rows = soup.find_all("tr")
-        for row in table_rows:
-            cells = row.find_all("td")
-            if len(cells) == 2:
-                raw_key = cells[0].get_text()
-                raw_val = cells[1].get_text()
-                print(f"Raw key: {raw_key}, Raw value: {raw_val}")  # Print raw data
-                key = cells[0].get_text(strip=True)
-                val = cells[1].get_text(strip=True)
-                metadata[key] = val
-
-        # Attempt to find cover image
-        # Some pages have <img id="cover"> or just <img> with src in the same table
-        # We'll do a more general approach: search for the first <img> that has a 'src'
-        img_tag = soup.find("img", src=True)
-        if img_tag:
-            cover_src = img_tag["src"]
-            # Some cover_src might be an absolute URL or relative
-            if cover_src.startswith("http"):
-                cover_url = cover_src
-            else:
-                cover_url = f"https://libgen.is/{cover_src}"
-        else:
-            cover_url = None
-
-        metadata["cover_url"] = cover_url
-        return metadata
+        # Table rows with two cells ('Author(s):', 'Title:', ...) plus the
+        # first <img> with a src as the cover
+        return parse_book_details(response.content)
 
     except Exception as e:
         print(f"Error fetching book details: {e}")
         return None
 
+def fetch_book_popup_data(book_link, covers, metadata=None):
+    """
+    Everything the details popup needs, fetched off the Tk thread:
+    (metadata, cover) where cover is a thumbnailed PIL image or None.
+    Pass 'metadata' if it is already known to skip the detail page. The
+    cover comes from the CoverCache's disk tier when possible;
+    ImageTk.PhotoImage itself must be created on the Tk thread.
+    """
+    if metadata is None:
+        metadata = fetch_book_details(book_link)
+    if not metadata:
+        return None, None
+
+    cover = None
+    if metadata.get("cover_url"):
+        try:
+            cover = covers.load(metadata["cover_url"], COVER_SIZE)
+        except Exception as e:
+            print(f"Error loading cover image: {e}")
+    return metadata, cover
+
+def fetch_libgen_li_link(download_link):
+    """
+    Finds the 'Libgen.li' mirror link on a book's detail page, or None.
+    """
+    print(f"Fetching download page for book link: {download_link}")
+    link = f"https://libgen.is/{download_link}"
+    download_page = get_client().get(link)
+    download_page.raise_for_status()
+    down_soup = bs(download_page.content, "lxml")
+
+    # Locate a Libgen mirror link on the page - e.g. "Libgen.li"
+    td_list = down_soup.find_all("td", width="17%")
+    for td in td_list:
+        a = td.find("a", string=re.compile(r"Libgen\.li"))
+        if a and a.text.strip() == "Libgen.li":
+            print(f"Download link found: {a['href']}")
+            return a["href"]
+    return None
+
 # ------------------------------------------------------------
 #                    MAIN APPLICATION
 # ------------------------------------------------------------
 
 class LibraryGenesisApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, prefetch_budget=PREFETCH_BUDGET, prefetch_workers=PREFETCH_WORKERS):
         super().__init__()
         self.title("Library Genesis Search")
         self.geometry("800x600")
@@ -140,26 +157,30 @@ class LibraryGenesisApp(tk.Tk):
         search_button = tk.Button(top_frame, text="Search", command=self.search_books, font=("Arial", 12))
         search_button.pack(side=tk.LEFT)
 
-        # Frame for results
-        self.results_frame = tk.Frame(self)
-        self.results_frame.pack(fill=tk.BOTH, expand=True)
-
-        # Canvas + Scrollbar for the results
-        self.canvas = tk.Canvas(self.results_frame, bg="#fafafa")
-        self.scrollbar = tk.Scrollbar(self.results_frame, orient=tk.VERTICAL, command=self.canvas.yview)
-
-        self.scrollable_frame = tk.Frame(self.canvas)
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
-
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-
-        # Layout the canvas and scrollbar
-        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Results: a virtual list that only keeps widgets for the rows in
+        # view and recycles them while scrolling
+        self.result_list = VirtualList(self, RESULT_ROW_HEIGHT, self.make_result_row, self.bind_result_row,
+                                       on_view_change=self.on_results_scroll, canvas_options={"bg": "#fafafa"})
+        self.result_list.pack(fill=tk.BOTH, expand=True)
+
+        # Network I/O and parsing run on a small worker pool; a new search
+        # or details click makes the previous one's result stale
+        self.tasks = TkTasks(self)
+
+        # Covers: PhotoImages in memory, thumbnails on disk. Parsed detail
+        # pages: an expiring LRU keyed by the book's md5. After a search
+        # the top 'prefetch_budget' results, and later the rows scrolled
+        # into view, are fetched ahead of a click on a separate pool of
+        # 'prefetch_workers' so they never hold up a search or a click.
+        self.covers = CoverCache()
+        self.details = DetailCache()
+        self.prefetcher = DetailPrefetcher(self, self.fetch_popup_data, self.on_prefetched,
+                                           needs_fetch=self.needs_fetch, budget=prefetch_budget,
+                                           max_workers=prefetch_workers)
+        self._prefetch_pending = False
+
+    def set_busy(self, busy):
+        self.config(cursor="watch" if busy else "")
 
     # ------------------------------------------------------------
     #               SEARCH and DISPLAY RESULTS
@@ -167,7 +188,7 @@ class LibraryGenesisApp(tk.Tk):
 
     def search_books(self):
         """
-        Trigger the search and display the results in the scrollable frame.
+        Trigger the search and display the results in the result list.
         """
         book_name = self.search_var.get().strip()
         if not book_name:
@@ -176,62 +197,117 @@ class LibraryGenesisApp(tk.Tk):
 
         # Convert spaces to '+' for the search
         query = book_name.lower().replace(' ', '+')
-        try:
-            results = fetch_libgen_results(query)
-            self.display_results(results)
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while searching:\n{e}")
+        self.set_busy(True)
+        self.prefetcher.cancel()  # leave the bandwidth to the search
+        self.tasks.submit("search", fetch_libgen_results, query, key=query,
+                          on_done=self.display_results, on_error=self.on_search_error)
+
+    def on_search_error(self, error):
+        self.set_busy(False)
+        messagebox.showerror("Error", f"An error occurred while searching:\n{error}")
 
     def display_results(self, results):
         """
-        Clear the previous results and display the new list of books in scrollable_frame.
+        Replace the previous results with the new list of books.
         """
-        # Clear previous content
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+        self.set_busy(False)
+        self.prefetcher.cancel()
+        self.result_list.set_items(results)
 
         if not results:
-            no_results_label = tk.Label(
-                self.scrollable_frame, text="No Results Found.", font=("Arial", 14)
-            )
-            no_results_label.pack(pady=10)
+            self.result_list.show_message("No Results Found.")
             return
 
-        # Display each result
-        for book in results:
-            book_frame = tk.Frame(self.scrollable_frame, bd=1, relief=tk.RIDGE, padx=5, pady=5)
-            book_frame.pack(fill=tk.X, padx=10, pady=5)
-
-            # Title
-            title_label = tk.Label(
-                book_frame,
-                text=f"Title: {book['title']}",
-                font=("Arial", 12, "bold"),
-                anchor="w"
-            )
-            title_label.pack(fill=tk.X, pady=2)
-
-            # Author
-            author_label = tk.Label(
-                book_frame,
-                text=f"Author(s): {book['author']}",
-                font=("Arial", 10),
-                anchor="w"
-            )
-            author_label.pack(fill=tk.X, pady=2)
-
-            # Year
-            year_label = tk.Label(
-                book_frame,
-                text=f"Year: {book['year']}",
-                font=("Arial", 10),
-                anchor="w"
-            )
-            year_label.pack(fill=tk.X, pady=2)
-
-            # Details Button
-            detail_button = tk.Button(book_frame, text="Details", command=lambda b=book: self.open_book_popup(b))
-            detail_button.pack(side=tk.RIGHT, padx=5)
+        # Speculative: the top results are the likeliest to be opened.
+        # Only book pages; series/search links would waste the budget.
+        self.prefetcher.prefetch([book["download_link"] for book in results if "md5=" in book["download_link"]])
+        self.schedule_prefetch()
+
+    def make_result_row(self, parent):
+        """
+        One reusable result row; bind_result_row fills it for a book.
+        """
+        row = tk.Frame(parent, bg="#fafafa")
+        book_frame = tk.Frame(row, bd=1, relief=tk.RIDGE, padx=5, pady=5)
+        book_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        # Title
+        row.title_label = tk.Label(book_frame, font=("Arial", 12, "bold"), anchor="w")
+        row.title_label.pack(fill=tk.X, pady=2)
+
+        # Author
+        row.author_label = tk.Label(book_frame, font=("Arial", 10), anchor="w")
+        row.author_label.pack(fill=tk.X, pady=2)
+
+        # Year
+        row.year_label = tk.Label(book_frame, font=("Arial", 10), anchor="w")
+        row.year_label.pack(fill=tk.X, pady=2)
+
+        # Details Button
+        row.detail_button = tk.Button(book_frame, text="Details")
+        row.detail_button.pack(side=tk.RIGHT, padx=5)
+        return row
+
+    def bind_result_row(self, row, book, index):
+        row.title_label.config(text=f"Title: {book['title']}")
+        row.author_label.config(text=f"Author(s): {book['author']}")
+        row.year_label.config(text=f"Year: {book['year']}")
+        row.detail_button.config(command=lambda b=book: self.open_book_popup(b))
+
+    # ------------------------------------------------------------
+    #            COVER / DETAILS PREFETCH
+    # ------------------------------------------------------------
+
+    def on_results_scroll(self, first, last):
+        self.schedule_prefetch()
+
+    def schedule_prefetch(self):
+        if not self._prefetch_pending:
+            self._prefetch_pending = True
+            self.after(PREFETCH_DELAY_MS, self.prefetch_visible)
+
+    def prefetch_visible(self):
+        """
+        Warms details and covers for the result rows currently in view.
+        """
+        self._prefetch_pending = False
+        first, last = self.result_list.visible_range()
+        links = [book["download_link"] for book in self.result_list.items[first:last]]
+        self.prefetcher.prefetch(links, budget=len(links))
+
+    def needs_fetch(self, link):
+        metadata = self.details.get(link)
+        return metadata is None or self.cover_photo(metadata) is False
+
+    def fetch_popup_data(self, link):
+        # Worker thread: DetailCache is thread-safe, CoverCache.load too
+        return fetch_book_popup_data(link, self.covers, self.details.get(link))
+
+    def on_prefetched(self, link, data):
+        self.remember_book(link, *data)
+
+    def remember_book(self, link, metadata, cover):
+        """
+        Keeps fetched details and turns a cover into a cached PhotoImage
+        (Tk thread). Returns the PhotoImage or None.
+        """
+        if not metadata:
+            return None
+        self.details.put(link, metadata)
+        if cover is None:
+            return None
+        return self.covers.put_photo(metadata["cover_url"], COVER_SIZE, cover)
+
+    def cover_photo(self, metadata):
+        """
+        The cover PhotoImage from memory, None if the book has no cover,
+        or False if it still has to be loaded.
+        """
+        url = metadata.get("cover_url")
+        if not url:
+            return None
+        photo = self.covers.get_photo(url, COVER_SIZE)
+        return photo if photo is not None else False
 
     # ------------------------------------------------------------
     #            DETAILS POPUP  (WITH SCROLLING)
@@ -240,9 +316,28 @@ class LibraryGenesisApp(tk.Tk):
     def open_book_popup(self, book):
         """
         Open a popup window for the selected book, displaying metadata, cover, etc.
+        Details and cover are fetched in the background; clicking another
+        book before they arrive drops this one.
         """
-        # Fetch detailed metadata
-        metadata = fetch_book_details(book["download_link"])
+        link = book["download_link"]
+        metadata = self.details.get(link)
+        if metadata is not None:
+            photo = self.cover_photo(metadata)
+            if photo is not False:
+                self.show_book_popup(book, metadata, photo)  # no network, no decoding
+                return
+
+        self.set_busy(True)
+        self.tasks.submit("details", fetch_book_popup_data, link, self.covers, metadata, key=link,
+                          on_done=lambda data: self.on_popup_data(book, *data),
+                          on_error=lambda e: self.show_book_popup(book, None, None))
+
+    def on_popup_data(self, book, metadata, cover):
+        photo = self.remember_book(book["download_link"], metadata, cover)
+        self.show_book_popup(book, metadata, photo)
+
+    def show_book_popup(self, book, metadata, photo):
+        self.set_busy(False)
         if not metadata:
             messagebox.showerror("Error", "Failed to fetch book details.")
             return
@@ -274,21 +369,10 @@ class LibraryGenesisApp(tk.Tk):
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
         # Display cover image if available
-        if metadata.get("cover_url"):
-            try:
-                img_response = requests.get(metadata["cover_url"], timeout=10)
-                img_response.raise_for_status()
-                img_data = io.BytesIO(img_response.content)
-                img = Image.open(img_data)
-                # Resize the image for a nicer fit
-                img.thumbnail((300, 400), Image.ANTIALIAS)
-                img_tk = ImageTk.PhotoImage(img)
-
-                cover_label = tk.Label(scrollable_popup_frame, image=img_tk)
-                cover_label.image = img_tk  # Keep a reference to avoid GC
-                cover_label.pack(pady=10)
-            except Exception as e:
-                print(f"Error loading cover image: {e}")
+        if photo is not None:
+            cover_label = tk.Label(scrollable_popup_frame, image=photo)
+            cover_label.image = photo  # Keep a reference to avoid GC
+            cover_label.pack(pady=10)
 
         # A frame to hold the metadata in a grid
         meta_frame = tk.Frame(scrollable_popup_frame)
@@ -327,32 +411,23 @@ class LibraryGenesisApp(tk.Tk):
         Handle the "Download Book" button click for the selected book:
         - Opens the actual download link in the default browser, if found.
         """
-        try:
-            print(f"Fetching download page for book link: {download_link}")
-            link = f"https://libgen.is/{download_link}"
-            download_page = requests.get(link, verify=certifi.where())
-            download_page.raise_for_status()
-            down_soup = bs(download_page.content, "lxml")
-
-            # Locate a Libgen mirror link on the page - e.g. "Libgen.li"
-            td_list = down_soup.find_all("td", width="17%")
-            actual_download_link = None
-            for td in td_list:
-                a = td.find("a", string=re.compile(r"Libgen\.li"))
-                if a and a.text.strip() == "Libgen.li":
-                    actual_download_link = a["href"]
-                    print(f"Download link found: {actual_download_link}")
-                    break
-
-            if actual_download_link:
-                webbrowser.open(actual_download_link)
-                messagebox.showinfo("Download Started", "The download link has been opened in your browser.")
-            else:
-                print("Download link not found on the download page.")
-                messagebox.showerror("Error", "Could not find a valid download link for this book.")
-        except Exception as e:
-            messagebox.showerror("Download Error", f"An error occurred: {e}")
-            print(f"Error: {e}")
+        self.set_busy(True)
+        self.tasks.submit("download", fetch_libgen_li_link, download_link, key=download_link,
+                          on_done=self.open_download_link, on_error=self.on_download_error)
+
+    def open_download_link(self, actual_download_link):
+        self.set_busy(False)
+        if actual_download_link:
+            webbrowser.open(actual_download_link)
+            messagebox.showinfo("Download Started", "The download link has been opened in your browser.")
+        else:
+            print("Download link not found on the download page.")
+            messagebox.showerror("Error", "Could not find a valid download link for this book.")
+
+    def on_download_error(self, error):
+        self.set_busy(False)
+        messagebox.showerror("Download Error", f"An error occurred: {error}")
+        print(f"Error: {error}")
 
 
 # ------------------------------------------------------------
@@ -1,17 +1,19 @@
 import webbrowser
 from tkinter import messagebox
-from PIL import Image, ImageTk
 import tkinter as tk
 from bs4 import BeautifulSoup as bs
-import requests
+from http_client import get_client
+from tk_tasks import TkTasks
+from cover_cache import CoverCache, visible_rows
 import re
-import io
+
+COVER_SIZE = (200, 300)  # popup cover, resized exactly
 
 def fetch_libgen_results(book_name):
     """Fetch top 10 results from Library Genesis."""
     print(f"Searching Library Genesis for: {book_name}")
     search_url = f'https://libgen.is/search.php?req={book_name}&lg_topic=libgen&open=0&view=simple&res=25&phrase=1&column=def'
-    response = requests.get(search_url)
+    response = get_client().get(search_url)
     response.raise_for_status()
     src = response.content
     soup = bs(src, 'lxml')
@@ -39,7 +41,7 @@ def fetch_book_details(book_link):
     try:
         link = f'https://libgen.is/{book_link}'
         print(f"Fetching book detail page: {link}")
-        response = requests.get(link)
+        response = get_client().get(link)
         response.raise_for_status()
         soup = bs(response.content, 'lxml')
 
@@ -61,40 +63,90 @@ def fetch_book_details(book_link):
         print(f"Error fetching book details: {e}")
         return None
 
-def open_book_popup(book):
-    """Open a popup window for the selected book."""
-    def download_book():
-        """Handle the GET button click to download the book."""
+def fetch_book_popup_data(book_link, covers, metadata=None):
+    """Fetch details (unless given) and the cover thumbnail (PIL image or None) off the Tk thread."""
+    if metadata is None:
+        metadata = fetch_book_details(book_link)
+    if not metadata:
+        return None, None
+
+    cover = None
+    if 'cover_url' in metadata and metadata['cover_url']:
         try:
-            print(f"Fetching download page for book link: {book['download_link']}")
-            link = f'https://libgen.is/{book["download_link"]}'
-            download_page = requests.get(link)
-            download_page.raise_for_status()
-            source = download_page.content
-            down_soup = bs(source, 'lxml')
-            
-            # Locate download link on the page
-            downloads_list = down_soup.find_all('td', {'width': "17%"})
-            download_link = None
-            for tr in downloads_list:
-                a = tr.find('a', string=re.compile('Libgen.li'))
-                if a is not None and a.text == 'Libgen.li':
-                    download_link = a['href']
-                    print(f"Download link found: {download_link}")
-                    break
-            
-            if download_link:
-                webbrowser.open(download_link)  # Open the download link in the browser
-                messagebox.showinfo("Download Started", "The download link has been opened in your browser.")
-            else:
-                print("Download link not found on the download page.")
-                messagebox.showerror("Error", "Could not find a valid download link for this book.")
+            cover = covers.load(metadata['cover_url'], COVER_SIZE, fit=False)  # disk cache or download
         except Exception as e:
-            messagebox.showerror("Download Error", f"An error occurred: {e}")
-            print(f"Error: {e}")
+            print(f"Error loading cover image: {e}")
+    return metadata, cover
+
+def remember_book(book, covers, details, metadata, cover):
+    """Keep fetched details and cache the cover as a PhotoImage (Tk thread). Returns the PhotoImage or None."""
+    if not metadata:
+        return None
+    details[book['download_link']] = metadata
+    if cover is None:
+        return None
+    return covers.put_photo(metadata['cover_url'], COVER_SIZE, cover, fit=False)
+
+def cached_cover(covers, metadata):
+    """Cover PhotoImage from memory, None if the book has no cover, False if it still has to be loaded."""
+    if not metadata.get('cover_url'):
+        return None
+    photo = covers.get_photo(metadata['cover_url'], COVER_SIZE, fit=False)
+    return photo if photo is not None else False
+
+def fetch_libgen_li_link(book_link):
+    """Locate the 'Libgen.li' download link on the book's page, or None."""
+    print(f"Fetching download page for book link: {book_link}")
+    link = f'https://libgen.is/{book_link}'
+    download_page = get_client().get(link)
+    download_page.raise_for_status()
+    source = download_page.content
+    down_soup = bs(source, 'lxml')
+
+    # Locate download link on the page
+    downloads_list = down_soup.find_all('td', {'width': "17%"})
+    for tr in downloads_list:
+        a = tr.find('a', string=re.compile('Libgen.li'))
+        if a is not None and a.text == 'Libgen.li':
+            print(f"Download link found: {a['href']}")
+            return a['href']
+    return None
+
+def open_book_popup(book, tasks, covers, details):
+    """Open a popup window for the selected book once its details have loaded in the background."""
+    metadata = details.get(book['download_link'])
+    if metadata is not None:
+        photo = cached_cover(covers, metadata)
+        if photo is not False:
+            show_book_popup(book, tasks, metadata, photo)  # seen before: no network, no decoding
+            return
+
+    def on_data(data):
+        show_book_popup(book, tasks, data[0], remember_book(book, covers, details, *data))
+
+    tasks.submit('details', fetch_book_popup_data, book['download_link'], covers, metadata,
+                 key=book['download_link'], on_done=on_data,
+                 on_error=lambda e: show_book_popup(book, tasks, None, None))
+
+def show_book_popup(book, tasks, metadata, photo):
+    """Build the popup from already fetched details."""
+    def download_book():
+        """Handle the GET button click to download the book."""
+        tasks.submit('download', fetch_libgen_li_link, book['download_link'], key=book['download_link'],
+                     on_done=open_download_link, on_error=on_download_error)
+
+    def open_download_link(download_link):
+        if download_link:
+            webbrowser.open(download_link)  # Open the download link in the browser
+            messagebox.showinfo("Download Started", "The download link has been opened in your browser.")
+        else:
+            print("Download link not found on the download page.")
+            messagebox.showerror("Error", "Could not find a valid download link for this book.")
+
+    def on_download_error(e):
+        messagebox.showerror("Download Error", f"An error occurred: {e}")
+        print(f"Error: {e}")
 
-    # Fetch detailed metadata
-    metadata = fetch_book_details(book['download_link'])
     if not metadata:
         messagebox.showerror("Error", "Failed to fetch book details.")
         return
@@ -105,20 +157,10 @@ def open_book_popup(book):
     popup.geometry("500x700")
 
     # Display the cover image
-    if 'cover_url' in metadata and metadata['cover_url']:
-        try:
-            img_response = requests.get(metadata['cover_url'])
-            img_response.raise_for_status()
-            img_data = io.BytesIO(img_response.content)
-            img = Image.open(img_data)
-            img = img.resize((200, 300))  # Resize the image
-            img_tk = ImageTk.PhotoImage(img)
-
-            cover_label = tk.Label(popup, image=img_tk)
-            cover_label.image = img_tk  # Keep a reference to avoid garbage collection
-            cover_label.pack(pady=10)
-        except Exception as e:
-            print(f"Error loading cover image: {e}")
+    if photo is not None:
+        cover_label = tk.Label(popup, image=photo)
+        cover_label.image = photo  # Keep a reference to avoid garbage collection
+        cover_label.pack(pady=10)
 
     # Display all metadata
     for key, value in metadata.items():
@@ -133,11 +175,35 @@ def show_book_options(results):
     """Show a UI with book options."""
     def on_select(book):
         """Open popup for the selected book."""
-        open_book_popup(book)
+        open_book_popup(book, tasks, covers, details)
+
+    def schedule_prefetch(*_):
+        if not prefetch_pending:
+            prefetch_pending.append(True)
+            root.after(150, prefetch_visible)
+
+    def prefetch_visible():
+        """Warm details and covers of the rows in view on a separate, smaller pool."""
+        prefetch_pending.clear()
+        for i in visible_rows(canvas, [row for _, row in rows]):
+            book = rows[i][0]
+            metadata = details.get(book['download_link'])
+            if metadata is not None and cached_cover(covers, metadata) is not False:
+                continue
+            prefetch.submit(f"book:{book['download_link']}", fetch_book_popup_data, book['download_link'], covers,
+                            metadata, key=book['download_link'],
+                            on_done=lambda data, b=book: remember_book(b, covers, details, *data))
 
     # Create the main window
     root = tk.Tk()
     root.title("Library Genesis Book Selector")
+    # Detail/cover/download lookups run in the background; covers are cached in memory and on disk
+    tasks = TkTasks(root)
+    prefetch = TkTasks(root, max_workers=2)
+    covers = CoverCache()
+    details = {}
+    rows = []
+    prefetch_pending = []
 
     # Create a scrollable frame
     frame = tk.Frame(root)
@@ -153,7 +219,7 @@ def show_book_options(results):
     )
 
     canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-    canvas.configure(yscrollcommand=scrollbar.set)
+    canvas.configure(yscrollcommand=lambda first, last: (scrollbar.set(first, last), schedule_prefetch()))
 
     canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
     scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -175,6 +241,9 @@ def show_book_options(results):
         # Open details button
         select_button = tk.Button(frame, text="Details", command=lambda b=book: on_select(b))
         select_button.pack(side=tk.RIGHT)
+        rows.append((book, frame))
+
+    schedule_prefetch()
 
     root.mainloop()
 
@@ -0,0 +1,190 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+
+# --------------------------------------------------------------------
+# Local full-text index over the downloaded library.
+#
+# Every book folder under BOOKS_DIR holds the book and a metadata.json
+# with its search_libgen record. The index keeps those records in a
+# SQLite FTS5 table next to the library, so a search can answer from
+# disk before going to the network.
+#
+# Staying incremental:
+# - refresh() compares the library folder's own mtime with the one seen
+#   last time; unchanged means no folder was added or removed, so only
+#   folders whose download was unfinished when indexed are looked at.
+# - Otherwise the top level is listed and each metadata.json is stat()ed;
+#   records are re-read only if their mtime/size changed, the download
+#   is still unfinished, or the indexed book file is gone.
+# - add_book_dir() indexes a folder right after a download completes,
+#   and refresh(force=True) re-checks every folder.
+# --------------------------------------------------------------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    id         INTEGER PRIMARY KEY,
+    dir        TEXT UNIQUE NOT NULL,
+    meta_mtime INTEGER,
+    meta_size  INTEGER,
+    file_path  TEXT,
+    record     TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+    title, author, publisher, extra,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS index_meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+SKIP_FILES = {"metadata.json"}
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class LibraryIndex:
+    def __init__(self, books_dir, db_path=None):
+        self.books_dir = books_dir
+        os.makedirs(books_dir, exist_ok=True)
+        self.db_path = db_path or os.path.join(books_dir, ".library_index.sqlite3")
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    # ----------------------------------------------------------------
+    # Maintenance
+    # ----------------------------------------------------------------
+    def refresh(self, force=False):
+        """
+        Brings the index up to date with BOOKS_DIR. Returns the number of
+        folders (re)indexed or removed.
+        """
+        root_mtime = str(os.stat(self.books_dir).st_mtime_ns)
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM index_meta WHERE name = 'root_mtime'").fetchone()
+            known = {r[0]: r[1:] for r in self.conn.execute("SELECT dir, meta_mtime, meta_size, file_path FROM books")}
+
+        if not force and row and row[0] == root_mtime:
+            # No folder added or removed: only unfinished downloads can have moved on
+            known = {name: state for name, state in known.items() if state[2] is None}
+            names = list(known)
+        else:
+            with os.scandir(self.books_dir) as entries:
+                names = [e.name for e in entries if e.is_dir() and not e.name.startswith(".")]
+
+        changed = 0
+        seen = set()
+        for name in names:
+            try:
+                st = os.stat(os.path.join(self.books_dir, name, "metadata.json"))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            seen.add(name)
+            meta_mtime, meta_size, file_path = known.get(name, (None, None, None))
+            if ((meta_mtime, meta_size) != (st.st_mtime_ns, st.st_size)
+                    or file_path is None or not os.path.exists(file_path)):
+                changed += self._index_dir(name, st)
+
+        removed = [name for name in known if name not in seen]
+        with self.lock:
+            self.conn.execute("BEGIN")
+            for name in removed:
+                self._delete(name)
+            self.conn.execute("INSERT OR REPLACE INTO index_meta (name, value) VALUES ('root_mtime', ?)", (root_mtime,))
+            self.conn.execute("COMMIT")
+        return changed + len(removed)
+
+    def add_book_dir(self, book_dir):
+        """
+        Indexes one book folder (e.g. right after its download finished).
+        """
+        return self._index_dir(os.path.basename(os.path.normpath(book_dir)))
+
+    def _index_dir(self, name, st=None):
+        path = os.path.join(self.books_dir, name)
+        meta_path = os.path.join(path, "metadata.json")
+        try:
+            st = st or os.stat(meta_path)
+            with open(meta_path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            with self.lock:
+                self._delete(name)
+            return 0
+
+        file_path = self._find_book_file(path)
+        extra = " ".join(str(record.get(k, "")) for k in ("year", "extension", "language", "id"))
+        with self.lock:
+            self.conn.execute("BEGIN")
+            self._delete(name)
+            book_id = self.conn.execute(
+                "INSERT INTO books (dir, meta_mtime, meta_size, file_path, record) VALUES (?, ?, ?, ?, ?)",
+                (name, st.st_mtime_ns, st.st_size, file_path, json.dumps(record)),
+            ).lastrowid
+            if file_path:
+                self.conn.execute(
+                    "INSERT INTO books_fts (rowid, title, author, publisher, extra) VALUES (?, ?, ?, ?, ?)",
+                    (book_id, record.get("title", ""), record.get("author", ""), record.get("publisher", ""), extra),
+                )
+            self.conn.execute("COMMIT")
+        return 1
+
+    @staticmethod
+    def _find_book_file(path):
+        """
+        The finished book in a folder: anything but metadata and partial
+        downloads. None while the download is still in progress.
+        """
+        with os.scandir(path) as entries:
+            for entry in entries:
+                name = entry.name
+                if name in SKIP_FILES or ".part" in name or not entry.is_file():
+                    continue
+                return entry.path
+        return None
+
+    def _delete(self, name):
+        row = self.conn.execute("SELECT id FROM books WHERE dir = ?", (name,)).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM books_fts WHERE rowid = ?", row)
+            self.conn.execute("DELETE FROM books WHERE id = ?", row)
+
+    # ----------------------------------------------------------------
+    # Search
+    # ----------------------------------------------------------------
+    def search(self, query, limit=50):
+        """
+        Returns downloaded book records matching every word of 'query'
+        (prefix match, best first). Each record gets 'local_path' set to
+        the downloaded file.
+        """
+        tokens = _TOKEN.findall(query.replace("+", " ").lower())
+        if not tokens:
+            return []
+        match = " ".join(f'"{t}"*' for t in tokens)
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT b.record, b.file_path FROM books_fts f JOIN books b ON b.id = f.rowid "
+                "WHERE books_fts MATCH ? ORDER BY bm25(books_fts) LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        results = []
+        for record, file_path in rows:
+            book = json.loads(record)
+            book["local_path"] = file_path
+            results.append(book)
+        return results
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM books WHERE file_path IS NOT NULL").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,437 @@
+import asyncio
+import email.utils
+import hashlib
+import json
+import math
+import mimetypes
+import os
+import re
+import sys
+import threading
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from journal_store import read_journal
+from mp3_index import load_index
+from podcast_store import AUDIO_EXTENSIONS, BLOB_DIR, MANIFEST_FILE, PODCAST_DIR
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+HOST = "127.0.0.1"
+PORT = 3002                 # next to the Node backend on 3001
+STUDY_GUIDE_DIR = "../study_guides"
+BACKLOG = 2048              # pending connections; a relay reconnecting 1000 listeners at once needs headroom
+KEEPALIVE_TIMEOUT = 15      # seconds an idle connection is kept open
+MAX_HEADER_BYTES = 16 * 1024
+IMMUTABLE = "public, max-age=31536000, immutable"  # content-addressed blobs never change
+REVALIDATE = "no-cache"     # cache, but check the ETag before reuse
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+REASONS = {200: "OK", 206: "Partial Content", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 416: "Range Not Satisfiable", 500: "Internal Server Error"}
+
+mimetypes.add_type("audio/mpeg", ".mp3")
+
+
+def parse_request(head):
+    """
+    (method, target, version, headers) from a request head, header names
+    lower-cased, or None if it is malformed.
+    """
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        return None
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def parse_range(value, size):
+    """
+    (start, end) with 'end' exclusive for a single "bytes=" range, None to
+    ignore the header (malformed or multiple ranges: the whole file is
+    sent) and False if it cannot be satisfied.
+    """
+    match = RANGE_RE.match(value.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last) + 1, size) if last else size
+    elif last:
+        start, end = max(size - int(last), 0), size
+        if int(last) == 0:
+            return False
+    else:
+        return None
+    return (start, end) if start < size else False
+
+
+def etag_matches(header, etag):
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+class Listing:
+    """
+    A JSON listing rendered once per directory state. 'stamp' returns what
+    identifies that state (mtimes, sizes); while it is unchanged the
+    rendered body and its ETag are reused. get() stats (and may read) the
+    disk, so the server calls it from an executor thread.
+    """
+
+    def __init__(self, stamp, render):
+        self.stamp = stamp
+        self.render = render
+        self.lock = threading.Lock()
+        self.key = None
+        self.body = b""
+        self.etag = ""
+        self.renders = 0
+
+    def get(self):
+        with self.lock:
+            key = self.stamp()
+            if key != self.key:
+                self.body = json.dumps(self.render()).encode()
+                self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:20]}"'
+                self.key = key
+                self.renders += 1
+            return self.body, self.etag
+
+
+def _mtime(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _offset_at(path, seconds):
+    return load_index(path).offset_at(seconds)
+
+
+def _study_guide_json(name, path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return json.dumps({"name": name, "content": f.read()}).encode()
+
+
+class MediaServer:
+    """
+    Serves the podcast and study guide outputs of ai_inference.py from one
+    asyncio process:
+
+        GET /podcasts                 JSON listing (podcast store manifest, or the directory)
+        GET /podcasts/<name>          audio by file name, blob path or "<title><ext>" from the manifest
+        GET /podcasts/<name>?t=90     MP3 from the frame playing at 90 s (mp3_index)
+        GET /study-guides             JSON listing
+        GET /study-guides/<name>      the file; '?format=json' gives {"name", "content"}
+
+    File bodies go out with loop.sendfile(), i.e. os.sendfile() from the
+    page cache to the socket. Single byte ranges get 206 responses, and
+    ETag/If-None-Match answers repeat requests with 304. Listings are
+    kept rendered until the directory (or manifest) changes. Only audio
+    files are served from the podcast directory, never the manifest,
+    seek indexes or unfinished uploads. Listings carry each file's URL,
+    never its path on disk. Lookups that touch the disk (listings,
+    manifest replay, opening files, study guide text) run on the default
+    executor so a slow disk never stalls the other connections.
+
+    Usage:
+        MediaServer().run()                      # blocks, like app.listen()
+        server = MediaServer(port=0)
+        await server.start()                     # inside a running loop
+    """
+
+    def __init__(self, podcast_dir=PODCAST_DIR, study_guide_dir=STUDY_GUIDE_DIR, host=HOST, port=PORT):
+        self.roots = {"podcasts": os.path.realpath(podcast_dir), "study-guides": os.path.realpath(study_guide_dir)}
+        self.host = host
+        self.port = port
+        self.manifest_path = os.path.join(self.roots["podcasts"], MANIFEST_FILE)
+        self.blob_root = os.path.join(self.roots["podcasts"], BLOB_DIR, "")
+        self.blob_tmp = os.path.join(self.roots["podcasts"], BLOB_DIR, "tmp", "")
+        self.manifest_lock = threading.Lock()
+        self.manifest_key = None
+        self.manifest = {}
+        self.listings = {
+            "podcasts": Listing(self._podcasts_stamp, self._render_podcasts),
+            "study-guides": Listing(lambda: _mtime(self.roots["study-guides"]), self._render_study_guides),
+        }
+        self.server = None
+        self.connections = 0
+        self.peak_connections = 0
+        self.requests = 0
+        self.bytes_sent = 0
+
+    # ----------------------------------------------------------------
+    # Listings
+    # ----------------------------------------------------------------
+    def _episodes(self):
+        """
+        Manifest entries by key, replayed only when the journal changes.
+        """
+        with self.manifest_lock:
+            key = _mtime(self.manifest_path)
+            if key != self.manifest_key:
+                self.manifest = read_journal(self.manifest_path) if key else {}
+                self.manifest_key = key
+            return self.manifest
+
+    def _podcasts_stamp(self):
+        return _mtime(self.roots["podcasts"]), _mtime(self.manifest_path)
+
+    def _render_podcasts(self):
+        episodes = [e for k, e in self._episodes().items() if k.startswith("episode:")]
+        if episodes:
+            podcasts = []
+            for entry in sorted(episodes, key=lambda e: e["added"], reverse=True):
+                blob = f"{BLOB_DIR}/{entry['sha256'][:2]}/{entry['sha256']}{entry['ext']}"
+                podcasts.append({"name": f"{entry['title']}{entry['ext']}", "title": entry["title"],
+                                 "size": entry["size"], "url": f"/podcasts/{blob}"})
+            return podcasts
+        return self._render_files("podcasts", AUDIO_EXTENSIONS)
+
+    def _render_study_guides(self):
+        return self._render_files("study-guides")
+
+    def _render_files(self, route, extensions=None):
+        root = self.roots[route]
+        try:
+            names = sorted(e.name for e in os.scandir(root) if e.is_file() and not e.name.startswith("."))
+        except OSError as e:
+            print("[ERROR] Could not list", root, e)
+            return []
+        if extensions:
+            names = [n for n in names if os.path.splitext(n)[1].lower() in extensions]
+        return [{"name": n, "url": f"/{route}/{quote(n)}"} for n in names]
+
+    # ----------------------------------------------------------------
+    # Files
+    # ----------------------------------------------------------------
+    def resolve(self, route, name):
+        """
+        Path of 'name' under the route's directory, or of the blob the
+        manifest titles "<name without extension>"; None if neither.
+        Podcast paths must be audio files outside the upload directory.
+        Blocking: stats files and may replay the manifest.
+        """
+        root = self.roots[route]
+        if "\0" in name:
+            return None
+        path = os.path.realpath(os.path.join(root, name))
+        servable = route != "podcasts" or (os.path.splitext(path)[1].lower() in AUDIO_EXTENSIONS
+                                           and not path.startswith(self.blob_tmp))
+        if servable and os.path.commonpath([path, root]) == root and os.path.isfile(path):
+            return path
+        if route == "podcasts":
+            stem, ext = os.path.splitext(name)
+            entry = self._episodes().get(f"episode:{stem}")
+            if entry and entry["ext"] == ext.lower():
+                path = os.path.join(root, BLOB_DIR, entry["sha256"][:2], f"{entry['sha256']}{entry['ext']}")
+                if os.path.isfile(path):
+                    return path
+        return None
+
+    def open_file(self, route, name):
+        """
+        resolve() plus opening the file: (path, file object, stat result),
+        or None if 'name' does not resolve or cannot be opened. Blocking.
+        """
+        path = self.resolve(route, name)
+        if path is None:
+            return None
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            return path, f, os.fstat(f.fileno())
+        except OSError:
+            f.close()
+            return None
+
+    async def _send_file(self, writer, method, path, f, st, headers, query):
+        with f:
+            size = st.st_size
+            etag = f'"{size:x}-{st.st_mtime_ns:x}"'
+            fields = {"Content-Type": mimetypes.guess_type(path)[0] or "application/octet-stream",
+                      "ETag": etag, "Last-Modified": email.utils.formatdate(st.st_mtime, usegmt=True),
+                      "Cache-Control": IMMUTABLE if path.startswith(self.blob_root) else REVALIDATE, "Accept-Ranges": "bytes"}
+
+            start, end, status = 0, size, 200
+            if "if-none-match" in headers and etag_matches(headers["if-none-match"], etag):
+                return await self._send(writer, method, 304, b"", fields)
+            if "range" in headers and headers.get("if-range", etag) == etag:
+                span = parse_range(headers["range"], size)
+                if span is False:
+                    return await self._send(writer, method, 416, b"", {"Content-Range": f"bytes */{size}"})
+                if span:
+                    start, end = span
+                    status = 206
+                    fields["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+            elif "t" in query and path.lower().endswith(".mp3"):
+                try:
+                    seconds = float(query["t"][0])
+                except ValueError:
+                    seconds = math.nan
+                if not math.isfinite(seconds):
+                    return await self._send(writer, method, 400, b"Bad time")
+                try:
+                    start = await asyncio.get_running_loop().run_in_executor(None, _offset_at, path, seconds)
+                except ValueError as e:
+                    # No MPEG frames to seek by: the whole file it is
+                    print("[ERROR] Cannot seek:", e)
+                else:
+                    # Not the file's representation: no validators, no ranges
+                    for name in ("ETag", "Last-Modified", "Accept-Ranges"):
+                        del fields[name]
+
+            fields["Content-Length"] = str(end - start)
+            self._write_head(writer, status, fields)
+            if method == "HEAD" or end == start:
+                await writer.drain()
+                return True
+            await asyncio.get_running_loop().sendfile(writer.transport, f, start, end - start)
+            self.bytes_sent += end - start
+            return True
+
+    # ----------------------------------------------------------------
+    # HTTP
+    # ----------------------------------------------------------------
+    def _write_head(self, writer, status, fields):
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}", f"Date: {email.utils.formatdate(usegmt=True)}"]
+        lines.extend(f"{name}: {value}" for name, value in fields.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def _send(self, writer, method, status, body, fields=None, content_type="text/plain; charset=utf-8"):
+        fields = dict(fields or {})
+        if status != 304:
+            fields.setdefault("Content-Type", content_type)
+            fields["Content-Length"] = str(len(body))
+        self._write_head(writer, status, fields)
+        if method != "HEAD" and status != 304:
+            writer.write(body)
+            self.bytes_sent += len(body)
+        await writer.drain()
+        return status < 400 or status in (404, 416)
+
+    async def _dispatch(self, writer, method, target, headers):
+        """
+        Answers one request; returns False if the connection should close.
+        An unexpected error is answered with a 500 and closes it.
+        """
+        try:
+            return await self._route(writer, method, target, headers)
+        except ConnectionError:
+            raise
+        except Exception as e:
+            print(f"[ERROR] {method} {target}: {e!r}")
+            await self._send(writer, method, 500, b"Internal Server Error", {"Connection": "close"})
+            return False
+
+    async def _route(self, writer, method, target, headers):
+        loop = asyncio.get_running_loop()
+        if method not in ("GET", "HEAD"):
+            return await self._send(writer, method, 405, b"Method Not Allowed", {"Allow": "GET, HEAD"})
+        url = urlsplit(target)
+        route, _, name = unquote(url.path).strip("/").partition("/")
+        if route not in self.listings:
+            return await self._send(writer, method, 404, b"Not Found")
+        if not name:
+            body, etag = await loop.run_in_executor(None, self.listings[route].get)
+            if etag_matches(headers.get("if-none-match", ""), etag):
+                return await self._send(writer, method, 304, b"", {"ETag": etag})
+            return await self._send(writer, method, 200, body, {"ETag": etag, "Cache-Control": REVALIDATE},
+                                    "application/json")
+
+        query = parse_qs(url.query)
+        if route == "study-guides" and query.get("format") == ["json"]:
+            # What the Node backend answered, for the study guide dialog
+            path = await loop.run_in_executor(None, self.resolve, route, name)
+            if path is None:
+                return await self._send(writer, method, 404, b"Not Found")
+            body = await loop.run_in_executor(None, _study_guide_json, name, path)
+            return await self._send(writer, method, 200, body, content_type="application/json")
+        opened = await loop.run_in_executor(None, self.open_file, route, name)
+        if opened is None:
+            return await self._send(writer, method, 404, b"Not Found")
+        return await self._send_file(writer, method, *opened, headers, query)
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self.peak_connections = max(self.peak_connections, self.connections)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, "GET", 400, b"Request header too large", {"Connection": "close"})
+                    break
+                request = parse_request(head)
+                if request is None:
+                    await self._send(writer, "GET", 400, b"Bad Request", {"Connection": "close"})
+                    break
+                method, target, version, headers = request
+                self.requests += 1
+                length = headers.get("content-length") or "0"
+                if not (length.isascii() and length.isdigit()):
+                    await self._send(writer, method, 400, b"Bad Content-Length", {"Connection": "close"})
+                    break
+                length = int(length)
+                if length:
+                    await reader.readexactly(length)  # GET/HEAD bodies carry nothing we use
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                if not await self._dispatch(writer, method, target, headers) or not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port, backlog=BACKLOG,
+                                                 limit=MAX_HEADER_BYTES)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Serving {self.roots['podcasts']} and {self.roots['study-guides']} on http://{self.host}:{self.port}",
+              flush=True)
+        async with self.server:
+            await self.server.serve_forever()
+
+    def run(self):
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            pass
+
+
+# --------------------------------------------------------------------
+# Command line: python media_server.py [port] [podcast dir] [study guide dir]
+# --------------------------------------------------------------------
+def main(port=PORT, podcast_dir=PODCAST_DIR, study_guide_dir=STUDY_GUIDE_DIR):
+    MediaServer(podcast_dir, study_guide_dir, port=int(port)).run()
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
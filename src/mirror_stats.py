@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+EWMA_WEIGHT = 0.3        # weight of the newest latency sample
+PENALTY_SECONDS = 10.0   # seconds added to a host's score at a failure rate of 1
+FAILURE_DECAY = 0.8      # how quickly old failures are forgotten
+HEDGE_DELAY = 1.0        # seconds to give a host with no history before trying the next mirror
+
+
+class MirrorStats:
+    """
+    Persisted per-host latency and failure history for LibGen mirrors.
+
+    Each host keeps an exponentially weighted average latency of its
+    successful requests and a decaying failure rate; rank() orders mirror
+    URLs so the historically fastest, most reliable host comes first.
+    Failures only count through the failure rate, so a host that refuses
+    connections quickly does not look fast. Hosts with no history rank
+    first so they get measured.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.hosts = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.hosts, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def host_of(url):
+        return urlsplit(url).netloc.lower()
+
+    def record(self, url, latency, ok):
+        """
+        Adds one observation for the host of 'url'. Only successful
+        requests update the latency average.
+        """
+        host = self.host_of(url)
+        with self.lock:
+            entry = self.hosts.setdefault(host, {"latency": None, "failure_rate": 0.0, "samples": 0})
+            if ok and entry["latency"] is None:
+                entry["latency"] = latency
+            elif ok:
+                entry["latency"] += EWMA_WEIGHT * (latency - entry["latency"])
+            entry["failure_rate"] = FAILURE_DECAY * entry["failure_rate"] + (0.0 if ok else 1.0 - FAILURE_DECAY)
+            entry["samples"] += 1
+            entry["updated"] = time.time()
+            self._save()
+
+    def score(self, url):
+        """
+        Expected cost in seconds of using the host of 'url' (lower is
+        better): its average latency, or HEDGE_DELAY if it never answered,
+        plus PENALTY_SECONDS scaled by its failure rate.
+        """
+        entry = self.hosts.get(self.host_of(url))
+        if not entry or not entry["samples"]:
+            return 0.0
+        latency = HEDGE_DELAY if entry["latency"] is None else entry["latency"]
+        return latency + PENALTY_SECONDS * entry["failure_rate"]
+
+    def rank(self, urls):
+        return sorted(urls, key=self.score)
+
+    def hedge_delay(self, url):
+        """
+        How long to wait on the host of 'url' before also trying the next
+        mirror: its average latency, or HEDGE_DELAY without history.
+        """
+        entry = self.hosts.get(self.host_of(url))
+        if not entry or entry["latency"] is None:
+            return HEDGE_DELAY
+        return entry["latency"]
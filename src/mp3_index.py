@@ -0,0 +1,358 @@
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+STRIDE = 32               # seek table keeps every STRIDE-th frame offset (~0.8 s at 44.1 kHz)
+INDEX_SUFFIX = ".idx"     # cache file written next to the MP3
+RESYNC_LIMIT = 64 * 1024  # bytes scanned for the next frame after garbage
+
+# MPEG version bits -> (name, sample rates); 1 is reserved
+_VERSIONS = {3: ("1", (44100, 48000, 32000)), 2: ("2", (22050, 24000, 16000)),
+             0: ("2.5", (11025, 12000, 8000))}
+# kbps per bitrate index, by (MPEG-1?, layer)
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+_CACHE = struct.Struct("<8sQqIIIQQQ4s")
+_CACHE_MAGIC = b"MP3IDX1\0"
+
+
+def _frame_info(header):
+    """
+    (frame length, samples per frame, sample rate, MPEG-1?) for a 32-bit
+    frame header, or None if it is not a valid header. Free-format
+    (bitrate index 0) frames are not supported.
+    """
+    if header >> 21 != 0x7FF:
+        return None
+    version = (header >> 19) & 3
+    layer = 4 - ((header >> 17) & 3)
+    bitrate_index = (header >> 12) & 15
+    rate_index = (header >> 10) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    sample_rate = _VERSIONS[version][1][rate_index]
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    padding = (header >> 9) & 1
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate, mpeg1
+    if layer == 3 and not mpeg1:
+        return 72 * bitrate // sample_rate + padding, 576, sample_rate, mpeg1
+    return 144 * bitrate // sample_rate + padding, 1152, sample_rate, mpeg1
+
+
+_info_cache = {}
+
+
+def frame_info(header):
+    # The length only depends on header bits 31-9; memoize on those
+    key = header >> 9
+    try:
+        return _info_cache[key]
+    except KeyError:
+        info = _info_cache[key] = _frame_info(header)
+        return info
+
+
+def _id3v2_size(mm):
+    if len(mm) >= 10 and mm[:3] == b"ID3":
+        size = (mm[6] & 0x7F) << 21 | (mm[7] & 0x7F) << 14 | (mm[8] & 0x7F) << 7 | (mm[9] & 0x7F)
+        footer = 10 if mm[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def _audio_end(mm):
+    """
+    End of the audio data, before an ID3v1 and/or APE tag.
+    """
+    end = len(mm)
+    if end >= 128 and mm[end - 128:end - 125] == b"TAG":
+        end -= 128
+    if end >= 32 and mm[end - 32:end - 24] == b"APETAGEX":
+        size = struct.unpack_from("<I", mm, end - 20)[0]
+        end -= size + (32 if struct.unpack_from("<I", mm, end - 12)[0] & 0x80000000 else 0)
+    return max(end, 0)
+
+
+def _vbr_tag(mm, pos, header, mpeg1):
+    """
+    'Xing', 'Info' or 'VBRI' if the frame at 'pos' is a VBR/CBR info
+    frame (no audio), with the frame count it declares.
+    """
+    mono = (header >> 6) & 3 == 3
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    at = pos + 4 + side_info
+    tag = bytes(mm[at:at + 4])
+    if tag in (b"Xing", b"Info"):
+        flags = struct.unpack_from(">I", mm, at + 4)[0]
+        frames = struct.unpack_from(">I", mm, at + 8)[0] if flags & 1 else None
+        return tag.decode(), frames
+    if bytes(mm[pos + 36:pos + 40]) == b"VBRI":
+        return "VBRI", struct.unpack_from(">I", mm, pos + 50)[0]
+    return None, None
+
+
+class Mp3Index:
+    """
+    Frame layout of one MP3: sample rate, frame count and a seek table
+    with the byte offset of every STRIDE-th audio frame. Durations come
+    from counting frames, never from decoding.
+    """
+
+    def __init__(self, path, size, mtime_ns, sample_rate, samples_per_frame, stride, frame_count,
+                 audio_start, audio_end, vbr_tag, offsets):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.sample_rate = sample_rate
+        self.samples_per_frame = samples_per_frame
+        self.stride = stride
+        self.frame_count = frame_count
+        self.audio_start = audio_start
+        self.audio_end = audio_end
+        self.vbr_tag = vbr_tag  # "Xing", "Info", "VBRI" or None
+        self.offsets = offsets  # array('Q')
+
+    @property
+    def frame_duration(self):
+        return self.samples_per_frame / self.sample_rate
+
+    @property
+    def duration(self):
+        return self.frame_count * self.frame_duration
+
+    @property
+    def bitrate(self):
+        """Average bits per second of the audio frames."""
+        return (self.audio_end - self.audio_start) * 8 / self.duration if self.frame_count else 0
+
+    def frame_at(self, seconds):
+        return min(max(int(seconds / self.frame_duration), 0), max(self.frame_count - 1, 0))
+
+    def offset_at(self, seconds, mm=None):
+        """
+        Byte offset of the frame playing at 'seconds': the nearest seek
+        table entry, then at most stride - 1 frame headers from there.
+        Pass an open mmap of the file to avoid reopening it.
+        """
+        frame = self.frame_at(seconds)
+        base, skip = divmod(frame, self.stride)
+        pos = self.offsets[base] if self.offsets else self.audio_start
+        if not skip:
+            return pos
+        if mm is None:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return self._skip_frames(mm, pos, skip)
+        return self._skip_frames(mm, pos, skip)
+
+    def _skip_frames(self, mm, pos, count):
+        """
+        Steps 'count' frames on from 'pos', skipping junk between frames
+        the same way build_index did when it counted them.
+        """
+        unpack = struct.unpack_from
+        end = min(self.audio_end, len(mm))
+        while pos + 4 <= end:
+            info = frame_info(unpack(">I", mm, pos)[0])
+            if info is None or info[2] != self.sample_rate:
+                pos = _resync(mm, pos + 1, end)
+                if pos is None:
+                    return end
+                continue
+            if not count:
+                return pos
+            pos += info[0]
+            count -= 1
+        return min(pos, end)
+
+    def time_at(self, offset):
+        """
+        Start time of the seek table entry at or before byte 'offset'.
+        """
+        lo, hi = 0, len(self.offsets)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.offsets[mid] <= offset:
+                lo = mid + 1
+            else:
+                hi = mid
+        return max(lo - 1, 0) * self.stride * self.frame_duration
+
+    # ----------------------------------------------------------------
+    # Cache file
+    # ----------------------------------------------------------------
+    def to_bytes(self):
+        offsets = array("Q", self.offsets)
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        header = _CACHE.pack(_CACHE_MAGIC, self.size, self.mtime_ns, self.sample_rate, self.samples_per_frame,
+                             self.stride, self.frame_count, self.audio_start, self.audio_end,
+                             (self.vbr_tag or "").encode().ljust(4, b"\0"))
+        return header + offsets.tobytes()
+
+    @classmethod
+    def from_bytes(cls, path, data):
+        if len(data) < _CACHE.size or not data.startswith(_CACHE_MAGIC):
+            return None
+        (_, size, mtime_ns, sample_rate, samples_per_frame, stride, frame_count,
+         audio_start, audio_end, tag) = _CACHE.unpack_from(data)
+        offsets = array("Q")
+        offsets.frombytes(data[_CACHE.size:])
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        return cls(path, size, mtime_ns, sample_rate, samples_per_frame, stride, frame_count,
+                   audio_start, audio_end, tag.rstrip(b"\0").decode() or None, offsets)
+
+
+def build_index(path, stride=STRIDE):
+    """
+    Walks the frame headers of 'path' through an mmap and returns its
+    Mp3Index. A Xing/Info/VBRI frame is recognised and left out of the
+    audio frames; junk between frames is skipped by resyncing on two
+    consecutive valid headers. Raises ValueError if no MP3 frames are
+    found.
+    """
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        if st.st_size == 0:
+            raise ValueError(f"{path}: empty file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _walk(mm, path, st, stride)
+
+
+def _walk(mm, path, st, stride):
+    unpack = struct.unpack_from
+    end = _audio_end(mm)
+    pos = _resync(mm, _id3v2_size(mm), end)
+    if pos is None:
+        raise ValueError(f"{path}: no MPEG audio frames found")
+
+    header = unpack(">I", mm, pos)[0]
+    length, samples_per_frame, sample_rate, mpeg1 = frame_info(header)
+    vbr_tag, _ = _vbr_tag(mm, pos, header, mpeg1)
+    if vbr_tag:
+        pos += length  # metadata frame, no audio
+    audio_start = pos
+
+    offsets = array("Q")
+    frames = 0
+    while pos + 4 <= end:
+        info = frame_info(unpack(">I", mm, pos)[0])
+        if info is None or info[2] != sample_rate:
+            pos = _resync(mm, pos + 1, end)
+            if pos is None:
+                break
+            continue
+        if pos + info[0] > end:
+            break  # truncated last frame
+        if frames % stride == 0:
+            offsets.append(pos)
+        frames += 1
+        pos += info[0]
+    return Mp3Index(path, st.st_size, st.st_mtime_ns, sample_rate, samples_per_frame, stride, frames,
+                    audio_start, min(pos, end), vbr_tag, offsets)
+
+
+def _resync(mm, pos, end):
+    """
+    Offset of the next frame header at or after 'pos' that is followed by
+    another valid header, or None.
+    """
+    limit = min(end, pos + RESYNC_LIMIT)
+    while True:
+        pos = mm.find(b"\xff", pos, limit)
+        if pos < 0 or pos + 4 > end:
+            return None
+        info = frame_info(struct.unpack_from(">I", mm, pos)[0])
+        if info is not None:
+            following = pos + info[0]
+            if following + 4 > end:
+                return pos  # last frame of the file
+            next_info = frame_info(struct.unpack_from(">I", mm, following)[0])
+            if next_info is not None and next_info[2] == info[2]:
+                return pos
+        pos += 1
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+def load_index(path, stride=STRIDE):
+    """
+    The Mp3Index of 'path' from '<path>.idx' if that was written for the
+    file's current size and mtime, otherwise built and cached there.
+    """
+    st = os.stat(path)
+    cache = index_path(path)
+    try:
+        with open(cache, "rb") as f:
+            index = Mp3Index.from_bytes(path, f.read())
+        if index and index.size == st.st_size and index.mtime_ns == st.st_mtime_ns and index.stride == stride:
+            return index
+    except OSError:
+        pass
+
+    index = build_index(path, stride)
+    tmp = f"{cache}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(index.to_bytes())
+        os.replace(tmp, cache)
+    except OSError as e:
+        print("[ERROR] Could not cache MP3 index:", e)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return index
+
+
+def duration(path):
+    return load_index(path).duration
+
+
+def index_directory(root):
+    """
+    Loads (building where needed) the index of every .mp3 under 'root'.
+    Returns {path: Mp3Index}; unreadable files are reported and skipped.
+    """
+    indexes = {}
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(".mp3"):
+                path = os.path.join(dirpath, name)
+                try:
+                    indexes[path] = load_index(path)
+                except (OSError, ValueError) as e:
+                    print("[ERROR] Could not index", path, e)
+    return indexes
+
+
+# --------------------------------------------------------------------
+# Command line: python mp3_index.py [directory]
+# --------------------------------------------------------------------
+def main(root="../podcasts"):
+    start = time.perf_counter()
+    indexes = index_directory(root)
+    elapsed = time.perf_counter() - start
+    for path, index in sorted(indexes.items()):
+        print(f"{index.duration:8.1f}s {index.frame_count:7d} frames {index.bitrate / 1000:6.1f} kbps "
+              f"{index.vbr_tag or '-':<4} {os.path.relpath(path, root)}")
+    print(f"{len(indexes)} files in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,314 @@
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from journal_store import JournalStore
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # only needed when pages have to be extracted
+    PdfReader = None
+
+# pypdf logs a warning for every font or xref quirk it works around
+logging.getLogger("pypdf").setLevel(logging.ERROR)
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+ASSETS_DIR = "../assets"
+CACHE_DIR = "pdf_text_cache"
+WORKERS = os.cpu_count() or 1
+PAGES_PER_TASK = 8        # pages a worker extracts per task; the PDF stays open between tasks
+CHAPTER_CHARS = 40000     # upper bound for one text resource
+HASH_BLOCK = 1024 * 1024
+
+
+class Chapter:
+    """
+    A run of pages sent to AutoContent as one text resource.
+    """
+
+    def __init__(self, number, title, first_page, last_page, text):
+        self.number = number          # 1-based, in book order
+        self.title = title
+        self.first_page = first_page  # 0-based, inclusive
+        self.last_page = last_page
+        self.text = text
+
+    def resource(self):
+        return {"content": self.text, "type": "text"}
+
+
+# --------------------------------------------------------------------
+# Worker side
+# --------------------------------------------------------------------
+_open_reader = None  # (path, PdfReader) last used by this worker process
+
+
+def _reader(path):
+    global _open_reader
+    if _open_reader is None or _open_reader[0] != path:
+        _open_reader = (path, PdfReader(path))
+    return _open_reader[1]
+
+
+def _extract_pages(path, numbers):
+    """
+    [(page number, text)] for 'numbers' of 'path'. A page pypdf cannot
+    read comes back empty instead of failing the book.
+    """
+    reader = _reader(path)
+    pages = []
+    for number in numbers:
+        try:
+            text = reader.pages[number].extract_text() or ""
+        except Exception as e:
+            print(f"[ERROR] {os.path.basename(path)} page {number + 1}: {e}")
+            text = ""
+        pages.append((number, text.strip()))
+    return pages
+
+
+def _outline(reader):
+    """
+    [(title, first page)] of the top-level bookmarks, in page order.
+    """
+    entries = []
+    try:
+        outline = reader.outline
+    except Exception:
+        return entries
+    for item in outline:
+        if isinstance(item, list):
+            continue  # children of the previous entry
+        try:
+            page = reader.get_destination_page_number(item)
+        except Exception:
+            continue
+        if page is not None and page >= 0 and (not entries or page > entries[-1][1]):
+            entries.append((str(item.title).strip(), page))
+    return entries
+
+
+# --------------------------------------------------------------------
+# Extraction with a per-book page cache
+# --------------------------------------------------------------------
+class PdfText:
+    """
+    Page text of downloaded books, extracted with pypdf across a process
+    pool and cached per page, so a book is only ever extracted once.
+
+    Each book has a JournalStore named after the SHA-256 of its bytes:
+
+        pdf_text_cache/<sha256>.jsonl   "info" -> {"pages", "outline"}
+                                        "page:<n>" -> text
+        pdf_text_cache/files.jsonl      "<path>" -> {"size", "mtime_ns", "sha256"}
+
+    files.jsonl saves rehashing a file whose size and mtime are unchanged.
+    The pool only starts when a page is missing from the cache.
+
+    Usage:
+        with PdfText() as pdfs:
+            for chapter in pdfs.chapters("../assets/book.pdf"):
+                spec["resources"].append(chapter.resource())
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, workers=WORKERS, pages_per_task=PAGES_PER_TASK):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.pages_per_task = pages_per_task
+        os.makedirs(cache_dir, exist_ok=True)
+        self.files = JournalStore(os.path.join(cache_dir, "files.jsonl"))
+        self.books = {}
+        self.pool = None
+        self.lock = threading.RLock()
+        self.pages_extracted = 0
+        self.pages_cached = 0
+
+    def file_hash(self, path):
+        st = os.stat(path)
+        known = self.files.get(path)
+        if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+            return known["sha256"]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                sha.update(block)
+        self.files[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha.hexdigest()}
+        return sha.hexdigest()
+
+    def book(self, path):
+        """
+        The page journal of 'path', with its "info" entry filled in.
+        Raises ValueError if the file is not a PDF pypdf can open.
+        """
+        sha256 = self.file_hash(path)
+        with self.lock:
+            book = self.books.get(sha256)
+            if book is None:
+                book = self.books[sha256] = JournalStore(os.path.join(self.cache_dir, f"{sha256}.jsonl"))
+        if "info" not in book:
+            if PdfReader is None:
+                raise ImportError("extracting PDF text needs pypdf")
+            with open(path, "rb") as f:
+                if f.read(1024).find(b"%PDF-") < 0:
+                    raise ValueError(f"{path} is not a PDF")
+            try:
+                reader = PdfReader(path)
+                book["info"] = {"pages": len(reader.pages), "outline": _outline(reader)}
+            except Exception as e:
+                raise ValueError(f"{path}: {e}") from e
+        return book
+
+    def pages(self, path, first=0, last=None):
+        """
+        Yields (page number, text) from 'first' to 'last' (0-based,
+        inclusive) in order. Cached pages come straight from the journal;
+        the others are extracted PAGES_PER_TASK at a time in the pool and
+        yielded as soon as every page before them is in.
+        """
+        book = self.book(path)
+        last = book["info"]["pages"] - 1 if last is None else min(last, book["info"]["pages"] - 1)
+        missing = [n for n in range(first, last + 1) if f"page:{n}" not in book]
+        extracting = set(missing)
+        futures = set()
+        if missing:
+            pool = self._pool()
+            futures = {pool.submit(_extract_pages, os.path.abspath(path), missing[i:i + self.pages_per_task])
+                       for i in range(0, len(missing), self.pages_per_task)}
+        try:
+            for number in range(first, last + 1):
+                key = f"page:{number}"
+                while key not in book:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    with book.batch():
+                        for future in done:
+                            for n, text in future.result():
+                                book[f"page:{n}"] = text
+                                self.pages_extracted += 1
+                if number not in extracting:
+                    self.pages_cached += 1
+                yield number, book[key]
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def chapters(self, path, max_chars=CHAPTER_CHARS):
+        """
+        Yields the book as Chapters of at most 'max_chars' (a longer page
+        stays whole), following its top-level bookmarks when it has
+        some. Pages without a text layer (scans) are skipped, and so is a
+        chapter left with no text at all.
+        """
+        book = self.book(path)
+        info = book["info"]
+        starts = info["outline"] if len(info["outline"]) > 1 else []
+        if starts and starts[0][1] > 0:
+            starts = [(None, 0)] + starts
+        sections = {page: title for title, page in starts}
+
+        number = 0
+        title, part, first, text, size = None, 0, 0, [], 0
+        for page, page_text in self.pages(path):
+            if text and (page in sections or size + len(page_text) > max_chars):
+                number += 1
+                yield Chapter(number, _chapter_title(title, part, first, page - 1), first, page - 1,
+                              "\n\n".join(text))
+                text, size = [], 0
+            if page in sections:
+                title, part = sections[page], 0
+            if page_text:
+                if not text:
+                    first, part = page, part + 1
+                text.append(page_text)
+                size += len(page_text)
+        if text:
+            last = info["pages"] - 1
+            number += 1
+            yield Chapter(number, _chapter_title(title, part, first, last), first, last, "\n\n".join(text))
+
+    def resources(self, path, chapters=None, max_chars=CHAPTER_CHARS):
+        """
+        Text resources for the given chapter numbers (all by default).
+        """
+        wanted = set(chapters) if chapters else None
+        resources = []
+        for chapter in self.chapters(path, max_chars):
+            if wanted is None or chapter.number in wanted:
+                resources.append(chapter.resource())
+                if wanted and len(resources) == len(wanted):
+                    break
+        return resources
+
+    def _pool(self):
+        with self.lock:
+            if PdfReader is None:
+                raise ImportError("extracting PDF text needs pypdf")
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(self.workers)
+            return self.pool
+
+    def close(self):
+        with self.lock:
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+                self.pool = None
+            for book in self.books.values():
+                book.close()
+            self.books.clear()
+            self.files.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _chapter_title(title, part, first, last):
+    if title is None:
+        return f"Pages {first + 1}-{last + 1}"
+    return f"{title} (part {part})" if part > 1 else title
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_pdf_text():
+    """
+    One PdfText (and pool) for the whole process.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = PdfText()
+        return _shared
+
+
+# --------------------------------------------------------------------
+# Command line: python pdf_extract.py [book.pdf or directory]
+# --------------------------------------------------------------------
+def main(target=ASSETS_DIR):
+    paths = [target] if os.path.isfile(target) else sorted(
+        os.path.join(target, n) for n in os.listdir(target) if n.lower().endswith(".pdf"))
+    with PdfText() as pdfs:
+        start = time.perf_counter()
+        for path in paths:
+            try:
+                chapters = list(pdfs.chapters(path))
+            except (ValueError, ImportError) as e:
+                print("[ERROR]", e)
+                continue
+            chars = sum(len(c.text) for c in chapters)
+            print(f"{len(chapters):4d} chapters {chars / 1000:8.0f}k chars  {os.path.basename(path)}")
+        print(f"{pdfs.pages_extracted} pages extracted, {pdfs.pages_cached} from cache "
+              f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,227 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from journal_store import JournalStore
+from mp3_index import index_path
+from transcode import default_encoder, encode_stream
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+PODCAST_DIR = "../podcasts"
+MANIFEST_FILE = "manifest.jsonl"
+BLOB_DIR = "blobs"
+AUDIO_EXTENSIONS = (".mp3", ".wav")
+MAX_VERSIONS = 5  # earlier blobs remembered per title when an episode is regenerated
+
+
+class BlobWriter:
+    """
+    Receives one payload, hashing it as it is written to a temp file
+    inside the store. PodcastStore.writer() commits or discards it.
+    """
+
+    def __init__(self, tmp_dir):
+        self.file = tempfile.NamedTemporaryFile(dir=tmp_dir, suffix=".part", delete=False)
+        self.hash = hashlib.sha256()
+        self.size = 0
+        self.entry = None  # manifest entry, once committed
+
+    def write(self, data):
+        self.hash.update(data)
+        self.file.write(data)
+        self.size += len(data)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.file.name):
+            os.remove(self.file.name)
+
+
+class PodcastStore:
+    """
+    Content-addressed episode audio.
+
+    Payloads are stored once under blobs/<2 hex>/<sha256><ext>, hashed
+    while they stream in, so regenerating an episode that comes out
+    byte-identical costs no disk. Titles live in a JournalStore manifest
+    ("manifest.jsonl") mapping each title to its blob, so lookups and
+    listings come from memory and never scan the directory:
+
+        "episode:<title>" -> {"title", "sha256", "ext", "size", "added", "versions"}
+
+    Usage:
+        store = PodcastStore()
+        with store.writer("Atoms and Molecules", ".mp3") as blob:
+            for chunk in chunks:
+                blob.write(chunk)
+        store.path("Atoms and Molecules")  # -> ../podcasts/blobs/3f/3f2a...mp3
+    """
+
+    def __init__(self, root=PODCAST_DIR):
+        self.root = root
+        self.blob_dir = os.path.join(root, BLOB_DIR)
+        self.tmp_dir = os.path.join(root, BLOB_DIR, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.manifest = JournalStore(os.path.join(root, MANIFEST_FILE))
+
+    @staticmethod
+    def key(title):
+        return f"episode:{title}"
+
+    def blob_path(self, sha256, ext):
+        return os.path.join(self.blob_dir, sha256[:2], f"{sha256}{ext}")
+
+    # ----------------------------------------------------------------
+    # Adding
+    # ----------------------------------------------------------------
+    @contextmanager
+    def writer(self, title, ext=".mp3"):
+        """
+        Yields a BlobWriter. On a clean exit the payload becomes a blob
+        (or is dropped if that blob already exists) and 'title' points
+        to it; on an exception nothing is recorded.
+        """
+        blob = BlobWriter(self.tmp_dir)
+        try:
+            yield blob
+            blob.close()
+            blob.entry = self._commit(blob, title, ext)
+        except BaseException:
+            blob.discard()
+            raise
+
+    def _commit(self, blob, title, ext):
+        sha256 = blob.hash.hexdigest()
+        path = self.blob_path(sha256, ext)
+        if os.path.exists(path):
+            os.remove(blob.file.name)  # identical payload already stored
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(blob.file.name, path)
+
+        previous = self.lookup(title)
+        versions = []
+        if previous and previous["sha256"] != sha256:
+            versions = ([{"sha256": previous["sha256"], "ext": previous["ext"], "added": previous["added"]}]
+                        + previous.get("versions", []))[:MAX_VERSIONS]
+        elif previous:
+            versions = previous.get("versions", [])
+        entry = {"title": title, "sha256": sha256, "ext": ext, "size": blob.size,
+                 "added": time.time(), "versions": versions}
+        self.manifest[self.key(title)] = entry
+        return entry
+
+    def add_stream(self, chunks, title, ext=".mp3"):
+        with self.writer(title, ext) as blob:
+            for chunk in chunks:
+                blob.write(chunk)
+        return blob.entry
+
+    def add_file(self, path, title=None):
+        """
+        Copies an existing audio file into the store, titled after its
+        name unless 'title' is given.
+        """
+        stem, ext = os.path.splitext(os.path.basename(path))
+        with open(path, "rb") as f:
+            return self.add_stream(iter(lambda: f.read(1024 * 1024), b""), title or stem, ext.lower())
+
+    def import_directory(self, directory=None):
+        """
+        Adds the loose audio files of 'directory' (the store root by
+        default) whose titles are not in the manifest yet, e.g. episodes
+        saved before the store existed. Returns the number imported.
+        """
+        directory = directory or self.root
+        imported = 0
+        for entry in os.scandir(directory):
+            stem, ext = os.path.splitext(entry.name)
+            if entry.is_file() and ext.lower() in AUDIO_EXTENSIONS and self.lookup(stem) is None:
+                self.add_file(entry.path)
+                imported += 1
+        return imported
+
+    # ----------------------------------------------------------------
+    # Lookup
+    # ----------------------------------------------------------------
+    def lookup(self, title):
+        return self.manifest.get(self.key(title))
+
+    def path(self, title):
+        entry = self.lookup(title)
+        return self.blob_path(entry["sha256"], entry["ext"]) if entry else None
+
+    def episodes(self):
+        """
+        Every manifest entry, newest first.
+        """
+        entries = [value for key, value in self.manifest.items() if key.startswith("episode:")]
+        return sorted(entries, key=lambda e: e["added"], reverse=True)
+
+    def remove(self, title):
+        """
+        Drops 'title' from the manifest; its blob is deleted once no
+        other title or kept version refers to it.
+        """
+        entry = self.lookup(title)
+        if entry is None:
+            return False
+        del self.manifest[self.key(title)]
+        in_use = set()
+        for other in self.episodes():
+            in_use.add((other["sha256"], other["ext"]))
+            in_use.update((v["sha256"], v["ext"]) for v in other.get("versions", []))
+        for blob in [entry] + entry.get("versions", []):
+            if (blob["sha256"], blob["ext"]) not in in_use:
+                path = self.blob_path(blob["sha256"], blob["ext"])
+                for stale in (path, index_path(path)):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+        return True
+
+    def close(self):
+        self.manifest.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(root=PODCAST_DIR):
+    """
+    One PodcastStore per directory for the whole process.
+    """
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = PodcastStore(root)
+        return store
+
+
+def store_audio_stream(chunks, title, encoder=None, store=None):
+    """
+    Saves a downloaded WAV stream into the podcast store, encoded on the
+    fly (default_encoder() if 'encoder' is None; kept as WAV when no
+    encoder is available). Returns the blob's path.
+    """
+    store = store or get_store()
+    encoder = encoder or default_encoder()
+    ext = encoder.extension if encoder else ".wav"
+    with store.writer(title, ext) as blob:
+        if encoder is None:
+            for chunk in chunks:
+                blob.write(chunk)
+        else:
+            encode_stream(chunks, encoder, blob.write)
+    return store.blob_path(blob.entry["sha256"], ext)
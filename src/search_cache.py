@@ -0,0 +1,166 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+DEFAULT_TTL = 7 * 24 * 3600   # seconds a cached search stays valid
+DEFAULT_MAX_ENTRIES = 50000   # least recently used entries beyond this are evicted
+TOUCH_INTERVAL = 60           # only rewrite 'accessed' if it is older than this
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    key      TEXT PRIMARY KEY,
+    value    TEXT NOT NULL,
+    expires  REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_cache_accessed ON search_cache (accessed);
+CREATE INDEX IF NOT EXISTS search_cache_expires ON search_cache (expires);
+CREATE TABLE IF NOT EXISTS cache_meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SearchCache:
+    """
+    On-disk search cache backed by SQLite.
+
+    - Keyed lookups go through the primary-key index, so they cost the same
+      with 100 or 100,000 cached queries (no whole-file load or rewrite).
+    - Every entry has an expiry time; expired entries read as misses.
+    - The table is bounded to 'max_entries'; the least recently used
+      entries are evicted first.
+    - WAL mode lets several processes read while one writes.
+
+    Usage:
+        cache = SearchCache("libgen_cache.sqlite3")
+        results = cache.get(query)
+        if results is None:
+            results = ...
+            cache.set(query, results)
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.count = self.conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, expires, accessed FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return default
+            value, expires, accessed = row
+            if expires <= now:
+                self.conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                self.count -= 1
+                return default
+            if now - accessed > TOUCH_INTERVAL:
+                self.conn.execute("UPDATE search_cache SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                exists = self.conn.execute(
+                    "SELECT 1 FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), expires, now),
+                )
+                if not exists:
+                    self.count += 1
+                if self.count > self.max_entries:
+                    self._evict()
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self):
+        """
+        Drops the least recently used entries so the table is back under
+        max_entries, with ~1% headroom so eviction doesn't run on every
+        insert. Runs inside the caller's transaction.
+        """
+        self.count = self.conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+        excess = self.count - self.max_entries
+        if excess > 0:
+            excess += self.max_entries // 100
+            self.conn.execute(
+                "DELETE FROM search_cache WHERE key IN "
+                "(SELECT key FROM search_cache ORDER BY accessed LIMIT ?)", (excess,)
+            )
+            self.count = max(0, self.count - excess)
+
+    def purge_expired(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM search_cache WHERE expires <= ?", (time.time(),))
+            self.count = self.conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # ----------------------------------------------------------------
+    # One-time import of the old JSON cache
+    # ----------------------------------------------------------------
+    def import_json(self, json_path, key_func=None):
+        """
+        Copies every entry of an old '{query: results}' JSON cache file into
+        the table, once. Returns the number of entries imported (0 if the
+        file is missing or was already imported).
+        """
+        if not os.path.exists(json_path):
+            return 0
+        marker = "imported:" + os.path.abspath(json_path)
+        with self.lock:
+            done = self.conn.execute("SELECT 1 FROM cache_meta WHERE name = ?", (marker,)).fetchone()
+        if done:
+            return 0
+
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        now = time.time()
+        rows = [((key_func(k) if key_func else k), json.dumps(v), now + self.ttl, now) for k, v in data.items()]
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO search_cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)", rows
+                )
+                self.conn.execute("INSERT OR REPLACE INTO cache_meta (name, value) VALUES (?, ?)", (marker, str(now)))
+                self.count = self.conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+                if self.count > self.max_entries:
+                    self._evict()
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(rows)
@@ -0,0 +1,149 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from http_client import get_client
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+MIN_INTERVAL = 1.0    # seconds; polling gets this fast right before completion
+MAX_INTERVAL = 30.0   # seconds; jobs that barely started are polled this slowly
+ETA_FRACTION = 0.5    # next poll after this share of the estimated time left
+JITTER = 0.2          # +/- 20% so jobs started together do not poll in lockstep
+MAX_ERRORS = 3        # consecutive failed status calls before a job is given up
+HTTP_WORKERS = 4      # blocking HTTP calls in flight at once (one shared pool)
+
+
+def next_delay(history, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, eta_fraction=ETA_FRACTION):
+    """
+    Seconds until the next status call, from the job's (time, status)
+    samples, oldest first. Status runs from 0 to 100.
+
+    Once the status has moved, the remaining time is estimated from the
+    average rate so far and the next poll lands 'eta_fraction' of the way
+    there, so the interval shrinks as the job nears 100. Before that, the
+    interval is scaled by how much is left: a job at 0 waits max_interval.
+    """
+    now, status = history[-1]
+    first_time, first_status = history[0]
+    remaining = 100 - status
+    if status > first_status and now > first_time:
+        rate = (status - first_status) / (now - first_time)
+        delay = remaining / rate * eta_fraction
+    else:
+        delay = max_interval * remaining / 100
+    return min(max(delay, min_interval), max_interval)
+
+
+class Job:
+    def __init__(self, request_id, on_complete):
+        self.request_id = request_id
+        self.on_complete = on_complete
+        self.history = []  # (monotonic time, status)
+        self.polls = 0
+        self.errors = 0
+
+
+class StatusPoller:
+    """
+    Tracks many AutoContent requests from one asyncio event loop.
+
+    Every job sleeps on the loop between status calls, for a delay that
+    follows its progress (next_delay) plus jitter. The HTTP calls are
+    blocking requests calls on the shared "autocontent" HttpClient, so
+    they run on a small executor and reuse its keep-alive connections.
+    When a job reaches status 100, its on_complete(request_id, data) runs
+    straight away in a thread of its own (asyncio.to_thread), e.g. to
+    download the audio, so a long download never holds up the other
+    jobs' status calls.
+
+    Usage:
+        poller = StatusPoller(status_base_url, headers)
+        results = poller.run(request_ids, on_complete=download)  # blocking
+        # or, inside a running loop:
+        result = await poller.track(request_id, on_complete=download)
+    """
+
+    def __init__(self, status_base_url, headers, client=None, min_interval=MIN_INTERVAL,
+                 max_interval=MAX_INTERVAL, jitter=JITTER, max_workers=HTTP_WORKERS, rng=None):
+        self.status_base_url = status_base_url
+        self.headers = headers
+        self.client = client or get_client('autocontent')
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="status-poll")
+        self.calls = 0  # status calls made, for reporting
+
+    def delay_for(self, job):
+        delay = next_delay(job.history, self.min_interval, self.max_interval)
+        return delay * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _get_status(self, request_id):
+        response = self.client.get(f'{self.status_base_url}{request_id}', headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def track(self, request_id, on_complete=None):
+        """
+        Polls one request until it completes or fails. Returns
+        on_complete(request_id, data) (or the final status data if there
+        is no callback), or None if the job failed.
+        """
+        job = Job(request_id, on_complete)
+        while True:
+            try:
+                self.calls += 1
+                job.polls += 1
+                data = await self._call(self._get_status, request_id)
+            except Exception as e:
+                job.errors += 1
+                print(f'[{request_id}] Status check failed ({job.errors}/{MAX_ERRORS}):', e)
+                if job.errors >= MAX_ERRORS:
+                    return None
+                await asyncio.sleep(self.max_interval * self.rng.uniform(1 - self.jitter, 1 + self.jitter))
+                continue
+            job.errors = 0
+
+            if data.get('error_message'):
+                print(f'[{request_id}] Error from status check:', data['error_message'])
+                return None
+
+            status = int(data.get('status') or 0)
+            if status >= 100:
+                print(f'[{request_id}] Content creation complete after {job.polls} status calls')
+                if on_complete is None:
+                    return data
+                return await asyncio.to_thread(on_complete, request_id, data)
+
+            job.history.append((time.monotonic(), status))
+            delay = self.delay_for(job)
+            print(f'[{request_id}] Current status: {status}. Next check in {delay:.1f}s')
+            await asyncio.sleep(delay)
+
+    async def track_all(self, request_ids, on_complete=None):
+        results = await asyncio.gather(*(self.track(r, on_complete) for r in request_ids),
+                                       return_exceptions=True)
+        out = {}
+        for request_id, result in zip(request_ids, results):
+            if isinstance(result, Exception):
+                print(f'[{request_id}] Completion handler failed:', result)
+                result = None
+            out[request_id] = result
+        return out
+
+    def run(self, request_ids, on_complete=None):
+        """
+        Blocking entry point: tracks every request id on a fresh event
+        loop and returns {request_id: result}.
+        """
+        return asyncio.run(self.track_all(list(request_ids), on_complete))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
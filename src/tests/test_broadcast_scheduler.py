@@ -0,0 +1,99 @@
+import os
+import random
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from broadcast_scheduler import FILLER, HIGH, NORMAL, URGENT, BroadcastScheduler, _Fenwick
+
+START = 1_700_000_000.0
+
+
+def walk_start(scheduler, channel, item_id):
+    # air time by walking the queue in play order
+    for start, _, item in scheduler.upcoming(channel, len(scheduler)):
+        if item.item_id == item_id:
+            return start
+    raise KeyError(item_id)
+
+
+def test_fenwick_prefix_sums():
+    rng = random.Random(3)
+    sums, values = _Fenwick(), []
+    for _ in range(500):
+        if values and rng.random() < 0.3:
+            i = rng.randrange(len(values))
+            delta = rng.randint(-50, 50)
+            sums.add(i, delta)
+            values[i] += delta
+        else:
+            values.append(rng.randint(0, 1000))
+            sums.append(values[-1])
+        i = rng.randrange(len(values) + 1)
+        assert sums.prefix(i) == sum(values[:i])
+
+
+def test_air_times_follow_priority_and_duration():
+    scheduler = BroadcastScheduler(probe=None, now=START)
+    scheduler.add_channel("fm", START)
+    a = scheduler.enqueue("fm", "a", 600)
+    b = scheduler.enqueue("fm", "b", 300)
+    filler = scheduler.enqueue("fm", "jingle", 30, priority=FILLER)
+    high = scheduler.enqueue("fm", "news", 120, priority=HIGH)
+    urgent = scheduler.urgent("fm", "storm warning", 90)
+
+    assert [item for _, _, item in scheduler.upcoming("fm")] == [urgent, high, a, b, filler]
+    assert scheduler.air_time(urgent.item_id) == START
+    assert scheduler.air_time(a.item_id) == START + 210
+    assert scheduler.air_time(filler.item_id) == START + 1110
+
+    assert scheduler.cancel(a.item_id)
+    assert scheduler.air_time(b.item_id) == START + 210
+    assert scheduler.air_time(filler.item_id) == START + 510
+
+
+def test_air_times_match_queue_walk_under_churn():
+    rng = random.Random(5)
+    scheduler = BroadcastScheduler(probe=None, now=START)
+    for name in ("a", "b", "c"):
+        scheduler.add_channel(name, START)
+    now = START
+    for step in range(400):
+        name = rng.choice("abc")
+        action = rng.random()
+        if action < 0.6:
+            scheduler.enqueue(name, "ep", rng.randint(1, 3600) / 10, priority=rng.choice((URGENT, HIGH, NORMAL)))
+        elif action < 0.8 and len(scheduler):
+            scheduler.cancel(rng.choice(list(scheduler.items)))
+        else:
+            now += rng.randint(0, 900)
+            for channel, item, start, end in scheduler.advance(now):
+                assert start <= now and round((end - start) * 1000) == item.duration_ms
+        for item_id, item in list(scheduler.items.items())[:20]:
+            assert scheduler.air_time(item_id) == walk_start(scheduler, item.channel, item_id)
+
+
+def test_journal_round_trip(tmp_path):
+    state_path = str(tmp_path / "schedule.jsonl")
+    scheduler = BroadcastScheduler(state_path, probe=None, now=START)
+    scheduler.add_channel("fm", START)
+    first = scheduler.enqueue("fm", "first", 600)
+    second = scheduler.enqueue("fm", "second", 300)
+    bulletin = scheduler.urgent("fm", "bulletin", 60)
+    assert [item.item_id for _, item, _, _ in scheduler.advance(START + 100)] == [bulletin.item_id, first.item_id]
+    expected = {item_id: scheduler.air_time(item_id) for item_id in scheduler.items}
+    scheduler.close()
+
+    reopened = BroadcastScheduler(state_path, probe=None, now=START + 100)
+    assert {item_id: reopened.air_time(item_id) for item_id in reopened.items} == expected
+    assert reopened.air_time(second.item_id) == START + 660
+
+    playing = reopened.now_playing("fm")
+    assert (playing.item_id, playing.episode) == (first.item_id, "first")
+    item, start_ms, end_ms = reopened.channels["fm"].on_air
+    assert (start_ms, end_ms) == (int(START * 1000) + 60000, int(START * 1000) + 660000)
+
+    # the next item is numbered after everything journalled
+    assert reopened.enqueue("fm", "third", 10).seq > second.seq
+    reopened.close()
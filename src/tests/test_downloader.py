@@ -0,0 +1,92 @@
+import hashlib
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "benchmarks"))
+
+import downloader
+from downloader import PartFile, download_file, download_stream, new_meta, probe_download
+from range_server import RangeServer
+
+FILE_SIZE = 256 * 1024
+
+
+def sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@pytest.fixture
+def served(tmp_path):
+    root = tmp_path / "served"
+    root.mkdir()
+    (root / "book.pdf").write_bytes(os.urandom(FILE_SIZE))
+    return root
+
+
+def test_segmented_download(served, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, "MIN_SEGMENT_SIZE", 16 * 1024)
+    calls = []
+    segmented = downloader.download_segmented
+
+    def spy(url, part, meta, segments, progress_callback=None):
+        calls.append(segments)
+        return segmented(url, part, meta, segments, progress_callback)
+
+    monkeypatch.setattr(downloader, "download_segmented", spy)
+    out_path = str(tmp_path / "book.pdf")
+    with RangeServer(served) as server:
+        assert download_file(server.url("book.pdf"), out_path, segments=4)
+
+    assert calls == [4]
+    assert sha256(out_path) == sha256(served / "book.pdf")
+    assert not os.path.exists(out_path + ".part")
+    assert not os.path.exists(out_path + ".part.json")
+
+
+def test_server_ignoring_ranges_falls_back_to_one_stream(served, tmp_path, monkeypatch):
+    # The HEAD claims range support, but every GET answers 200 with the whole file
+    monkeypatch.setattr(downloader, "MIN_SEGMENT_SIZE", 16 * 1024)
+    probe = downloader.probe_download
+    monkeypatch.setattr(downloader, "probe_download", lambda url: dict(probe(url), accepts_ranges=True))
+    out_path = str(tmp_path / "book.pdf")
+    with RangeServer(served, accept_ranges=False) as server:
+        assert download_file(server.url("book.pdf"), out_path, segments=4)
+
+    assert sha256(out_path) == sha256(served / "book.pdf")
+
+
+def test_if_range_mismatch_restarts_from_scratch(served, tmp_path):
+    part = PartFile(str(tmp_path / "book.pdf"))
+    with open(part.path, "wb") as f:
+        f.write(b"\0" * 1000)
+    with RangeServer(served) as server:
+        url = server.url("book.pdf")
+        meta = dict(new_meta(url, probe_download(url)), etag='"stale"', bytes_written=1000)
+        download_stream(url, part, meta)
+
+    assert sha256(part.path) == sha256(served / "book.pdf")
+
+
+def test_resume_interrupted_part(served, tmp_path):
+    data = (served / "book.pdf").read_bytes()
+    out_path = str(tmp_path / "book.pdf")
+    part = PartFile(out_path)
+    half = FILE_SIZE // 2
+    with open(part.path, "wb") as f:
+        f.write(data[:half])
+
+    progress = []
+    with RangeServer(served) as server:
+        url = server.url("book.pdf")
+        part.save(dict(new_meta(url, probe_download(url)), bytes_written=half))
+        assert download_file(url, out_path, progress_callback=lambda done, total: progress.append(done),
+                             segments=1)
+
+    assert sha256(out_path) == hashlib.sha256(data).hexdigest()
+    assert progress[0] > half  # only the missing half was fetched
+    assert not os.path.exists(part.meta_path)
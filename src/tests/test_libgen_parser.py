@@ -0,0 +1,129 @@
+import os
+import random
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "benchmarks"))
+
+from libgen_parser import parse_get_link, parse_libgen_li_link, parse_search_results, parse_search_table
+
+FIXTURES = os.path.join(os.path.dirname(HERE), "benchmarks", "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_search_table_rows():
+    books = parse_search_table(read_fixture("search_chemistry.html"))
+    assert len(books) == 25
+    assert books[0] == {
+        "id": "1000", "author": "De Cuyper M., Bulte J.W.M. (Eds.)",
+        "title": "Physics and Chemistry Basis of Biotechnology9780347712782", "publisher": "Pearson",
+        "year": "2015", "pages": "198", "language": "English", "size": "10 Mb", "extension": "pdf",
+        "mirror1": "http://library.lol/main/9F918FE54C496F8385406830545EA8FA",
+        "mirror2": "http://libgen.li/ads.php?md5=9F918FE54C496F8385406830545EA8FA",
+    }
+    assert books[-1] == {
+        "id": "1888", "author": "Sergey Bolotov", "title": "Marine Chemistry9780654781117",
+        "publisher": "Oxford University Press", "year": "1998", "pages": "1155", "language": "English",
+        "size": "80 Mb", "extension": "pdf",
+        "mirror1": "http://library.lol/main/589EA8FA8D39AF333FF282DCE45F9B9E",
+        "mirror2": "http://libgen.li/ads.php?md5=589EA8FA8D39AF333FF282DCE45F9B9E",
+    }
+    assert len({book["id"] for book in books}) == 25
+
+
+def test_search_table_applies_fix_url():
+    books = parse_search_table(read_fixture("search_chemistry.html"), fix_url=lambda url: url and url.upper())
+    assert books[0]["mirror1"] == "HTTP://LIBRARY.LOL/MAIN/9F918FE54C496F8385406830545EA8FA"
+
+
+def test_search_table_without_results():
+    assert parse_search_table("<html><body><table></table></body></html>") == []
+    assert parse_search_table(b"") == []
+
+
+def test_search_table_matches_beautifulsoup():
+    # the BeautifulSoup code parse_search_table replaced, on the recorded
+    # page and its edge-case variants
+    bench = pytest.importorskip("bench_html_extract")
+    mismatched = [name for name, html in bench.search_variants(read_fixture("search_chemistry.html"))
+                  if parse_search_table(html, bench.fix_url) != bench.reference_search_page(html)]
+    assert mismatched == []
+
+
+# Markup spliced at random into the recorded page; each one is a case
+# html.parser and BeautifulSoup handle specially
+MUTATIONS = [
+    "<![CDATA[x]]>", "<![CDATA[ y ]]>", "<!-- c -->", " <!-- c --> ", "<!---->", "<!--", "<!>", "<![if !IE]>",
+    "<?pi x?>", "<!DOCTYPE x>", "&amp;", "&amp", "&AMP;", "&nbsp;", "&notin", "&notit;", "&bogus;", "&", "&#65;",
+    "&#x41;", "&#0;", "&#128;", "&#xD800;", "&#x110000;", " < ", "<>", "</>", "</ x>", "</p>", "</div>", "</td>",
+    "<td>", "<TD>", "</tr>", "<tr>", "<table>", "</table>", "<b>", "</b>", "<br/>", "<p>", "<img src=a/>",
+    "<a href=x>q</a>", "<a href='&amp;x'>q</a>", "<a b=c=d>", "<x y='1'z>", "<select>", "<option>",
+    "<script>x</script>", "<style>y</style>", "<ruby>r<rt>t</rt></ruby>", "\n", "  ", "\r\n", "\x00",
+]
+
+
+def test_search_table_matches_beautifulsoup_on_mutated_pages():
+    bench = pytest.importorskip("bench_html_extract")
+    html = read_fixture("search_chemistry.html")
+
+    def outcome(parse, page):
+        try:
+            return parse(page)
+        except Exception as e:  # the page may break both the same way
+            return type(e)
+
+    rng = random.Random(12)
+    mismatched = []
+    for _ in range(250):
+        page = html
+        for _ in range(rng.randint(1, 4)):
+            i = rng.randrange(len(page))
+            page = page[:i] + rng.choice(MUTATIONS) + page[i:]
+        if outcome(lambda h: parse_search_table(h, bench.fix_url), page) != \
+                outcome(bench.reference_search_page, page):
+            mismatched.append(page)
+    assert mismatched == []
+
+
+def test_search_table_text_like_beautifulsoup():
+    def cell(markup):
+        row = f"<tr><td>{markup}</td>" + "<td>x</td>" * 10 + "</tr>"
+        return parse_search_table("<table></table>" * 2 + f"<table>{row}{row}</table>")[0]["id"]
+
+    assert cell("Prentic<![CDATA[x]]>e Hall") == "Prenticxe Hall"
+    assert cell("Oxford Un <!-- c --> iversity") == "Oxford University"
+    assert cell("a &notin b &notit; c &bogus; &#128;&#0;") == "a \u2209 b &notit c &bogus €\ufffd"
+    assert cell("Mo&notinore") == "Mo&notinore"
+    assert cell("kanji<rt>reading</rt>") == "kanji"
+
+
+def test_search_results_like_cheerio_script():
+    books = parse_search_results(read_fixture("search_chemistry.html"))
+    assert len(books) == 26  # the header row counts, as in the Node script
+    assert books[0]["title"] == "title"
+    assert books[1] == {
+        "title": "physics and chemistry basis of biotechnology 9780347712782",
+        "author": "de cuyper m., bulte j.w.m. (eds.)", "year": "2015", "publisher": "Pearson",
+        "format": "pdf", "size": "10 Mb", "link": "book/index.php?md5=9F918FE54C496F8385406830545EA8FA",
+    }
+
+
+def test_download_links():
+    assert parse_libgen_li_link(read_fixture("detail_book.html")) == \
+        "http://libgen.li/ads.php?md5=9F918FE54C496F8385406830545EA8FA"
+    assert parse_get_link(read_fixture("ads_libgen_li.html")) == \
+        "get.php?md5=9f918fe54c496f8385406830545ea8fa&key=4CGZ8HDQ7UZ9KW2C"
+
+
+def test_get_link_joins_every_h2():
+    # cheerio's $(a).find('h2').text() concatenates all matches
+    html = "<table><tr><td><a href='x'><h2>GE</h2><h2>T</h2></a><a href='y'><h2>GET</h2></a></td></tr></table>"
+    assert parse_get_link(html) == "x"
+    assert parse_get_link("<table><tr><td><a href='x'><h2>GET</h2><h2>!</h2></a></td></tr></table>") is None
@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mirror_stats import HEDGE_DELAY, MirrorStats
+
+DEAD = "http://dead.example/main/1"
+SLOW = "http://slow.example/main/1"
+FAST = "http://fast.example/main/1"
+
+
+def test_fast_failing_host_ranks_below_slow_healthy_one(tmp_path):
+    stats = MirrorStats(str(tmp_path / "mirror_stats.json"))
+    for _ in range(3):
+        stats.record(DEAD, 0.05, ok=False)   # connection refused right away
+        stats.record(SLOW, 1.0, ok=True)
+    assert stats.rank([DEAD, SLOW]) == [SLOW, DEAD]
+    assert stats.score(DEAD) > stats.score(SLOW)
+
+
+def test_one_failure_does_not_bury_a_fast_host(tmp_path):
+    stats = MirrorStats(str(tmp_path / "mirror_stats.json"))
+    for _ in range(5):
+        stats.record(FAST, 0.2, ok=True)
+        stats.record(SLOW, 3.0, ok=True)
+    stats.record(FAST, 0.01, ok=False)
+    assert stats.rank([SLOW, FAST]) == [FAST, SLOW]
+
+
+def test_failures_leave_latency_alone(tmp_path):
+    stats = MirrorStats(str(tmp_path / "mirror_stats.json"))
+    stats.record(SLOW, 1.0, ok=True)
+    stats.record(SLOW, 0.01, ok=False)
+    assert stats.hedge_delay(SLOW) == 1.0
+    stats.record(DEAD, 0.01, ok=False)
+    assert stats.hedge_delay(DEAD) == HEDGE_DELAY
+
+
+def test_unknown_hosts_rank_first_and_history_persists(tmp_path):
+    path = str(tmp_path / "mirror_stats.json")
+    stats = MirrorStats(path)
+    stats.record(SLOW, 1.0, ok=True)
+    assert MirrorStats(path).rank([SLOW, FAST]) == [FAST, SLOW]
@@ -0,0 +1,49 @@
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from mp3_index import build_index, load_index
+
+# MPEG-1 layer III, 128 kbps, 44.1 kHz, no padding: 417-byte frames
+HEADER = bytes.fromhex("fffb9000")
+FRAME = HEADER + b"\0" * 413
+FRAME_SECONDS = 1152 / 44100
+JUNK = b"\xff\x00junk" * 100
+
+
+def write_mp3(path, frames, junk_after=None):
+    with open(path, "wb") as f:
+        for i in range(frames):
+            f.write(FRAME)
+            if i == junk_after:
+                f.write(JUNK)
+    return str(path)
+
+
+def test_frames_and_seek_offsets(tmp_path):
+    index = build_index(write_mp3(tmp_path / "a.mp3", 200))
+    assert index.frame_count == 200
+    assert abs(index.duration - 200 * FRAME_SECONDS) < 1e-9
+    assert index.offset_at(0) == 0
+    assert index.offset_at(70.5 * FRAME_SECONDS) == 70 * len(FRAME)
+
+
+def test_seek_past_junk_mid_stream(tmp_path):
+    path = write_mp3(tmp_path / "a.mp3", 200, junk_after=99)
+    index = build_index(path)
+    assert index.frame_count == 200
+
+    # frame 110 is reached from the seek table entry for frame 96, across the junk
+    assert index.offset_at(110.5 * FRAME_SECONDS) == 110 * len(FRAME) + len(JUNK)
+    assert index.offset_at(99.5 * FRAME_SECONDS) == 99 * len(FRAME)
+    assert index.offset_at(100.5 * FRAME_SECONDS) == 100 * len(FRAME) + len(JUNK)
+
+
+def test_index_cache_round_trip(tmp_path):
+    path = write_mp3(tmp_path / "a.mp3", 100)
+    built = load_index(path)
+    assert os.path.exists(path + ".idx")
+    cached = load_index(path)
+    assert (cached.frame_count, list(cached.offsets)) == (built.frame_count, list(built.offsets))
@@ -0,0 +1,81 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import transcode
+from transcode import Encoder, StubEncoder, TranscodeError, encode_stream, save_audio_stream, transcode_stream
+
+DATA = bytes(range(256)) * 1024  # 256 KB
+
+
+def chunks(data=DATA, size=10000):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+def stub_output(data, ratio):
+    # the stub keeps every ratio-th byte of each 64 KB block it reads
+    return b"".join(data[i:i + 65536][::ratio] for i in range(0, len(data), 65536))
+
+
+class FailingEncoder(Encoder):
+    name = "failing"
+
+    def command(self):
+        return [sys.executable, "-c", "import sys; sys.stdin.buffer.read(); sys.stderr.write('bad input'); sys.exit(3)"]
+
+
+def test_encode_stream_through_stub():
+    blocks = []
+    fed, written = encode_stream(chunks(), StubEncoder(ratio=4), blocks.append)
+    assert fed == len(DATA)
+    assert b"".join(blocks) == stub_output(DATA, 4)
+    assert written == sum(len(block) for block in blocks)
+
+
+def test_transcode_stream_replaces_out_path(tmp_path):
+    out_path = str(tmp_path / "episode.mp3")
+    fed, written = transcode_stream(chunks(), out_path, StubEncoder())
+    assert (fed, written) == (len(DATA), os.path.getsize(out_path))
+    assert 0 < written < len(DATA)
+    assert not os.path.exists(out_path + ".part")
+
+
+def test_encoder_failure_raises_and_removes_part(tmp_path):
+    out_path = str(tmp_path / "episode.mp3")
+    with pytest.raises(TranscodeError, match="exited with 3: bad input"):
+        transcode_stream(chunks(), out_path, FailingEncoder())
+    assert os.listdir(tmp_path) == []
+
+
+def test_feeder_error_is_raised(tmp_path):
+    def broken_download():
+        yield DATA[:10000]
+        raise ConnectionError("connection reset")
+
+    out_path = str(tmp_path / "episode.mp3")
+    with pytest.raises(ConnectionError, match="connection reset"):
+        transcode_stream(broken_download(), out_path, StubEncoder())
+    assert os.listdir(tmp_path) == []
+
+
+def test_wav_fallback_without_ffmpeg(tmp_path, monkeypatch):
+    monkeypatch.delenv(transcode.ENCODER_ENV, raising=False)
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+    assert transcode.default_encoder() is None
+
+    file_path = save_audio_stream(chunks(), str(tmp_path), "episode")
+    assert file_path == str(tmp_path / "episode.wav")
+    with open(file_path, "rb") as f:
+        assert f.read() == DATA
+
+
+def test_encoder_from_environment(monkeypatch):
+    monkeypatch.setenv(transcode.ENCODER_ENV, "stub")
+    assert isinstance(transcode.default_encoder(), StubEncoder)
+    monkeypatch.setenv(transcode.ENCODER_ENV, "none")
+    assert transcode.default_encoder() is None
@@ -0,0 +1,99 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from virtual_list import VirtualList, window_slots
+
+ROW_HEIGHT = 50
+VIEW_HEIGHT = 200
+
+
+class StubCanvas:
+    """The few Canvas calls VirtualList makes, without a display."""
+
+    def __init__(self):
+        self.top = 0
+        self.items = {}
+        self.next_id = 1
+
+    def create_window(self, x, y, **options):
+        self.next_id += 1
+        self.items[self.next_id] = {"state": options.get("state", "normal"), "y": y}
+        return self.next_id
+
+    def itemconfigure(self, item, **options):
+        if item in self.items and "state" in options:
+            self.items[item]["state"] = options["state"]
+
+    def coords(self, item, x, y):
+        self.items[item]["y"] = y
+
+    def delete(self, item):
+        del self.items[item]
+
+    def canvasy(self, y):
+        return self.top + y
+
+    def winfo_height(self):
+        return VIEW_HEIGHT
+
+    def yview_moveto(self, fraction):
+        self.top = 0
+
+    def configure(self, **options):
+        pass
+
+
+class StubRow:
+    def destroy(self):
+        pass
+
+
+def make_list():
+    view = VirtualList.__new__(VirtualList)
+    view.row_height = ROW_HEIGHT
+    view.make_row = lambda parent: StubRow()
+    view.bind_row = lambda row, item, index: setattr(row, "item", item)
+    view.on_view_change = None
+    view.overscan = 2
+    view.items, view.rows, view.windows, view.bound = [], [], [], []
+    view.width = 1
+    view.canvas = StubCanvas()
+    view.message = None
+    return view
+
+
+def visible_items(view):
+    return sorted(row.item for row, window in zip(view.rows, view.windows)
+                  if view.canvas.items[window]["state"] == "normal")
+
+
+def test_fills_the_viewport():
+    view = make_list()
+    view.set_items(range(100))
+    first, last, _ = window_slots(0, VIEW_HEIGHT, ROW_HEIGHT, 100)
+    assert visible_items(view) == list(range(first, last))
+
+
+def test_shrinking_hides_rows_past_the_end():
+    view = make_list()
+    view.set_items(range(100))
+    view.set_items(range(3))
+    assert visible_items(view) == [0, 1, 2]
+
+
+def test_clear_hides_every_row():
+    view = make_list()
+    view.set_items(range(100))
+    view.clear()
+    assert visible_items(view) == []
+
+
+def test_scrolled_list_replaced_by_a_short_one():
+    view = make_list()
+    view.set_items(range(100))
+    view.canvas.top = 40 * ROW_HEIGHT
+    view._layout()
+    view.set_items(range(5))
+    assert visible_items(view) == list(range(5))
@@ -0,0 +1,140 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+DEFAULT_WORKERS = 4  # network/parse jobs running at once
+POLL_MS = 16         # how often finished jobs are picked up (~60 fps)
+
+
+class Task:
+    """
+    One background call. 'cancel_event' is set once the task is stale;
+    long-running work can check it (or pass it on as 'cancel=') to stop
+    early. Callbacks of a stale task never run.
+    """
+
+    def __init__(self, channel, key):
+        self.channel = channel
+        self.key = key
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()  # only succeeds if it has not started yet
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+
+class TkTasks:
+    """
+    Runs blocking work (HTTP, parsing, image decoding) on a bounded thread
+    pool and hands results back to the Tk thread.
+
+    - Work is grouped in channels ("search", "details", ...). Submitting to
+      a channel makes its previous task stale: it is cancelled if it has
+      not started and its result is dropped otherwise.
+    - Submitting the same 'key' while that task is still running returns
+      the running task instead of queueing duplicate work.
+    - Workers never touch Tk. Results go through a queue that the Tk
+      thread drains with after() while anything is outstanding.
+
+    Usage (from the Tk thread):
+        self.tasks = TkTasks(self)
+        self.tasks.submit("search", fetch_results, query, key=query,
+                          on_done=self.display_results, on_error=self.show_error)
+    """
+
+    def __init__(self, root, max_workers=DEFAULT_WORKERS, poll_ms=POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tk-task")
+        self.finished = queue.SimpleQueue()
+        self.current = {}  # channel -> latest Task
+        self.outstanding = 0
+        self._polling = False
+
+    def submit(self, channel, fn, *args, key=None, on_done=None, on_error=None, cancellable=False):
+        """
+        Runs fn(*args) on a worker (with cancel=<Event> if 'cancellable') and
+        calls on_done(result) or on_error(exception) on the Tk thread, unless
+        the task went stale first. Returns the Task.
+        """
+        previous = self.current.get(channel)  # not delivered yet
+        if previous is not None:
+            if key is not None and previous.key == key and not previous.cancelled:
+                return previous
+            previous.cancel()
+
+        task = Task(channel, key)
+        kwargs = {"cancel": task.cancel_event} if cancellable else {}
+
+        def run():
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self.finished.put((task, on_error, e))
+            else:
+                self.finished.put((task, on_done, result))
+
+        self.current[channel] = task
+        self.outstanding += 1
+        task.future = self.executor.submit(run)
+        task.future.add_done_callback(self._on_future_done)
+        self._schedule_poll()
+        return task
+
+    def _on_future_done(self, future):
+        if future.cancelled():
+            self.finished.put((None, None, None))  # still counts as picked up
+
+    def busy(self, channel, key=None):
+        """
+        True while 'channel' has a live task (with this 'key', if given).
+        """
+        task = self.current.get(channel)
+        if task is None or task.cancelled:
+            return False
+        return key is None or task.key == key
+
+    def cancel(self, channel):
+        task = self.current.pop(channel, None)
+        if task is not None:
+            task.cancel()
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        try:
+            while True:
+                try:
+                    task, callback, value = self.finished.get_nowait()
+                except queue.Empty:
+                    break
+                self.outstanding -= 1
+                if task is None or task.cancelled or self.current.get(task.channel) is not task:
+                    continue  # stale: superseded or cancelled while running
+                del self.current[task.channel]
+                if callback is not None:
+                    callback(value)
+        finally:
+            if self.outstanding > 0:
+                self._schedule_poll()
+
+    def cancel_all(self):
+        for channel in list(self.current):
+            self.cancel(channel)
+
+    def shutdown(self):
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
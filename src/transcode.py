@@ -0,0 +1,188 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+MP3_BITRATE = "128k"
+READ_SIZE = 64 * 1024   # encoder stdout is drained in blocks of this size
+ENCODER_ENV = "AUDIO_ENCODER"  # "ffmpeg", "stub" or "none" (keep the WAV)
+
+
+class TranscodeError(RuntimeError):
+    pass
+
+
+class Encoder:
+    """
+    An encoder is a command that reads audio on stdin and writes the
+    encoded file to stdout, so it can sit between a download and the disk.
+    """
+
+    name = None
+    extension = ".mp3"
+
+    def command(self):
+        raise NotImplementedError
+
+    def available(self):
+        return True
+
+
+class FfmpegEncoder(Encoder):
+    name = "ffmpeg"
+
+    def __init__(self, bitrate=MP3_BITRATE, ffmpeg="ffmpeg"):
+        self.bitrate = bitrate
+        self.ffmpeg = ffmpeg
+
+    def command(self):
+        return [self.ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0",
+                "-vn", "-codec:a", "libmp3lame", "-b:a", self.bitrate, "-f", "mp3", "pipe:1"]
+
+    def available(self):
+        return shutil.which(self.ffmpeg) is not None
+
+
+# Keeps one byte in 'ratio': MP3-like output sizes without a real codec
+_STUB_SCRIPT = """
+import sys
+ratio = int(sys.argv[1])
+read, write = sys.stdin.buffer.read, sys.stdout.buffer.write
+while True:
+    block = read(65536)
+    if not block:
+        break
+    write(block[::ratio])
+"""
+
+
+class StubEncoder(Encoder):
+    """
+    Stand-in for tests and benchmarks where ffmpeg is not installed: a
+    Python subprocess that shrinks the stream ~'ratio' times, going
+    through the same stdin/stdout pipes as a real encoder.
+    """
+
+    name = "stub"
+
+    def __init__(self, ratio=11):
+        self.ratio = ratio
+
+    def command(self):
+        return [sys.executable, "-c", _STUB_SCRIPT, str(self.ratio)]
+
+
+ENCODERS = {"ffmpeg": FfmpegEncoder, "stub": StubEncoder}
+
+
+def default_encoder():
+    """
+    The encoder named by $AUDIO_ENCODER, else ffmpeg if it is installed.
+    None means "save the WAV as is".
+    """
+    name = os.environ.get(ENCODER_ENV)
+    if name:
+        return None if name == "none" else ENCODERS[name]()
+    encoder = FfmpegEncoder()
+    return encoder if encoder.available() else None
+
+
+def encode_stream(chunks, encoder, write):
+    """
+    Pipes 'chunks' (an iterable of bytes, e.g. response.iter_content())
+    through the encoder and hands its output to write(block).
+
+    A feeder thread writes the chunks to the encoder's stdin while this
+    thread drains its stdout, so download and encoding overlap and nothing
+    uncompressed is kept. Returns (bytes in, bytes out); raises
+    TranscodeError if the encoder fails, or the download's own exception.
+    """
+    stderr = tempfile.TemporaryFile()
+    proc = subprocess.Popen(encoder.command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr)
+    fed = [0]
+    feed_error = []
+
+    def feed():
+        try:
+            for chunk in chunks:
+                proc.stdin.write(chunk)
+                fed[0] += len(chunk)
+        except BrokenPipeError:
+            pass  # the encoder quit early; its exit status tells why
+        except Exception as e:
+            feed_error.append(e)
+            proc.kill()
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=feed, name="transcode-feed", daemon=True)
+    feeder.start()
+    written = 0
+    try:
+        while True:
+            block = proc.stdout.read(READ_SIZE)
+            if not block:
+                break
+            write(block)
+            written += len(block)
+        returncode = proc.wait()
+        feeder.join()
+        if feed_error:
+            raise feed_error[0]
+        if returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode("utf-8", "replace").strip()
+            raise TranscodeError(f"{encoder.name} exited with {returncode}: {message}")
+        return fed[0], written
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        proc.stdout.close()
+        stderr.close()
+
+
+def transcode_stream(chunks, out_path, encoder):
+    """
+    encode_stream() into '<out_path>.part', which replaces 'out_path'
+    only once the encoder exits cleanly. Returns (bytes in, bytes out).
+    """
+    part_path = f"{out_path}.part"
+    try:
+        with open(part_path, "wb") as out:
+            result = encode_stream(chunks, encoder, out.write)
+        os.replace(part_path, out_path)
+        return result
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+
+def save_audio_stream(chunks, out_dir, title, encoder=None):
+    """
+    Saves a downloaded WAV stream as '<out_dir>/<title>.mp3' through
+    'encoder' (default_encoder() if None), or as '<title>.wav' when no
+    encoder is available. Returns the file path.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    encoder = encoder or default_encoder()
+    if encoder is None:
+        file_path = os.path.join(out_dir, f"{title}.wav")
+        with open(file_path, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+        return file_path
+
+    file_path = os.path.join(out_dir, f"{title}{encoder.extension}")
+    transcode_stream(chunks, file_path, encoder)
+    return file_path
@@ -0,0 +1,167 @@
+import tkinter as tk
+from tkinter import ttk
+
+# --------------------------------------------------------------------
+# CONFIGURATION
+# --------------------------------------------------------------------
+OVERSCAN = 2  # extra rows kept bound above and below the viewport
+
+
+def window_slots(top, height, row_height, item_count, overscan=OVERSCAN):
+    """
+    The item range a virtual list has to show for a viewport starting at
+    canvas y 'top' and 'height' pixels tall: returns (first, last) item
+    indices (last exclusive) and the size of the row pool that covers any
+    scroll position at this height.
+    """
+    pool_size = int(height // row_height) + 2 + 2 * overscan
+    first = max(0, int(top // row_height) - overscan)
+    last = min(item_count, first + pool_size)
+    return first, last, pool_size
+
+
+class VirtualList(tk.Frame):
+    """
+    Scrollable list that only keeps widgets for the rows in view.
+
+    The items are a plain list; a small pool of row widgets (viewport
+    height / row_height + a few) is created once with make_row(parent)
+    and filled with bind_row(row, item, index). Rows are fixed-height
+    windows on a Canvas whose scroll region spans every item. Item i
+    always uses pool slot i % pool_size, so scrolling by one row rebinds
+    one row, whatever the number of items.
+
+    Usage:
+        rows = VirtualList(parent, 52, make_row, bind_row, on_view_change=on_scroll)
+        rows.pack(fill="both", expand=True)
+        rows.set_items(results)
+        rows.extend(next_page)
+    """
+
+    def __init__(self, master, row_height, make_row, bind_row, on_view_change=None,
+                 overscan=OVERSCAN, canvas_options=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.row_height = row_height
+        self.make_row = make_row
+        self.bind_row = bind_row
+        self.on_view_change = on_view_change
+        self.overscan = overscan
+        self.items = []
+
+        self.rows = []     # pooled row widgets
+        self.windows = []  # canvas window id per pooled row
+        self.bound = []    # item index each pooled row shows, None if hidden
+        self.width = 1
+
+        self.canvas = tk.Canvas(self, highlightthickness=0, **(canvas_options or {}))
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_yview)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.message = self.canvas.create_text(10, 10, anchor="nw", text="", font=("Arial", 12))
+        self.canvas.bind("<Configure>", self._on_resize)
+
+    # ----------------------------------------------------------------
+    # Items
+    # ----------------------------------------------------------------
+    def set_items(self, items):
+        self.items = list(items)
+        self._hide_rows()
+        self.show_message("")
+        self._update_scrollregion()
+        self.canvas.yview_moveto(0)
+        self._layout()
+
+    def extend(self, items):
+        self.items.extend(items)
+        self._update_scrollregion()
+        self._layout()
+
+    def clear(self):
+        self.set_items([])
+
+    def refresh(self, index=None):
+        """
+        Re-binds the row showing item 'index' (every row if None), e.g.
+        after the item changed.
+        """
+        for slot, bound in enumerate(self.bound):
+            if bound is not None and (index is None or bound == index):
+                self.bind_row(self.rows[slot], self.items[bound], bound)
+
+    def show_message(self, text):
+        """
+        Text shown over the list, e.g. "No results found.".
+        """
+        self.canvas.itemconfigure(self.message, text=text)
+
+    def visible_range(self):
+        """
+        (first, last) indices of the items at least partly in view, last
+        exclusive.
+        """
+        top = self.canvas.canvasy(0)
+        first = int(top // self.row_height)
+        last = int((top + self.canvas.winfo_height() - 1) // self.row_height) + 1
+        return min(first, len(self.items)), min(last, len(self.items))
+
+    # ----------------------------------------------------------------
+    # Layout
+    # ----------------------------------------------------------------
+    def _update_scrollregion(self):
+        self.canvas.configure(scrollregion=(0, 0, self.width, len(self.items) * self.row_height))
+
+    def _on_resize(self, event):
+        self.width = event.width
+        for window in self.windows:
+            self.canvas.itemconfigure(window, width=self.width)
+        self._update_scrollregion()
+        self._layout()
+
+    def _on_yview(self, first, last):
+        self.scrollbar.set(first, last)
+        self._layout()
+        if self.on_view_change:
+            self.on_view_change(first, last)
+
+    def _ensure_pool(self, size):
+        if size == len(self.rows):
+            return
+        while len(self.rows) < size:
+            row = self.make_row(self.canvas)
+            window = self.canvas.create_window(0, 0, window=row, anchor="nw", width=self.width,
+                                               height=self.row_height, state="hidden")
+            self.rows.append(row)
+            self.windows.append(window)
+        while len(self.rows) > size:
+            self.canvas.delete(self.windows.pop())
+            self.rows.pop().destroy()
+        # Slot assignment depends on the pool size; rebind everything once
+        self._hide_rows()
+
+    def _hide_rows(self):
+        for window in self.windows:
+            self.canvas.itemconfigure(window, state="hidden")
+        self.bound = [None] * len(self.rows)
+
+    def _layout(self):
+        first, last, pool_size = window_slots(
+            self.canvas.canvasy(0), max(self.canvas.winfo_height(), 1), self.row_height, len(self.items),
+            self.overscan)
+        self._ensure_pool(pool_size)
+
+        showing = set(range(first, last))
+        for slot, bound in enumerate(self.bound):
+            if bound is not None and bound not in showing:
+                self.canvas.itemconfigure(self.windows[slot], state="hidden")
+                self.bound[slot] = None
+
+        for index in range(first, last):
+            slot = index % pool_size
+            if self.bound[slot] == index:
+                continue
+            self.bind_row(self.rows[slot], self.items[index], index)
+            self.canvas.coords(self.windows[slot], 0, index * self.row_height)
+            self.canvas.itemconfigure(self.windows[slot], state="normal")
+            self.bound[slot] = index